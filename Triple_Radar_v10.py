@@ -1,9 +1,26 @@
 import streamlit as st
-import yfinance as yf
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
+import cProfile
+import io
+import logging
+import os
+import pstats
+import time
 import warnings
+from radar import modelos
+from radar.cache_graficos import CacheGraficos
+from radar.graficos import (figura_a_png, graficar_arima_forecast, graficar_garch_forecast,
+                            graficar_timeframe, huella_arima, huella_garch, huella_timeframe)
+from radar.graficos_web import spec_arima, spec_garch, spec_timeframe
+from radar.incremental import senales_de
+from radar.indicadores import calcular_consenso
+from radar.compartido import ResultadosCompartidos
+from radar.metricas import METRICAS, resumen_traza
+from radar.datos import CACHE_DIR_DEFECTO, PERIODO_BASE, AlmacenOHLCV
+from radar.paralelo import calcular_activos, crear_pool
+from radar.resampleo import (firma_timeframes, historias_timeframes, motor_de, sesion_de,
+                             timeframes_cambiados, timeframes_radar)
+from radar.watchlist import (DIVERGENCIA_RECIENTE, WATCHLIST_DEFECTO, leer_tickers, niveles_garch,
+                             senales_watchlist, tabla_watchlist)
 warnings.filterwarnings('ignore')
 
 # ─── CONFIGURACIÓN DE PÁGINA ────────────────────────────────────────────────
@@ -49,15 +66,15 @@ with st.expander("📖 MANUAL TÉCNICO COMPLETO — Leer antes de operar", expan
 | Timeframe | Propósito técnico | Datos utilizados |
 |-----------|-------------------|-----------------|
 | **1H** | Ejecución táctica intradiaria. Señales de entrada/salida de corto plazo. | Últimos 7 días en velas de 1 hora. |
-| **4H** | Confirmación de tendencia intermedia. Reduce ruido del 1H. | 60 días de datos 1H resampleados a 4H. |
-| **1D** | Marco estructural. Define bias direccional de fondo. | 1 año en velas diarias. ⚠️ El último dato corresponde al cierre del día previo. |
+| **4H** | Confirmación de tendencia intermedia. Reduce ruido del 1H. | 60 días de datos 1H resampleados a 4H, alineados a la apertura de sesión. |
+| **1D** | Marco estructural. Define bias direccional de fondo. | 1 año de sesiones diarias construidas desde las velas de 1H (futuros: 18:00–18:00 ET; BTC: día UTC). ⚠️ La última vela es la sesión en curso. |
 
 ---
 
 ### INDICADORES POR GRÁFICO
 
 #### 🔴 POC — Point of Control (Línea Roja Horizontal)
-**Definición técnica:** El nivel de precio con mayor volumen negociado en el período analizado. Deriva del concepto de *Volume Profile* (perfil de volumen vertical).
+**Definición técnica:** El nivel de precio con mayor volumen negociado en el período analizado. Deriva del concepto de *Volume Profile* (perfil de volumen vertical): el volumen de cada vela se reparte a lo largo de todo su rango High–Low. La franja roja tenue es el *área de valor* (niveles que concentran el 70% del volumen).
 **¿Por qué es relevante?** El mercado pasa más tiempo negociando alrededor del POC porque representa la zona de *fair value* de corto plazo donde compradores y vendedores están más equilibrados.
 **Para no financieros:** Es el precio "más justo" donde más gente compró y vendió. El precio suele volver a él, como un imán.
 **Señal operativa:**
@@ -110,8 +127,8 @@ with st.expander("📖 MANUAL TÉCNICO COMPLETO — Leer antes de operar", expan
 
 ### MODELOS PREDICTIVOS CUANTITATIVOS
 
-#### 📈 ARIMA — AutoRegressive Integrated Moving Average (2,1,2)
-**Definición técnica:** Modelo econométrico de series de tiempo que descompone el precio en tres componentes: AR(2) = el precio depende de los 2 precios anteriores; I(1) = se diferencia una vez para estacionalizar la serie; MA(2) = se modela el error de los 2 períodos anteriores.
+#### 📈 ARIMA — AutoRegressive Integrated Moving Average (p,d,q)
+**Definición técnica:** Modelo econométrico de series de tiempo que descompone el precio en tres componentes: AR(p) = el precio depende de los p precios anteriores; I(d) = se diferencia d veces para estacionalizar la serie; MA(q) = se modela el error de los q períodos anteriores. Por defecto (2,1,2); con la búsqueda automática, d sale de los tests ADF/KPSS y (p, q) del AIC/BIC. El orden usado se muestra en el título del gráfico.
 **Para no financieros:** Una fórmula matemática que aprende el patrón histórico del precio y extrapola hacia dónde debería ir. Como una regresión lineal avanzada con memoria.
 **Señal operativa:**
 - Línea verde punteada ascendente + bandas azul cielo **estrechas** → tendencia alcista con alta confianza estadística. Mejor momento para considerar compra.
@@ -159,312 +176,50 @@ with st.expander("📖 MANUAL TÉCNICO COMPLETO — Leer antes de operar", expan
 """)
 
 # ─── 3. IMPORTS OPCIONALES ───────────────────────────────────────────────────
-try:
-    from statsmodels.tsa.arima.model import ARIMA
-    ARIMA_DISPONIBLE = True
-except ImportError:
-    ARIMA_DISPONIBLE = False
+if not modelos.ARIMA_DISPONIBLE:
     st.warning("⚠️ statsmodels no instalado. ARIMA no disponible. Ejecutar: pip install statsmodels")
 
-try:
-    from arch import arch_model
-    GARCH_DISPONIBLE = True
-except ImportError:
-    GARCH_DISPONIBLE = False
+if not modelos.GARCH_DISPONIBLE:
     st.warning("⚠️ arch no instalado. GARCH no disponible. Ejecutar: pip install arch")
 
-# ─── 4. FUNCIONES AUXILIARES ─────────────────────────────────────────────────
+# ─── 4. FUNCIONES DE GRÁFICOS ────────────────────────────────────────────────
+# El cálculo vive en el paquete `radar` (indicadores, modelos) y el dibujo en
+# radar.graficos; aquí solo se cachea el render y se muestra.
 
-def calcular_rsi(series, periodo=14):
-    """RSI estándar de Wilder (14 períodos)."""
-    delta = series.diff()
-    gain = delta.where(delta > 0, 0.0).rolling(window=periodo).mean()
-    loss = (-delta.where(delta < 0, 0.0)).rolling(window=periodo).mean()
-    rs = gain / loss.replace(0, np.nan)
-    return 100 - (100 / (1 + rs))
+@st.cache_resource
+def obtener_cache_graficos():
+    """LRU de PNG compartida por todos los reruns y sesiones."""
+    return CacheGraficos(max_bytes=RENDER_CACHE_MB * 1024 * 1024)
 
 
-def detectar_divergencias(precios, rsi, lookback=5):
+def mostrar_grafico(clave, construir, spec=None, **etiquetas):
     """
-    Detección algorítmica de divergencias RSI-Precio.
-    Retorna índices de divergencias alcistas y bajistas.
+    Muestra el PNG cacheado bajo `clave`; solo llama a `construir()` (-> fig) si no está.
+    Con gráficos interactivos se envía `spec()` (Vega-Lite) y lo dibuja el navegador.
+    El render (figura + PNG, o el spec) se mide como etapa "render" con las `etiquetas` dadas.
     """
-    divergencias_alcistas = []
-    divergencias_bajistas = []
-    n = len(precios)
-    for i in range(lookback * 2, n):
-        p_curr = float(precios.iloc[i])
-        p_prev = float(precios.iloc[i - lookback])
-        r_curr = float(rsi.iloc[i])   if not pd.isna(rsi.iloc[i])   else np.nan
-        r_prev = float(rsi.iloc[i - lookback]) if not pd.isna(rsi.iloc[i - lookback]) else np.nan
-        if np.isnan(r_curr) or np.isnan(r_prev):
-            continue
-        # Divergencia bajista: precio HH, RSI LH (señal de agotamiento alcista)
-        if p_curr > p_prev and r_curr < r_prev and r_curr > 60:
-            divergencias_bajistas.append(i)
-        # Divergencia alcista: precio LL, RSI HL (señal de agotamiento bajista)
-        if p_curr < p_prev and r_curr > r_prev and r_curr < 40:
-            divergencias_alcistas.append(i)
-    return divergencias_alcistas, divergencias_bajistas
-
-
-def resamplear_4h(df_1h):
-    """Resamplea OHLCV de 1H a 4H."""
-    if df_1h.empty:
-        return pd.DataFrame()
-    try:
-        df_4h = df_1h[['Open', 'High', 'Low', 'Close', 'Volume']].resample('4h').agg({
-            'Open':   'first',
-            'High':   'max',
-            'Low':    'min',
-            'Close':  'last',
-            'Volume': 'sum'
-        }).dropna(subset=['Close'])
-        return df_4h
-    except Exception:
-        return pd.DataFrame()
-
-
-def graficar_arima_forecast(precios, nombre_activo, periodos=10):
-    """ARIMA(2,1,2): predicción de precio con IC al 95%."""
-    if not ARIMA_DISPONIBLE:
-        return None, None
-    try:
-        s = precios.dropna().astype(float).tail(200)
-        if len(s) < 50:
-            return None, None
-        fit = ARIMA(s, order=(2, 1, 2)).fit()
-        fc  = fit.get_forecast(steps=periodos)
-        mu  = fc.predicted_mean
-        ci  = fc.conf_int(alpha=0.05)
-        freq = pd.infer_freq(s.index[-20:]) or 'h'
-        idx_fut = pd.date_range(start=s.index[-1], periods=periodos + 1, freq=freq)[1:]
-        hist = s.tail(50)
-
-        fig, ax = plt.subplots(figsize=(8, 4))
-        fig.patch.set_facecolor('#0e1117')
-        ax.set_facecolor('#0e1117')
-        ax.plot(hist.index, hist.values, color='white', linewidth=1.5, label='Precio real')
-        ax.plot(idx_fut, mu.values, color='lime', linewidth=2, linestyle='--', label='Predicción ARIMA')
-        ax.fill_between(idx_fut, ci.iloc[:, 0].values, ci.iloc[:, 1].values,
-                        color='skyblue', alpha=0.35, label='IC 95%')
-        ax.plot([hist.index[-1], idx_fut[0]], [hist.values[-1], mu.values[0]],
-                color='lime', linewidth=1.5, linestyle='--')
-
-        p0 = float(s.iloc[-1])
-        pf = float(mu.iloc[-1])
-        pct = (pf - p0) / p0 * 100
-        dir_txt = "▲ SUBE" if pf > p0 else "▼ BAJA"
-        dir_col = 'lime' if pf > p0 else 'tomato'
-
-        ax.set_title(f"ARIMA — {nombre_activo}   {dir_txt}  {pct:+.2f}%",
-                     color=dir_col, fontsize=11, fontweight='bold')
-        ax.tick_params(axis='x', colors='gray', labelsize=7, rotation=45)
-        ax.tick_params(axis='y', colors='gray', labelsize=8)
-        ax.legend(loc='upper left', fontsize=8, facecolor='#1a1a2e', labelcolor='white')
-        ax.grid(color='gray', linestyle=':', linewidth=0.3, alpha=0.5)
-        plt.tight_layout()
-        return fig, {"prediccion": pf, "direccion": dir_txt, "cambio_pct": pct, "ultimo_precio": p0}
-    except Exception as e:
-        st.caption(f"ℹ️ ARIMA: {e}")
-        return None, None
+    if graficos_web and spec is not None:
+        with METRICAS.tramo("render", backend="web", **etiquetas):
+            s = spec()
+        st.vega_lite_chart(s, use_container_width=s.get("width") == "container")
+        return
 
+    def renderizar():
+        with METRICAS.tramo("render", **etiquetas):
+            return figura_a_png(construir())
+    png = obtener_cache_graficos().obtener_o_renderizar(clave, renderizar)
+    st.image(png)
 
-def graficar_garch_forecast(precios, nombre_activo, periodos=10):
-    """GARCH(1,1): predicción de volatilidad condicional."""
-    if not GARCH_DISPONIBLE:
-        return None, None
-    try:
-        s = precios.dropna().astype(float)
-        if len(s) < 100:
-            return None, None
-        ret = s.pct_change().dropna() * 100
-        ret = ret.tail(200)
-        fit = arch_model(ret, vol='Garch', p=1, q=1, mean='Zero', rescale=False)\
-                  .fit(disp='off', show_warning=False)
-        fc  = fit.forecast(horizon=periodos)
-        vol_pred = np.sqrt(fc.variance.values[-1, :])
-        vol_hist = ret.rolling(5).std().tail(50)
-        freq = pd.infer_freq(ret.index[-20:]) or 'h'
-        idx_fut = pd.date_range(start=vol_hist.index[-1], periods=periodos + 1, freq=freq)[1:]
-
-        fig, ax = plt.subplots(figsize=(8, 4))
-        fig.patch.set_facecolor('#0e1117')
-        ax.set_facecolor('#0e1117')
-        ax.plot(vol_hist.index, vol_hist.values, color='white', linewidth=1.5, label='Volatilidad histórica')
-        ax.plot(idx_fut, vol_pred, color='orange', linewidth=2, linestyle='--', label='Predicción GARCH')
-        ax.fill_between(idx_fut, vol_pred * 0.5, vol_pred * 1.5,
-                        color='skyblue', alpha=0.35, label='Rango esperado')
-        if not np.isnan(vol_hist.values[-1]):
-            ax.plot([vol_hist.index[-1], idx_fut[0]],
-                    [vol_hist.values[-1], vol_pred[0]], color='orange', linewidth=1.5, linestyle='--')
-
-        vol_media  = float(ret.std())
-        vol_futura = float(np.mean(vol_pred))
-        ratio = vol_futura / vol_media if vol_media > 0 else 1
-        if ratio > 1.5:
-            nivel, col = "MUY ALTA ⚠️", "red"
-        elif ratio > 1.0:
-            nivel, col = "ALTA", "orange"
-        elif ratio > 0.5:
-            nivel, col = "NORMAL", "lime"
-        else:
-            nivel, col = "BAJA", "cyan"
-
-        ax.set_title(f"GARCH — {nombre_activo}   Volatilidad: {nivel}", color=col, fontsize=11, fontweight='bold')
-        ax.tick_params(axis='x', colors='gray', labelsize=7, rotation=45)
-        ax.tick_params(axis='y', colors='gray', labelsize=8)
-        ax.legend(loc='upper left', fontsize=8, facecolor='#1a1a2e', labelcolor='white')
-        ax.grid(color='gray', linestyle=':', linewidth=0.3, alpha=0.5)
-        ax.set_ylabel('Volatilidad (%)', color='gray', fontsize=9)
-        plt.tight_layout()
-        return fig, {"volatilidad_futura": vol_futura, "nivel": nivel, "vol_media": vol_media}
-    except Exception as e:
-        st.caption(f"ℹ️ GARCH: {e}")
-        return None, None
 
+# ─── 5. CACHÉ DE DATOS OHLCV ─────────────────────────────────────────────────
 
-def graficar_timeframe(df, nombre, tf_label, es_diario=False):
-    """
-    Gráfico completo por timeframe:
-    Precio + POC + VWAP + RSI Divergence + Diamante.
-    Retorna (fig, tendencia).
-    """
-    if df is None or df.empty or len(df) < 15:
-        return None, "NEUTRO"
+@st.cache_resource
+def obtener_almacen():
+    """Una sola instancia por proceso: la comparten todos los reruns."""
+    return AlmacenOHLCV(CACHE_DIR, ttl=CACHE_TTL_SEG, timeout=DATOS_TIMEOUT_SEG)
 
-    df = df.copy()
-    # Aplanar MultiIndex si existe
-    if isinstance(df.columns, pd.MultiIndex):
-        df.columns = df.columns.get_level_values(0)
 
-    # ── POC ──────────────────────────────────────────────────────────────────
-    try:
-        vol_col = 'Volume'
-        bins = 20
-        df['_bin'] = pd.cut(df['Close'], bins=bins)
-        poc_bin = df.groupby('_bin', observed=True)[vol_col].sum().idxmax()
-        poc_price = float((poc_bin.left + poc_bin.right) / 2)
-        df.drop(columns=['_bin'], inplace=True)
-    except Exception:
-        poc_price = float(df['Close'].mean())
-
-    # ── VWAP ─────────────────────────────────────────────────────────────────
-    df['_vol'] = df['Volume'].replace(0, 1)
-    df['VWAP'] = (df['Close'] * df['_vol']).cumsum() / df['_vol'].cumsum()
-    df['VWAP'] = df['VWAP'].ffill().bfill()
-
-    # ── RSI + Divergencias ───────────────────────────────────────────────────
-    df['RSI'] = calcular_rsi(df['Close'], periodo=14)
-    div_alc, div_baj = detectar_divergencias(df['Close'], df['RSI'], lookback=5)
-
-    # ── Diamante ─────────────────────────────────────────────────────────────
-    df['_rvol']  = df['_vol'] / df['_vol'].rolling(20, min_periods=1).mean()
-    df['_range'] = df['High'] - df['Low']
-    last = df.iloc[-1]
-    try:
-        rvol_v  = float(last['_rvol'])  if not pd.isna(last['_rvol'])  else 0
-        rng_v   = float(last['_range']) if not pd.isna(last['_range']) else 0
-        rng_avg = float(df['_range'].rolling(20, min_periods=1).mean().iloc[-1])
-        es_diamante = (rvol_v > 2.0) and (rng_v < rng_avg)
-    except Exception:
-        es_diamante = False
-
-    # ── Tendencia (precio vs VWAP) ───────────────────────────────────────────
-    try:
-        tendencia  = "COMPRA" if float(last['Close']) > float(last['VWAP']) else "VENTA"
-        color_caja = "#155015" if tendencia == "COMPRA" else "#7a1515"
-    except Exception:
-        tendencia  = "NEUTRO"
-        color_caja = "#333333"
-
-    # ── Plot: precio arriba | RSI abajo ──────────────────────────────────────
-    tail = 80
-    df_p = df.tail(tail)
-    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(7, 5.2),
-                                   gridspec_kw={'height_ratios': [3, 1]},
-                                   sharex=True)
-    fig.patch.set_facecolor('#0e1117')
-    ax1.set_facecolor('#0e1117')
-    ax2.set_facecolor('#0e1117')
-
-    # Precio
-    ax1.plot(df_p.index, df_p['Close'], color='white', alpha=0.85, linewidth=1.3, label='Precio')
-    # VWAP
-    ax1.plot(df_p.index, df_p['VWAP'], color='cyan', linewidth=1.6, label='VWAP')
-    # POC
-    ax1.axhline(y=poc_price, color='red', alpha=0.85, linewidth=1.8, label='POC')
-    ax1.text(df_p.index[-1], poc_price, f'  {poc_price:,.2f}',
-             color='red', fontsize=7.5, fontweight='bold',
-             ha='left', va='center', backgroundcolor='#0e1117')
-
-    # Nota delay diario
-    if es_diario:
-        ax1.text(0.99, 0.03, '⚠️ Último dato: cierre anterior',
-                 transform=ax1.transAxes, color='#ffdd57',
-                 fontsize=6.5, ha='right', va='bottom', alpha=0.85)
-
-    # Diamante
-    if es_diamante:
-        ax1.scatter(df_p.index[-1], float(df_p['Close'].iloc[-1]),
-                    color='#00d4ff', s=200, marker='d',
-                    edgecolors='white', linewidths=1.5, zorder=8, label='💎 Compresión Vol.')
-
-    # Divergencias sobre el precio
-    offset = float(df_p['Close'].std()) * 0.45
-    n_total = len(df)
-    base    = n_total - tail
-    for i in div_alc:
-        ri = i - base
-        if 0 <= ri < len(df_p):
-            ax1.scatter(df_p.index[ri],
-                        float(df_p['Close'].iloc[ri]) - offset,
-                        marker='^', color='lime', s=110, zorder=9,
-                        label='Div. Alcista ▲')
-    for i in div_baj:
-        ri = i - base
-        if 0 <= ri < len(df_p):
-            ax1.scatter(df_p.index[ri],
-                        float(df_p['Close'].iloc[ri]) + offset,
-                        marker='v', color='tomato', s=110, zorder=9,
-                        label='Div. Bajista ▼')
-
-    # Badge tendencia
-    ax1.text(0.02, 0.94, tendencia,
-             transform=ax1.transAxes, color='white',
-             fontsize=11, fontweight='bold',
-             bbox=dict(facecolor=color_caja, alpha=0.92, boxstyle='round,pad=0.4'))
-
-    ax1.set_title(f"TF: {tf_label}  ·  {nombre}  ·  {tendencia}",
-                  color='white', fontsize=10, fontweight='bold')
-    ax1.tick_params(axis='y', colors='gray', labelsize=7)
-    ax1.grid(color='gray', linestyle=':', linewidth=0.3, alpha=0.35)
-    # Leyenda sin duplicados
-    hdls, lbls = ax1.get_legend_handles_labels()
-    ax1.legend(dict(zip(lbls, hdls)).values(), dict(zip(lbls, hdls)).keys(),
-               loc='upper right', fontsize=6.5,
-               facecolor='#1a1a2e', labelcolor='white')
-
-    # Panel RSI
-    rsi_v = df_p['RSI'].values
-    ax2.plot(df_p.index, rsi_v, color='#c77dff', linewidth=1.2, label='RSI(14)')
-    ax2.axhline(70, color='tomato', linewidth=0.8, linestyle='--', alpha=0.7)
-    ax2.axhline(30, color='lime',   linewidth=0.8, linestyle='--', alpha=0.7)
-    ax2.axhline(50, color='gray',   linewidth=0.5, linestyle=':', alpha=0.5)
-    ax2.fill_between(df_p.index, rsi_v, 70, where=(rsi_v >= 70), color='tomato', alpha=0.18)
-    ax2.fill_between(df_p.index, rsi_v, 30, where=(rsi_v <= 30), color='lime',   alpha=0.18)
-    ax2.set_ylim(0, 100)
-    ax2.set_ylabel('RSI', color='gray', fontsize=7)
-    ax2.tick_params(axis='x', colors='gray', labelsize=6, rotation=45)
-    ax2.tick_params(axis='y', colors='gray', labelsize=6)
-    ax2.grid(color='gray', linestyle=':', linewidth=0.3, alpha=0.3)
-    ax2.legend(loc='upper right', fontsize=6.5, facecolor='#1a1a2e', labelcolor='white')
-
-    plt.tight_layout(h_pad=0.5)
-    return fig, tendencia
-
-
-# ─── 5. ACTIVOS Y CONFIGURACIÓN ──────────────────────────────────────────────
+# ─── 6. ACTIVOS Y CONFIGURACIÓN ──────────────────────────────────────────────
 
 ACTIVOS = {
     "🥇 Oro (Gold Futures)":        "GC=F",
@@ -472,35 +227,153 @@ ACTIVOS = {
     "₿ Bitcoin (BTC/USD)":          "BTC-USD",
 }
 
-# ─── 6. LOOP PRINCIPAL ───────────────────────────────────────────────────────
+# Caché OHLCV en disco (se puede cambiar por variables de entorno)
+CACHE_DIR     = CACHE_DIR_DEFECTO
+CACHE_TTL_SEG = int(os.environ.get("TRIPLE_RADAR_CACHE_TTL", "300"))
+# Timeout por petición al proveedor (Yahoo; TRIPLE_RADAR_DATOS_DIR = archivos locales sin red)
+DATOS_TIMEOUT_SEG = float(os.environ.get("TRIPLE_RADAR_DATOS_TIMEOUT", "20"))
+
+# Modelos: barras nuevas tras las que se re-estiman los parámetros (entre medias se reutilizan)
+ARIMA_REFIT_CADA = 24
+GARCH_REFIT_CADA = 24
+# Orden ARIMA automático: barras tras las que se re-busca d (ADF/KPSS) y (p, q) por AIC/BIC (0 = fijo (2,1,2))
+ARIMA_BUSCAR_CADA = int(os.environ.get("TRIPLE_RADAR_ARIMA_BUSCAR_CADA", "0")) or None
+ARIMA_CRITERIO    = os.environ.get("TRIPLE_RADAR_ARIMA_CRITERIO", "aic")
+
+# Universo del modo Watchlist (archivo con un ticker por línea)
+WATCHLIST_ARCHIVO = WATCHLIST_DEFECTO
+
+# Modo en vivo: cada cuántos segundos cada activo sondea su feed (y frescura máxima de los datos)
+VIVO_SEG = int(os.environ.get("TRIPLE_RADAR_VIVO_SEG", "60"))
+
+# Espera máxima por un cálculo que está haciendo otra sesión
+CALCULO_TIMEOUT_SEG = 120
+
+# Tope de memoria de la caché de gráficos renderizados (PNG)
+RENDER_CACHE_MB = int(os.environ.get("TRIPLE_RADAR_RENDER_CACHE_MB", "64"))
+
+# Gráficos interactivos (Vega-Lite en el navegador) por defecto en vez de PNG; puntos por serie (LTTB)
+GRAFICOS_WEB    = os.environ.get("TRIPLE_RADAR_GRAFICOS", "png") == "web"
+GRAFICOS_PUNTOS = int(os.environ.get("TRIPLE_RADAR_GRAFICOS_PUNTOS", "400"))
+# Historia archivada (1H) que los gráficos interactivos muestran en la franja de contexto de cada TF
+GRAFICOS_HISTORIA = os.environ.get("TRIPLE_RADAR_GRAFICOS_HISTORIA", "730d")
+
+# Métricas: archivo Prometheus que se reescribe en cada rerun y logs JSON por etapa
+METRICAS_ARCHIVO = os.environ.get("TRIPLE_RADAR_METRICAS_ARCHIVO")
+LOG_METRICAS = os.environ.get("TRIPLE_RADAR_LOG_METRICAS") == "1"
+
+# Procesos para el cálculo por activo (1 = todo en el proceso de Streamlit)
+RADAR_WORKERS = int(os.environ.get("TRIPLE_RADAR_WORKERS",
+                                   str(min(len(ACTIVOS), os.cpu_count() or 1))))
+
+
+@st.cache_resource
+def obtener_pool():
+    """Pool de procesos compartido por todos los reruns y sesiones."""
+    return crear_pool(RADAR_WORKERS)
+
+
+@st.cache_resource
+def obtener_memo_historias():
+    """Historia archivada por TF de cada ticker y firma del archivo (la franja de los gráficos web)."""
+    return {}
+
+
+@st.cache_resource
+def obtener_memo_garch():
+    """Régimen GARCH de la watchlist por ticker y última barra (compartido por las sesiones)."""
+    return {}
+
 
-for nombre, ticker in ACTIVOS.items():
+@st.cache_resource
+def configurar_logs_metricas():
+    """Logs JSON de cada etapa (logger radar.metricas) a stderr, una sola vez por proceso."""
+    logger = logging.getLogger("radar.metricas")
+    logger.addHandler(logging.StreamHandler())
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return logger
+
+
+if LOG_METRICAS:
+    configurar_logs_metricas()
+
+
+@st.cache_resource
+def obtener_resultados_compartidos():
+    """Resultados por activo compartidos entre sesiones (una sola sesión calcula cada barra)."""
+    return ResultadosCompartidos(max_entradas=1024)   # holgura para un universo de cientos
+
+# ─── 7. LOOP PRINCIPAL ───────────────────────────────────────────────────────
+
+def preparar_activos(tickers, esperar=False, ttl=None):
+    """
+    Feed de 1H de cada ticker + sus TF (4H y 1D se derivan por sesión en el motor multi-TF).
+    Todos los pedidos van en paralelo; lo que ya está en caché se muestra al instante
+    aunque esté vencido y se refresca en segundo plano para el próximo rerun
+    (con `esperar=True` se espera la descarga; `ttl` como en AlmacenOHLCV.obtener).
+    Retorna (datos, errores): datos[ticker] = (ticker, df_1h, timeframes).
+    """
+    tickers = list(tickers)
+    datos, errores = {}, {}
+    with METRICAS.tramo("fase_datos"):
+        feeds = obtener_almacen().obtener_varios([(t, PERIODO_BASE, "1h") for t in tickers],
+                                                 esperar=esperar, ttl=ttl)
+    for ticker, df_1h in zip(tickers, feeds):
+        try:
+            if isinstance(df_1h, Exception):
+                raise df_1h
+            with METRICAS.tramo("resampleo", ticker=ticker):
+                motor = motor_de(ticker)
+                motor.actualizar(df_1h)
+                datos[ticker] = (ticker, df_1h, timeframes_radar(motor))
+        except Exception as e:
+            errores[ticker] = e
+    return datos, errores
+
+
+def calcular(datos, con_modelos=True):
+    """Cálculo numérico en paralelo (modelos + indicadores por activo), compartido entre sesiones."""
+    with METRICAS.tramo("fase_calculo"):
+        return calcular_activos(datos.values(), pool=obtener_pool(),
+                                compartido=obtener_resultados_compartidos(),
+                                timeout=CALCULO_TIMEOUT_SEG,
+                                arima_refit_cada=ARIMA_REFIT_CADA,
+                                garch_refit_cada=GARCH_REFIT_CADA,
+                                arima_buscar_cada=ARIMA_BUSCAR_CADA,
+                                arima_criterio=ARIMA_CRITERIO,
+                                con_modelos=con_modelos)
+
+
+def mostrar_activo(nombre, res, senales=None):
+    """
+    Modelos, gráficos por TF y consenso de un activo (`res` puede ser la excepción).
+    Con `senales` (incremental.SenalesIncrementales.actualizar) el consenso sale de
+    la vela en formación aunque los gráficos sean de la última vela calculada.
+    """
     st.markdown("---")
     st.subheader(nombre)
     consenso = []
 
     try:
-        # ── Descarga base de datos ────────────────────────────────────────────
-        df_1h = yf.download(ticker, period="60d", interval="1h", progress=False)
-        df_1d = yf.download(ticker, period="1y",  interval="1d", progress=False)
-
-        for _df in [df_1h, df_1d]:
-            if isinstance(_df.columns, pd.MultiIndex):
-                _df.columns = _df.columns.get_level_values(0)
-
-        df_4h     = resamplear_4h(df_1h)
-        df_1h_rec = df_1h.tail(7 * 24)   # ~7 días recientes para el TF de 1H
+        if isinstance(res, Exception):
+            raise res
 
         # ── ARIMA & GARCH ──────────────────────────────────────────────────────
         st.markdown("##### 🔮 Modelos Cuantitativos — ARIMA · GARCH")
-        if not df_1h.empty and len(df_1h) > 100:
+        if res['modelos']:
             col_a, col_g = st.columns(2)
             with col_a:
-                fig_a, res_a = graficar_arima_forecast(df_1h['Close'], nombre)
-                if fig_a:
-                    st.pyplot(fig_a)
-                    plt.close(fig_a)
+                res_a = res['arima']
+                if 'ARIMA' in res['errores']:
+                    st.caption(f"ℹ️ ARIMA: {res['errores']['ARIMA']}")
+                if res_a:
+                    mostrar_grafico(huella_arima(res_a, nombre),
+                                    lambda: graficar_arima_forecast(res_a, nombre),
+                                    spec=lambda: spec_arima(res_a, nombre, GRAFICOS_PUNTOS),
+                                    ticker=res['ticker'], grafico="arima")
                     st.caption(
+                        f"ARIMA{res_a['orden']} · "
                         f"Precio actual: {res_a['ultimo_precio']:,.2f}  →  "
                         f"Predicción: {res_a['prediccion']:,.2f}  "
                         f"({res_a['cambio_pct']:+.2f}%)"
@@ -508,10 +381,14 @@ for nombre, ticker in ACTIVOS.items():
                 else:
                     st.info("ARIMA no disponible para este activo.")
             with col_g:
-                fig_g, res_g = graficar_garch_forecast(df_1h['Close'], nombre)
-                if fig_g:
-                    st.pyplot(fig_g)
-                    plt.close(fig_g)
+                res_g = res['garch']
+                if 'GARCH' in res['errores']:
+                    st.caption(f"ℹ️ GARCH: {res['errores']['GARCH']}")
+                if res_g:
+                    mostrar_grafico(huella_garch(res_g, nombre),
+                                    lambda: graficar_garch_forecast(res_g, nombre),
+                                    spec=lambda: spec_garch(res_g, nombre, GRAFICOS_PUNTOS),
+                                    ticker=res['ticker'], grafico="garch")
                     st.caption(
                         f"Volatilidad esperada: {res_g['volatilidad_futura']:.3f}%  |  "
                         f"Media histórica: {res_g['vol_media']:.3f}%  |  "
@@ -525,40 +402,57 @@ for nombre, ticker in ACTIVOS.items():
         # ── Análisis Multi-Temporal: 1H · 4H · 1D ────────────────────────────
         st.markdown("##### 📈 Análisis Multi-Temporal — 1H · 4H · Diario")
         col1, col2, col3 = st.columns(3)
+        # Gráficos interactivos: la historia archivada del feed base, re-agregada por TF
+        # (se reutiliza entre reruns mientras no llegue una barra al archivo)
+        historias = {}
+        if graficos_web:
+            historias = historias_timeframes(obtener_almacen().archivo, res['ticker'], GRAFICOS_HISTORIA,
+                                             ("1H", "4H", "1D"), sesion_de(res['ticker']),
+                                             obtener_memo_historias())
         datasets = [
-            (col1, df_1h_rec, "1H",  False),
-            (col2, df_4h,     "4H",  False),
-            (col3, df_1d,     "1D",  True),
+            (col1, "1H", False),
+            (col2, "4H", False),
+            (col3, "1D", True),
         ]
-        for col, df_tf, tf_label, es_d in datasets:
+        for col, tf_label, es_d in datasets:
             with col:
-                fig_tf, tend = graficar_timeframe(df_tf, nombre, tf_label, es_d)
-                if fig_tf:
-                    st.pyplot(fig_tf)
-                    plt.close(fig_tf)
-                    consenso.append(tend)
+                calc = res['timeframes'][tf_label]
+                if calc is not None:
+                    mostrar_grafico(huella_timeframe(calc, nombre, tf_label, es_d),
+                                    lambda: graficar_timeframe(calc, nombre, tf_label, es_d)[0],
+                                    spec=lambda: spec_timeframe(
+                                        calc, nombre, tf_label, es_d, GRAFICOS_PUNTOS,
+                                        historia=historias.get(tf_label)),
+                                    ticker=res['ticker'], grafico="timeframe", tf=tf_label)
+                    consenso.append(calc['tendencia'])
                 else:
                     st.warning(f"Sin datos suficientes para {tf_label}")
 
         # ── Fuego Maestro ──────────────────────────────────────────────────────
         st.markdown("##### 🔥 Consenso Multi-Temporal")
-        if len(consenso) >= 2:
-            compras = consenso.count("COMPRA")
-            ventas  = consenso.count("VENTA")
+        estado = res['consenso']
+        if senales is not None:
+            vivas = [(tf, senales[tf]) for tf in ("1H", "4H", "1D") if senales.get(tf) is not None]
+            consenso = [s['tendencia'] for _, s in vivas]
+            estado = calcular_consenso(consenso)
+            st.caption("📡 Vela en formación — " + "  |  ".join(
+                f"{tf}: RSI {s['rsi']:.1f} · {'sobre' if s['tendencia'] == 'COMPRA' else 'bajo'} VWAP"
+                for tf, s in vivas))
+        if estado is not None:
             tfs_str = " · ".join([
                 f"{['1H','4H','1D'][i]} {'✅' if consenso[i]=='COMPRA' else '🔴'}"
                 for i in range(len(consenso))
             ])
-            if compras == 3:
+            if estado == "ALCISTA_TOTAL":
                 st.success(f"🔥 FUEGO MAESTRO — ALINEACIÓN ALCISTA TOTAL  |  {tfs_str}")
                 st.caption("Los 3 timeframes confirman precio sobre VWAP. Máxima probabilidad de continuación alcista.")
-            elif ventas == 3:
+            elif estado == "BAJISTA_TOTAL":
                 st.error(f"🧊 ALINEACIÓN BAJISTA TOTAL  |  {tfs_str}")
                 st.caption("Los 3 timeframes confirman precio bajo VWAP. Máxima presión vendedora.")
-            elif compras == 2:
+            elif estado == "ALCISTA_PARCIAL":
                 st.warning(f"⬆️ SESGO ALCISTA PARCIAL (2/3 TF)  |  {tfs_str}")
                 st.caption("Tendencia alcista en desarrollo. Espera que el tercer TF confirme antes de operar.")
-            elif ventas == 2:
+            elif estado == "BAJISTA_PARCIAL":
                 st.warning(f"⬇️ SESGO BAJISTA PARCIAL (2/3 TF)  |  {tfs_str}")
                 st.caption("Tendencia bajista en desarrollo. Espera confirmación del tercer TF.")
             else:
@@ -570,6 +464,174 @@ for nombre, ticker in ACTIVOS.items():
     except Exception as e:
         st.error(f"Error procesando {nombre}: {e}")
 
+
+@st.fragment(run_every=VIVO_SEG)
+def seccion_en_vivo(nombre, ticker):
+    """
+    Sección de un activo en modo en vivo: se re-ejecuta sola cada VIVO_SEG s sin
+    tocar el resto de la página y sondea el feed del ticker. Las señales de la
+    última vela (consenso, RSI, VWAP) salen de los indicadores incrementales, que
+    solo procesan las velas nuevas o revisadas. Modelos y gráficos se recalculan
+    solo cuando abre una vela nueva (los modelos re-estiman según su refit_cada),
+    no con cada revisión de la que está en formación.
+    """
+    entrada = st.session_state["en_vivo"][ticker]
+    if entrada.pop("recien", False):
+        cambios = []      # lo acaba de calcular el rerun completo
+    else:
+        datos, errores = preparar_activos([ticker], esperar=True, ttl=VIVO_SEG)
+        if ticker in datos:
+            timeframes = datos[ticker][2]
+            firma = firma_timeframes(timeframes)
+            cambios = timeframes_cambiados(entrada["firma"], firma)
+            nuevas = timeframes_cambiados(entrada["firma"], firma, revisiones=False)
+            METRICAS.contar("en_vivo", ticker=ticker,
+                            resultado="vela_nueva" if nuevas else "revision" if cambios else "sin_cambios")
+            if nuevas or isinstance(entrada["res"], Exception):
+                entrada.update(res=calcular(datos)[ticker], instante=time.time())
+            if cambios:
+                with METRICAS.tramo("senales", ticker=ticker):
+                    entrada["senales"] = senales_de(ticker).actualizar(timeframes)
+            entrada["firma"] = firma
+        else:
+            # Proveedor caído: se sigue mostrando el último resultado, si lo hay
+            cambios = []
+            if entrada["firma"] is None:
+                entrada["res"] = errores[ticker]
+    mostrar_activo(nombre, entrada["res"], entrada["senales"])
+    detalle = f"🔄 {' · '.join(cambios)} actualizado" if cambios else "sin velas nuevas"
+    st.caption(f"📡 En vivo · {detalle} · modelos y gráficos de las "
+               f"{time.strftime('%H:%M:%S', time.localtime(entrada['instante']))} · sondeo cada {VIVO_SEG} s")
+
+
+traza = METRICAS.nueva_traza()
+t_rerun = time.perf_counter()
+diagnostico = st.sidebar.checkbox("🩺 Diagnóstico", help="Tiempos por etapa, cachés y perfil de un rerun.")
+perfilador = None
+if diagnostico and st.sidebar.button("🔬 Perfilar un rerun (cProfile)"):
+    perfilador = cProfile.Profile()
+    perfilador.enable()
+
+modo = st.sidebar.radio("Modo", ["🎯 Radar", "📋 Watchlist"],
+                        help="Watchlist: señales rápidas de todo el universo; modelos y gráficos solo del ticker elegido.")
+graficos_web = st.sidebar.checkbox("🖱️ Gráficos interactivos", value=GRAFICOS_WEB,
+                                   help="El navegador dibuja las series (reducidas con LTTB) con zoom sobre "
+                                        "toda la ventana del TF, en vez de imágenes renderizadas en el servidor.")
+en_vivo = modo == "🎯 Radar" and st.sidebar.checkbox(
+    "📡 En vivo", help=f"Cada activo sondea sus datos cada {VIVO_SEG} s y solo se recalcula y redibuja "
+                      "si llegó una vela nueva o se revisó la que está en formación.")
+
+if modo == "📋 Watchlist":
+    # ── Screener: solo indicadores para todo el universo ─────────────────────
+    try:
+        universo = leer_tickers(WATCHLIST_ARCHIVO)
+    except OSError as e:
+        st.error(f"No se pudo leer la watchlist {WATCHLIST_ARCHIVO}: {e}")
+        st.stop()
+    if not universo:
+        st.info(f"La watchlist {WATCHLIST_ARCHIVO} no tiene tickers: uno por línea (# = comentario).")
+        st.stop()
+    st.sidebar.caption(f"{len(universo)} tickers · {os.path.basename(WATCHLIST_ARCHIVO)}")
+
+    datos, errores = preparar_activos(universo)
+    with st.spinner(f"Calculando señales de {len(datos)} activos..."):
+        # Indicadores incrementales por ticker: solo se procesan las velas nuevas desde el rerun anterior
+        resultados = {}
+        with METRICAS.tramo("fase_senales"):
+            for ticker, (_, _, timeframes) in datos.items():
+                try:
+                    resultados[ticker] = senales_watchlist(ticker, timeframes)
+                except Exception as e:
+                    resultados[ticker] = e
+        with METRICAS.tramo("garch_lote"):
+            garch = niveles_garch({t: d[1] for t, d in datos.items()}, obtener_memo_garch())
+    resultados.update(errores)
+
+    st.markdown("---")
+    st.subheader("📋 Watchlist — Señales Multi-Temporales")
+    tabla = tabla_watchlist(universo, resultados, garch)
+    filtro = st.multiselect("Consenso", sorted(tabla["consenso"].dropna().unique()))
+    if filtro:
+        tabla = tabla[tabla["consenso"].isin(filtro)]
+    st.dataframe(tabla, hide_index=True, use_container_width=True)
+    st.caption(f"VWAP: ▲ precio sobre VWAP · ▼ bajo VWAP  |  poc_%: distancia del cierre al POC  |  "
+               f"divergencias de las últimas {DIVERGENCIA_RECIENTE} velas  |  garch: régimen de volatilidad 1H")
+
+    # ── Detalle: ARIMA/GARCH y gráficos solo del ticker elegido ──────────────
+    elegido = st.selectbox("🔎 Detalle (ARIMA · GARCH · gráficos)", universo)
+    if elegido in datos:
+        with st.spinner(f"Calculando modelos de {elegido}..."):
+            res = calcular({elegido: datos[elegido]})[elegido]
+    else:
+        res = errores[elegido]
+    nombres = {t: n for n, t in ACTIVOS.items()}
+    mostrar_activo(nombres.get(elegido, elegido), res)
+
+else:
+    datos, errores = preparar_activos(ACTIVOS.values())
+    with st.spinner("Calculando modelos e indicadores..."):
+        resultados = calcular(datos)
+    resultados.update(errores)
+
+    # ── Render en el orden de ACTIVOS ─────────────────────────────────────────
+    if en_vivo:
+        # Cada sección arranca con lo recién calculado y desde ahí se refresca sola
+        st.session_state["en_vivo"] = {
+            ticker: {"firma": firma_timeframes(datos[ticker][2]) if ticker in datos else None,
+                     "senales": senales_de(ticker).actualizar(datos[ticker][2]) if ticker in datos else None,
+                     "res": resultados[ticker], "instante": time.time(), "recien": True}
+            for ticker in ACTIVOS.values()
+        }
+    for nombre, ticker in ACTIVOS.items():
+        if en_vivo:
+            seccion_en_vivo(nombre, ticker)
+        else:
+            mostrar_activo(nombre, resultados[ticker])
+
+# ─── 8. DIAGNÓSTICO ──────────────────────────────────────────────────────────
+METRICAS.observar("rerun", time.perf_counter() - t_rerun, modo=modo.split()[-1].lower())
+if perfilador is not None:
+    perfilador.disable()
+    salida = io.StringIO()
+    pstats.Stats(perfilador, stream=salida).sort_stats("cumulative").print_stats(40)
+    st.session_state["perfil_rerun"] = salida.getvalue()
+
+cache_g, compartidos = obtener_cache_graficos(), obtener_resultados_compartidos()
+contadores_cache = {
+    "cache_graficos": {"acierto": cache_g.aciertos, "fallo": cache_g.fallos},
+    "resultados_compartidos": {"acierto": compartidos.aciertos, "espera": compartidos.esperas,
+                               "calculo": compartidos.calculos},
+}
+if METRICAS_ARCHIVO:
+    try:
+        METRICAS.exportar(METRICAS_ARCHIVO, contadores_cache)
+    except OSError:
+        pass
+
+if diagnostico:
+    with st.sidebar.expander("🩺 Diagnóstico", expanded=True):
+        total = time.perf_counter() - t_rerun
+        st.markdown(f"**Este rerun: {total:.2f} s**")
+        st.dataframe([{"etapa": e, "segundos": round(seg, 3), "n": n} for e, seg, n in resumen_traza(traza)],
+                     hide_index=True, use_container_width=True)
+        st.caption("fase_* = tiempo de pared; el resto suma lo medido por activo (en paralelo puede superar la fase).")
+        st.markdown("**Cachés y eventos**")
+        filas = [{"contador": nombre, "detalle": r, "n": v}
+                 for nombre, valores in contadores_cache.items() for r, v in valores.items()]
+        for c in METRICAS.contadores():
+            detalle = " ".join(f"{k}={v}" for k, v in c.items() if k not in ("contador", "n"))
+            filas.append({"contador": c["contador"], "detalle": detalle, "n": c["n"]})
+        st.dataframe(filas, hide_index=True, use_container_width=True)
+        st.markdown("**Acumulado del proceso**")
+        st.dataframe(METRICAS.tiempos(), hide_index=True, use_container_width=True)
+        st.download_button("⬇️ Métricas (Prometheus)", METRICAS.prometheus(contadores_cache),
+                           file_name="triple_radar.prom")
+        if "perfil_rerun" in st.session_state:
+            st.markdown("**Perfil cProfile (último capturado)**")
+            st.caption("Cubre el hilo del script: descargas en hilos y cálculo en el pool aparecen como espera.")
+            st.download_button("⬇️ Perfil completo", st.session_state["perfil_rerun"], file_name="perfil_rerun.txt")
+            st.code("\n".join(st.session_state["perfil_rerun"].splitlines()[:60]))
+
 # ─── FOOTER ──────────────────────────────────────────────────────────────────
 st.markdown("---")
 st.caption(
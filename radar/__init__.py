@@ -0,0 +1 @@
+"""TRIPLE RADAR: núcleo de cálculo (indicadores, modelos y ejecución paralela)."""
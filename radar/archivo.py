@@ -0,0 +1,230 @@
+"""
+Archivo histórico local de barras OHLCV, columnar y mapeado en memoria.
+
+Una carpeta por (ticker, intervalo) con un archivo binario por columna
+(`tiempo.i8`: int64 ns; `Open.f8` ... `Volume.f8`: float64) y `meta.json` con
+la cantidad de filas y la zona horaria. Las barras se acumulan entre corridas:
+lo nuevo se escribe al final (o desde la primera barra que se solapa, que se
+funde con lo archivado) y `meta.json` se reemplaza de forma atómica al terminar.
+El escritor toma un bloqueo exclusivo por carpeta y los lectores copian su rango
+con uno compartido, así nunca ven filas a medio reescribir.
+
+La lectura abre las columnas con np.memmap y busca el rango por fecha sobre
+los tiempos: solo se leen del disco las páginas del rango pedido, sin cargar
+la historia completa.
+"""
+import contextlib
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from radar.barras import COLUMNAS, fechas_de, tiempos_de
+from radar.perfil import PerfilVolumen, area_de_valor
+
+try:
+    import fcntl
+except ImportError:      # Windows: sin bloqueo entre procesos
+    fcntl = None
+
+FILAS_BLOQUE = 100_000
+
+
+def _texto_tz(tz):
+    return None if tz is None else str(tz)
+
+
+def _fusionar(viejo, nuevo):
+    """Unión por fecha: ante fechas repetidas gana `nuevo`."""
+    df = pd.concat([viejo, nuevo]) if len(viejo) else nuevo
+    return df[~df.index.duplicated(keep='last')].sort_index()
+
+
+class ArchivoHistorico:
+    """Historia por (ticker, intervalo) en columnas mapeadas en memoria bajo `directorio`."""
+
+    def __init__(self, directorio):
+        self.directorio = directorio
+
+    def _carpeta(self, ticker, intervalo):
+        seguro = re.sub(r'[^A-Za-z0-9_.-]', '_', ticker)
+        return os.path.join(self.directorio, f"{seguro}__{intervalo}")
+
+    @staticmethod
+    def _meta(carpeta):
+        try:
+            with open(os.path.join(carpeta, "meta.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"filas": 0, "tz": None}
+
+    @staticmethod
+    def _escribir_meta(carpeta, meta):
+        ruta = os.path.join(carpeta, "meta.json")
+        tmp = f"{ruta}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, ruta)
+
+    @staticmethod
+    def _columna(carpeta, nombre, filas):
+        """Columna mapeada en memoria (solo lectura) con las primeras `filas` filas."""
+        dtype = np.int64 if nombre == "tiempo" else np.float64
+        if filas == 0:
+            return np.empty(0, dtype)
+        return np.memmap(os.path.join(carpeta, f"{nombre}.{'i8' if nombre == 'tiempo' else 'f8'}"),
+                         dtype=dtype, mode='r', shape=(filas,))
+
+    @contextlib.contextmanager
+    def _bloqueo(self, carpeta, compartido=False):
+        """
+        Un solo escritor por carpeta, también entre procesos (app y scanner por cron).
+        Con `compartido` (lectores) varios a la vez, pero nunca durante una escritura.
+        """
+        if compartido and not os.path.isdir(carpeta):
+            yield           # nada archivado: no hay qué proteger
+            return
+        os.makedirs(carpeta, exist_ok=True)
+        with open(os.path.join(carpeta, ".lock"), "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_SH if compartido else fcntl.LOCK_EX)
+            yield
+
+    @staticmethod
+    def _a_tiempo(fecha, tz):
+        """int64 (ns) de una fecha en la convención del archivo (naive = zona del archivo)."""
+        ts = pd.Timestamp(fecha)
+        if tz is not None:
+            ts = ts.tz_localize(tz) if ts.tz is None else ts
+        elif ts.tz is not None:
+            ts = ts.tz_localize(None)
+        return ts.as_unit("ns").value
+
+    # ── Lectura ──────────────────────────────────────────────────────────────
+
+    def filas(self, ticker, intervalo):
+        return self._meta(self._carpeta(ticker, intervalo))["filas"]
+
+    def firma(self, ticker, intervalo):
+        """
+        (filas, tiempo y OHLCV de la última barra), o None sin nada archivado: cambia
+        con una barra nueva o con la revisión de la última, sin leer el resto.
+        """
+        carpeta = self._carpeta(ticker, intervalo)
+        with self._bloqueo(carpeta, compartido=True):
+            meta = self._meta(carpeta)
+            filas = meta["filas"]
+            if filas == 0:
+                return None
+            ultima = tuple(float(self._columna(carpeta, c, filas)[-1]) for c in COLUMNAS)
+            return filas, int(self._columna(carpeta, "tiempo", filas)[-1]), ultima
+
+    def _rango(self, carpeta, meta, desde, hasta):
+        t = self._columna(carpeta, "tiempo", meta["filas"])
+        a = 0 if desde is None else int(np.searchsorted(t, self._a_tiempo(desde, meta["tz"]), side='left'))
+        b = len(t) if hasta is None else int(np.searchsorted(t, self._a_tiempo(hasta, meta["tz"]), side='right'))
+        return t, a, max(a, b)
+
+    def _df(self, carpeta, meta, a, b, t=None):
+        t = self._columna(carpeta, "tiempo", meta["filas"]) if t is None else t
+        datos = {c: np.array(self._columna(carpeta, c, meta["filas"])[a:b]) for c in COLUMNAS}
+        return pd.DataFrame(datos, index=fechas_de(np.array(t[a:b]), meta["tz"]))
+
+    def leer(self, ticker, intervalo, desde=None, hasta=None):
+        """OHLCV de [desde, hasta] (fechas; None = sin límite). Solo se copia ese rango."""
+        carpeta = self._carpeta(ticker, intervalo)
+        with self._bloqueo(carpeta, compartido=True):
+            meta = self._meta(carpeta)
+            t, a, b = self._rango(carpeta, meta, desde, hasta)
+            return self._df(carpeta, meta, a, b, t)
+
+    def ultimos(self, ticker, intervalo, periodo):
+        """Ventana `periodo` (Timedelta) anclada a la última barra archivada."""
+        carpeta = self._carpeta(ticker, intervalo)
+        with self._bloqueo(carpeta, compartido=True):
+            meta = self._meta(carpeta)
+            t = self._columna(carpeta, "tiempo", meta["filas"])
+            if not len(t):
+                return self._df(carpeta, meta, 0, 0, t)
+            a = int(np.searchsorted(t, t[-1] - pd.Timedelta(periodo).value, side='left'))
+            return self._df(carpeta, meta, a, len(t), t)
+
+    def bloques(self, ticker, intervalo, desde=None, hasta=None, filas=FILAS_BLOQUE):
+        """
+        Itera [desde, hasta] en DataFrames de hasta `filas` filas (historias que no
+        entran en RAM). Cada bloque se copia con el bloqueo compartido y el siguiente
+        se busca por fecha, así una escritura entre bloques no repite ni salta barras.
+        """
+        carpeta = self._carpeta(ticker, intervalo)
+        ultimo = None
+        while True:
+            with self._bloqueo(carpeta, compartido=True):
+                meta = self._meta(carpeta)
+                t, a, b = self._rango(carpeta, meta, desde, hasta)
+                if ultimo is not None:
+                    a = max(a, int(np.searchsorted(t, ultimo, side='right')))
+                if a >= b:
+                    return
+                fin = min(a + filas, b)
+                bloque, ultimo = self._df(carpeta, meta, a, fin, t), int(t[fin - 1])
+            yield bloque
+
+    def perfil(self, ticker, intervalo, desde=None, hasta=None, paso=None, n_bins=50, pct=0.70,
+               filas=FILAS_BLOQUE):
+        """
+        POC y área de valor de [desde, hasta] sin cargar la historia entera: los
+        bloques se suman en un PerfilVolumen de grilla fija (k·paso; sin `paso`,
+        rango de precios / n_bins, medido en una primera pasada). Mismo dict que
+        perfil.calcular_perfil, o None si no hay volumen.
+        """
+        if paso is None:
+            lo, hi = np.nan, np.nan
+            for bloque in self.bloques(ticker, intervalo, desde, hasta, filas):
+                lo, hi = np.fmin(lo, bloque['Low'].min()), np.fmax(hi, bloque['High'].max())
+            if np.isnan(lo) or np.isnan(hi):
+                return None
+            paso = (hi - lo) / n_bins if hi > lo else 1.0
+        perfil = PerfilVolumen(paso)
+        for bloque in self.bloques(ticker, intervalo, desde, hasta, filas):
+            perfil.agregar_df(bloque)
+        bordes, vol = perfil.perfil()
+        area = area_de_valor(bordes, vol, pct)
+        if area is None:
+            return None
+        poc, val, vah = area
+        return {"poc": poc, "val": val, "vah": vah, "bordes": bordes, "volumen": vol}
+
+    # ── Escritura ────────────────────────────────────────────────────────────
+
+    def agregar(self, ticker, intervalo, df):
+        """
+        Incorpora barras: desde la primera fecha de `df` lo archivado se funde con
+        lo nuevo (gana lo nuevo) y se reescribe; lo anterior no se toca.
+        Retorna la cantidad de filas archivadas.
+        """
+        carpeta = self._carpeta(ticker, intervalo)
+        if df is None or df.empty:
+            return self._meta(carpeta)["filas"]
+        df = df[list(COLUMNAS)].sort_index()
+        with self._bloqueo(carpeta):
+            meta = self._meta(carpeta)
+            if meta["filas"] == 0:
+                meta["tz"] = _texto_tz(df.index.tz)
+            elif (meta["tz"] is None) != (df.index.tz is None):
+                raise ValueError(f"{ticker} {intervalo}: zona horaria distinta de la archivada ({meta['tz']})")
+            t = self._columna(carpeta, "tiempo", meta["filas"])
+            k = int(np.searchsorted(t, tiempos_de(df.index[:1])[0], side='left'))
+            df = _fusionar(self._df(carpeta, meta, k, meta["filas"], t), df)
+            valores = {"tiempo": tiempos_de(df.index)}
+            valores.update({c: df[c].to_numpy(np.float64) for c in COLUMNAS})
+            for nombre, v in valores.items():
+                ruta = os.path.join(carpeta, f"{nombre}.{'i8' if nombre == 'tiempo' else 'f8'}")
+                with open(ruta, "r+b" if os.path.exists(ruta) else "wb") as f:
+                    f.seek(k * v.itemsize)
+                    f.write(np.ascontiguousarray(v).tobytes())
+            meta["filas"] = k + len(df)
+            self._escribir_meta(carpeta, meta)
+        return meta["filas"]
+
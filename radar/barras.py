@@ -0,0 +1,159 @@
+"""
+Almacén columnar de velas OHLCV: tiempos en int64 (ns UTC, o de pared si el
+índice es naive) y Open/High/Low/Close/Volume en float32, en arrays contiguos.
+
+`Barras` es un ring buffer de `capacidad` velas: al llenarse se descartan las
+más viejas. El almacenamiento tiene holgura al final y se compacta cuando se
+acaba, así cualquier ventana final (`tail`, `desde`) es un slice contiguo: una
+vista de solo lectura, sin copia. Las vistas entregadas nunca se pisan: si hay
+que reescribir velas que una vista cubre (revisión de la última vela,
+compactación) se pasa a un almacenamiento nuevo y la vista conserva el viejo.
+"""
+import numpy as np
+import pandas as pd
+
+COLUMNAS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+
+def tiempos_de(index):
+    """int64 (ns) de un DatetimeIndex: UTC si tiene zona horaria, de pared si es naive."""
+    return np.asarray(index.as_unit("ns").asi8, dtype=np.int64)
+
+
+def fechas_de(t, tz=None):
+    """DatetimeIndex desde int64 (ns): en `tz` si se indica, naive si no (inversa de `tiempos_de`)."""
+    idx = pd.DatetimeIndex(np.asarray(t, np.int64).view('datetime64[ns]'))
+    return idx.tz_localize('UTC').tz_convert(tz) if tz is not None else idx
+
+
+class Barras:
+    """Velas OHLCV columnares con capacidad fija (None = sin tope) y vistas finales sin copia."""
+
+    def __init__(self, capacidad=None, tz=None):
+        self.capacidad = capacidad
+        self.tz = tz
+        self._t = np.empty(0, np.int64)
+        self._x = np.empty((len(COLUMNAS), 0), np.float32)
+        self._ini = self._fin = 0
+        self._exportado = 0     # las vistas entregadas cubren el almacenamiento hasta aquí
+        self._vista = False
+
+    @classmethod
+    def desde_df(cls, df, capacidad=None):
+        """Barras desde un DataFrame OHLCV con índice de fechas (copia a float32)."""
+        if isinstance(df.columns, pd.MultiIndex):
+            df = df.set_axis(df.columns.get_level_values(0), axis=1)
+        barras = cls(capacidad, df.index.tz)
+        if len(df):
+            barras.agregar(tiempos_de(df.index), df[list(COLUMNAS)].to_numpy(np.float32).T)
+        return barras
+
+    def __len__(self):
+        return self._fin - self._ini
+
+    def __repr__(self):
+        return f"Barras({len(self)} velas, capacidad={self.capacidad}, tz={self.tz})"
+
+    # ── Lectura ──────────────────────────────────────────────────────────────
+
+    def _ventana(self, a, b):
+        """Vista de solo lectura de las posiciones de almacenamiento [a, b)."""
+        v = Barras(None, self.tz)
+        v._t, v._x = self._t[a:b], self._x[:, a:b]
+        v._t.flags.writeable = False
+        v._x.flags.writeable = False
+        v._fin, v._vista = b - a, True
+        self._exportado = max(self._exportado, b)
+        return v
+
+    def tail(self, n):
+        """Últimas `n` velas (vista)."""
+        return self._ventana(max(self._fin - max(n, 0), self._ini), self._fin)
+
+    def desde(self, t):
+        """Velas con tiempo >= t (int64 ns) (vista)."""
+        k = self._ini + int(np.searchsorted(self._t[self._ini:self._fin], t, side='left'))
+        return self._ventana(k, self._fin)
+
+    def vista(self):
+        return self._ventana(self._ini, self._fin)
+
+    @property
+    def tiempos(self):
+        return self.vista()._t
+
+    @property
+    def ohlcv(self):
+        """Matriz (5, n) float32 en el orden de COLUMNAS (vista)."""
+        return self.vista()._x
+
+    def __getitem__(self, columna):
+        """Columna float32 por nombre ('Close', ...), como en un DataFrame (vista)."""
+        return self.vista()._x[COLUMNAS.index(columna)]
+
+    open = property(lambda self: self['Open'])
+    high = property(lambda self: self['High'])
+    low = property(lambda self: self['Low'])
+    close = property(lambda self: self['Close'])
+    volume = property(lambda self: self['Volume'])
+
+    def indice(self):
+        """DatetimeIndex de las velas (se construye en cada llamada)."""
+        return fechas_de(self._t[self._ini:self._fin], self.tz)
+
+    def fecha(self, i=-1):
+        """Timestamp de la vela `i`."""
+        return fechas_de(self._t[self._ini:self._fin][[i]], self.tz)[0]
+
+    def ultima(self):
+        """(tiempo int64, OHLCV float32) de la última vela."""
+        return int(self._t[self._fin - 1]), self._x[:, self._fin - 1].copy()
+
+    def posicion(self, t):
+        """Cantidad de velas con tiempo < t."""
+        return int(np.searchsorted(self._t[self._ini:self._fin], t, side='left'))
+
+    # ── Escritura ────────────────────────────────────────────────────────────
+
+    def truncar(self, n):
+        """Conserva solo las primeras `n` velas."""
+        self._fin = self._ini + max(0, min(n, len(self)))
+
+    def agregar(self, t, x):
+        """
+        Agrega velas al final: `t` int64 creciente y `x` (5, n) en el orden de COLUMNAS.
+        Con capacidad, se descartan las más viejas que no entran.
+        """
+        if self._vista:
+            raise ValueError("Una vista de Barras es de solo lectura")
+        t = np.asarray(t, np.int64)
+        x = np.asarray(x, np.float32).reshape(len(COLUMNAS), -1)
+        if self.capacidad is not None and len(t) > self.capacidad:
+            t, x = t[-self.capacidad:], x[:, -self.capacidad:]
+        n = len(t)
+        if self._fin + n > len(self._t) or self._fin < self._exportado:
+            self._realojar(n)
+        self._t[self._fin:self._fin + n] = t
+        self._x[:, self._fin:self._fin + n] = x
+        self._fin += n
+        if self.capacidad is not None and len(self) > self.capacidad:
+            self._ini = self._fin - self.capacidad
+
+    def _realojar(self, n):
+        """Almacenamiento nuevo con las velas vivas que siguen entrando al inicio y lugar para `n` más."""
+        vivas = len(self) if self.capacidad is None else min(len(self), self.capacidad - n)
+        if self.capacidad is None:
+            tamano = max(2 * (vivas + n), 64)
+        else:
+            tamano = self.capacidad + max(self.capacidad // 4, 64)
+        t = np.empty(tamano, np.int64)
+        x = np.empty((len(COLUMNAS), tamano), np.float32)
+        t[:vivas] = self._t[self._fin - vivas:self._fin]
+        x[:, :vivas] = self._x[:, self._fin - vivas:self._fin]
+        self._t, self._x = t, x
+        self._ini, self._fin, self._exportado = 0, vivas, 0
+
+    @property
+    def nbytes(self):
+        """Bytes del almacenamiento (incluida la holgura)."""
+        return self._t.nbytes + self._x.nbytes
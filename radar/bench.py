@@ -0,0 +1,214 @@
+"""
+Benchmarks del radar sobre datos sintéticos (sin red): tiempo y pico de memoria
+por función y largo de historia, con líneas base para detectar regresiones.
+
+    python -m radar.bench                                   # tamaños por defecto
+    python -m radar.bench --tamanos 1000,100000,2000000 --solo calcular_rsi,detectar_divergencias
+    python -m radar.bench --guardar bench_base.json         # guardar línea base
+    python -m radar.bench --comparar bench_base.json        # sale con 1 si algo empeoró
+
+Tiempo: mínimo y mediana de `--repeticiones` corridas (tras una de calentamiento).
+Memoria: pico de asignaciones (tracemalloc) de una corrida aparte.
+Los gráficos se miden hasta el PNG, como se sirven en la app.
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from radar import indicadores, modelos
+from radar.garch_lote import calcular_garch_lote
+from radar.perfil import calcular_perfil
+from radar.resampleo import MultiTimeframe
+from radar.sintetico import generar_ohlcv
+
+TAMANOS_1H = (500, 5_000, 50_000, 500_000)
+TAMANOS_1D = (250, 2_500, 25_000)
+
+
+# ─── Casos: (nombre, intervalos, preparar(df) -> args, funcion(*args)) ──────────
+
+def _res_arima(df):
+    """Resultado con la forma de modelos.calcular_arima, sin ajustar nada."""
+    s = df['Close'].tail(50)
+    idx_fut = pd.date_range(start=s.index[-1], periods=11, freq=pd.infer_freq(s.index[-5:]) or "h")[1:]
+    mu = np.linspace(s.iloc[-1], s.iloc[-1] * 1.01, 10)
+    return {"hist": s, "idx_fut": idx_fut, "mu": mu, "ci_inf": mu * 0.99, "ci_sup": mu * 1.01,
+            "prediccion": mu[-1], "ultimo_precio": s.iloc[-1], "cambio_pct": 1.0, "direccion": "▲ SUBE"}
+
+
+def _res_garch(df):
+    """Resultado con la forma de modelos.calcular_garch, sin ajustar nada."""
+    vol = (df['Close'].pct_change() * 100).rolling(5).std().tail(50)
+    idx_fut = pd.date_range(start=vol.index[-1], periods=11, freq=pd.infer_freq(vol.index[-5:]) or "h")[1:]
+    return {"vol_hist": vol, "idx_fut": idx_fut, "vol_pred": np.full(10, vol.iloc[-1]), "nivel": "NORMAL"}
+
+
+def _grafico(construir):
+    from radar.graficos import figura_a_png
+    return figura_a_png(construir())
+
+
+def casos(con_modelos=True, con_graficos=True):
+    ind = indicadores
+    lista = [
+        ("calcular_rsi", ("1h", "1d"), lambda df: (df['Close'],), ind.calcular_rsi),
+        ("detectar_divergencias", ("1h", "1d"),
+         lambda df: (df['Close'], ind.calcular_rsi(df['Close'])), ind.detectar_divergencias),
+        ("detectar_divergencias[pivotes]", ("1h", "1d"),
+         lambda df: (df['Close'], ind.calcular_rsi(df['Close'])),
+         lambda p, r: ind.detectar_divergencias(p, r, modo="pivotes")),
+        ("resamplear_4h", ("1h",), lambda df: (df,), ind.resamplear_4h),
+        ("calcular_perfil", ("1h", "1d"), lambda df: (df,), calcular_perfil),
+        # Bloque POC / área de valor / VWAP / RSI / divergencias / diamante completo
+        ("calcular_timeframe", ("1h", "1d"), lambda df: (df,), ind.calcular_timeframe),
+        ("MultiTimeframe.actualizar", ("1h",), lambda df: (df,),
+         lambda df: MultiTimeframe(("4H", "1D")).actualizar(df)),
+    ]
+    if con_modelos and modelos.ARIMA_DISPONIBLE:
+        lista.append(("calcular_arima", ("1h", "1d"), lambda df: (df['Close'],), modelos.calcular_arima))
+    if con_modelos and modelos.GARCH_DISPONIBLE:
+        lista.append(("calcular_garch", ("1h", "1d"), lambda df: (df['Close'],), modelos.calcular_garch))
+    if con_modelos:
+        # 100 activos: 100 ventanas de 200 retornos que terminan en distintas velas
+        lista.append(("calcular_garch_lote[100]", ("1h",),
+                      lambda df: ({i: df['Close'].iloc[:len(df) - i] for i in range(100)},),
+                      lambda precios: calcular_garch_lote(precios, detalle=False)))
+    if con_graficos:
+        import matplotlib
+        matplotlib.use("Agg")
+        from radar import graficos
+        lista += [
+            ("graficar_arima_forecast", ("1h", "1d"), lambda df: (_res_arima(df),),
+             lambda res: _grafico(lambda: graficos.graficar_arima_forecast(res, "SINT"))),
+            ("graficar_garch_forecast", ("1h", "1d"), lambda df: (_res_garch(df),),
+             lambda res: _grafico(lambda: graficos.graficar_garch_forecast(res, "SINT"))),
+            ("graficar_timeframe", ("1h", "1d"), lambda df: (ind.calcular_timeframe(df),),
+             lambda calc: _grafico(lambda: graficos.graficar_timeframe(calc, "SINT", "1H")[0])),
+        ]
+    return lista
+
+
+# ─── Medición ───────────────────────────────────────────────────────────────
+
+def medir(funcion, args, repeticiones=3):
+    """{'min_ms', 'mediana_ms', 'pico_mb'} de funcion(*args)."""
+    funcion(*args)   # calentamiento (imports diferidos, cachés de fuentes, etc.)
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        funcion(*args)
+        tiempos.append((time.perf_counter() - t0) * 1000)
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        funcion(*args)
+        pico = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"min_ms": min(tiempos), "mediana_ms": statistics.median(tiempos), "pico_mb": pico / 2**20}
+
+
+def correr(tamanos_1h=TAMANOS_1H, tamanos_1d=TAMANOS_1D, solo=None, repeticiones=3,
+           con_modelos=True, con_graficos=True, semilla=0, progreso=None):
+    """Corre todos los casos. Retorna {'funcion|intervalo|n': medición}."""
+    resultados = {}
+    lista = [c for c in casos(con_modelos, con_graficos) if not solo or c[0] in solo]
+    for intervalo, tamanos in (("1h", tamanos_1h), ("1d", tamanos_1d)):
+        for n in tamanos:
+            df = generar_ohlcv(n, intervalo, semilla=semilla)
+            for nombre, intervalos, preparar, funcion in lista:
+                if intervalo not in intervalos:
+                    continue
+                clave = f"{nombre}|{intervalo}|{n}"
+                resultados[clave] = medir(funcion, preparar(df), repeticiones)
+                if progreso:
+                    progreso(clave, resultados[clave])
+    return resultados
+
+
+def comparar(actual, base, tolerancia=0.25, min_ms=1.0, min_mb=1.0):
+    """
+    Regresiones de `actual` contra `base`: tiempo mínimo o pico de memoria más de
+    `tolerancia` (fracción) por encima, ignorando diferencias absolutas por debajo
+    de `min_ms` / `min_mb` (ruido). Retorna {clave: (métrica, base, actual)}.
+    """
+    regresiones = {}
+    for clave, m in actual.items():
+        b = base.get(clave)
+        if b is None:
+            continue
+        if m["min_ms"] > b["min_ms"] * (1 + tolerancia) and m["min_ms"] - b["min_ms"] > min_ms:
+            regresiones[clave] = ("min_ms", b["min_ms"], m["min_ms"])
+        elif m["pico_mb"] > b["pico_mb"] * (1 + tolerancia) and m["pico_mb"] - b["pico_mb"] > min_mb:
+            regresiones[clave] = ("pico_mb", b["pico_mb"], m["pico_mb"])
+    return regresiones
+
+
+def entorno():
+    """Versiones y máquina, para saber si dos líneas base son comparables."""
+    return {"python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+            "plataforma": platform.platform(), "procesador": platform.processor() or platform.machine()}
+
+
+def _tamanos(texto):
+    return tuple(int(x) for x in texto.split(",") if x.strip())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m radar.bench", description=__doc__.split("\n")[1])
+    parser.add_argument("--tamanos", type=_tamanos, default=TAMANOS_1H, help="Barras de 1h (coma)")
+    parser.add_argument("--tamanos-diario", type=_tamanos, default=TAMANOS_1D, help="Barras diarias (coma)")
+    parser.add_argument("--solo", help="Solo estas funciones (coma)")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--sin-modelos", action="store_true", help="Omitir ARIMA/GARCH")
+    parser.add_argument("--sin-graficos", action="store_true", help="Omitir gráficos (matplotlib)")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--guardar", help="Guardar los resultados como línea base (JSON)")
+    parser.add_argument("--comparar", help="Línea base (JSON) contra la que comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.25,
+                        help="Empeoramiento tolerado antes de marcar regresión (fracción)")
+    args = parser.parse_args(argv)
+
+    base = None
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            base = json.load(f)["resultados"]
+
+    print(f"{'función':<32} {'tf':<3} {'barras':>9} {'min ms':>10} {'mediana ms':>11} {'pico MB':>9}"
+          + ("  vs base" if base else ""))
+
+    def progreso(clave, m):
+        nombre, intervalo, n = clave.split("|")
+        linea = (f"{nombre:<32} {intervalo:<3} {int(n):>9,} {m['min_ms']:>10.2f} "
+                 f"{m['mediana_ms']:>11.2f} {m['pico_mb']:>9.2f}")
+        if base and clave in base:
+            linea += f"  x{m['min_ms'] / max(base[clave]['min_ms'], 1e-9):.2f}"
+        print(linea, flush=True)
+
+    resultados = correr(args.tamanos, args.tamanos_diario,
+                        solo=set(args.solo.split(",")) if args.solo else None,
+                        repeticiones=args.repeticiones, con_modelos=not args.sin_modelos,
+                        con_graficos=not args.sin_graficos, semilla=args.semilla, progreso=progreso)
+
+    if args.guardar:
+        with open(args.guardar, "w", encoding="utf-8") as f:
+            json.dump({"entorno": entorno(), "resultados": resultados}, f, indent=2)
+            f.write("\n")
+
+    if base is not None:
+        regresiones = comparar(resultados, base, args.tolerancia)
+        for clave, (metrica, antes, ahora) in regresiones.items():
+            print(f"REGRESIÓN {clave}: {metrica} {antes:.2f} -> {ahora:.2f}", file=sys.stderr)
+        return 1 if regresiones else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
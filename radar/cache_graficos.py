@@ -0,0 +1,71 @@
+"""
+Caché de gráficos renderizados: PNG por huella de los datos que dibuja cada gráfico.
+Si los datos no cambiaron entre reruns se reutilizan los bytes y no se construye
+ninguna figura. LRU con tope de memoria, compartida por todo el proceso.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+def huella(*partes):
+    """Hash estable de DataFrames/Series/arrays/escalares (lo que entra a un gráfico)."""
+    h = hashlib.blake2b(digest_size=16)
+    for p in partes:
+        if isinstance(p, (pd.DataFrame, pd.Series, pd.Index)):
+            h.update(pd.util.hash_pandas_object(p, index=not isinstance(p, pd.Index)).values.tobytes())
+            if isinstance(p, pd.DataFrame):
+                h.update(repr(list(p.columns)).encode())
+        elif isinstance(p, np.ndarray):
+            h.update(str(p.dtype).encode())
+            h.update(np.ascontiguousarray(p).tobytes())
+        else:
+            h.update(repr(p).encode())
+        h.update(b"|")
+    return h.hexdigest()
+
+
+class CacheGraficos:
+    """LRU de PNG (bytes) por huella, con tope total en bytes."""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._png = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave):
+        with self._lock:
+            png = self._png.get(clave)
+            if png is None:
+                self.fallos += 1
+                return None
+            self._png.move_to_end(clave)
+            self.aciertos += 1
+            return png
+
+    def guardar(self, clave, png):
+        with self._lock:
+            if clave in self._png:
+                self._bytes -= len(self._png.pop(clave))
+            self._png[clave] = png
+            self._bytes += len(png)
+            while self._bytes > self.max_bytes and len(self._png) > 1:
+                _, viejo = self._png.popitem(last=False)
+                self._bytes -= len(viejo)
+
+    def obtener_o_renderizar(self, clave, renderizar):
+        """PNG cacheado, o el que produce `renderizar()` (que se guarda)."""
+        png = self.obtener(clave)
+        if png is None:
+            png = renderizar()
+            self.guardar(clave, png)
+        return png
+
+    def __len__(self):
+        return len(self._png)
@@ -0,0 +1,74 @@
+"""
+Resultados compartidos entre sesiones con semántica single-flight: si varias
+sesiones piden la misma clave a la vez, una sola la calcula y el resto espera
+ese mismo resultado en lugar de lanzar cálculos duplicados.
+"""
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class ResultadosCompartidos:
+    """LRU de resultados por clave + registro de cálculos en vuelo."""
+
+    def __init__(self, max_entradas=256):
+        self.max_entradas = max_entradas
+        self._resultados = OrderedDict()
+        self._en_vuelo = {}          # clave -> Future del cálculo en curso
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.esperas = 0
+        self.calculos = 0
+
+    def reservar(self, clave):
+        """
+        Retorna uno de:
+        - ("hecho", valor):      ya estaba calculado.
+        - ("esperar", future):   otra sesión lo está calculando; usar future.result().
+        - ("calcular", None):    le toca a quien llama; debe terminar con
+                                 `completar` o `fallar` (si no, los demás esperan).
+        """
+        with self._lock:
+            if clave in self._resultados:
+                self._resultados.move_to_end(clave)
+                self.aciertos += 1
+                return "hecho", self._resultados[clave]
+            futuro = self._en_vuelo.get(clave)
+            if futuro is not None:
+                self.esperas += 1
+                return "esperar", futuro
+            self._en_vuelo[clave] = Future()
+            self.calculos += 1
+            return "calcular", None
+
+    def completar(self, clave, valor):
+        with self._lock:
+            self._resultados[clave] = valor
+            self._resultados.move_to_end(clave)
+            while len(self._resultados) > self.max_entradas:
+                self._resultados.popitem(last=False)
+            futuro = self._en_vuelo.pop(clave, None)
+        if futuro is not None:
+            futuro.set_result(valor)
+
+    def fallar(self, clave, error):
+        """El error llega a quienes esperan pero no se guarda: el próximo pedido reintenta."""
+        with self._lock:
+            futuro = self._en_vuelo.pop(clave, None)
+        if futuro is not None:
+            futuro.set_exception(error)
+
+    def obtener(self, clave, calcular, timeout=None):
+        """Valor de `clave`, calculándolo con `calcular()` solo si nadie más lo está haciendo."""
+        estado, x = self.reservar(clave)
+        if estado == "hecho":
+            return x
+        if estado == "esperar":
+            return x.result(timeout=timeout)
+        try:
+            valor = calcular()
+        except BaseException as e:
+            self.fallar(clave, e)
+            raise
+        self.completar(clave, valor)
+        return valor
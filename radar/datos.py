@@ -0,0 +1,261 @@
+"""
+Datos OHLCV: almacén local con archivo histórico en disco (radar.archivo) y
+caché en memoria delante del proveedor (Yahoo Finance por defecto; ver
+radar.proveedores).
+"""
+import contextvars
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from radar.archivo import ArchivoHistorico
+from radar.metricas import METRICAS
+from radar.proveedores import proveedor_defecto
+
+# Directorio de la caché en disco (junto al repo salvo que se indique otro)
+CACHE_DIR_DEFECTO = os.environ.get(
+    "TRIPLE_RADAR_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".radar_cache"),
+)
+
+# Feed base de todo el radar: Yahoo sirve velas de 1h hasta ~730 días atrás
+PERIODO_BASE = "720d"
+
+# Distancia máxima entre el inicio de una ventana y su primera barra (fines de semana, feriados)
+HOLGURA_INICIO = pd.Timedelta(days=5)
+
+
+def periodo_a_timedelta(periodo):
+    """Convierte un período estilo yfinance ('60d', '1y', '6mo', '2wk') a Timedelta (un Timedelta pasa igual)."""
+    if isinstance(periodo, pd.Timedelta):
+        return periodo
+    m = re.fullmatch(r'(\d+)(d|wk|mo|y)', periodo)
+    if not m:
+        raise ValueError(f"Período no soportado: {periodo}")
+    n, unidad = int(m.group(1)), m.group(2)
+    dias = {'d': 1, 'wk': 7, 'mo': 31, 'y': 366}[unidad]
+    return pd.Timedelta(days=n * dias)
+
+
+class AlmacenOHLCV:
+    """
+    Almacén local de barras OHLCV por (ticker, intervalo).
+    - Disco: archivo histórico columnar (radar.archivo) que acumula todo lo
+      descargado entre reinicios; al arrancar se lee solo la ventana pedida.
+    - Proveedor: solo se piden las barras desde la última almacenada
+      (la última se vuelve a pedir porque puede estar aún en formación).
+    - Memoria: la ventana más larga pedida por clave; dentro del TTL los reruns
+      se sirven sin tocar la red. `historia` lee rangos más largos del disco.
+    Si el proveedor falla o no responde (timeout + reintentos), se sirve lo que haya en caché.
+    """
+    COLUMNAS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+    def __init__(self, directorio, ttl=300, proveedor=None, timeout=20, reintentos=2,
+                 espera_reintento=0.5, workers=8):
+        self.directorio = directorio
+        self.ttl = ttl
+        self.proveedor = proveedor if proveedor is not None else proveedor_defecto()
+        self.timeout = timeout              # s por petición al proveedor
+        self.reintentos = reintentos
+        self.espera_reintento = espera_reintento
+        # Hilos para pedidos concurrentes y para los refrescos en segundo plano
+        # (separados: un pedido puede esperar a un refresco, nunca al revés)
+        self._ejecutor = ThreadPoolExecutor(workers, thread_name_prefix="radar-datos")
+        self._fondo = ThreadPoolExecutor(workers, thread_name_prefix="radar-refresco")
+        self.archivo = ArchivoHistorico(directorio)
+        self._memoria = {}   # (ticker, intervalo) -> (instante_consulta, df)
+        self._ventanas = {}  # (ticker, intervalo) -> Timedelta que cubre el df en memoria
+        self._completas = {}  # (ticker, intervalo) -> período de la última descarga completa
+        self._lock = threading.Lock()
+        self._locks_clave = {}   # (ticker, intervalo) -> Lock: una sola descarga por clave
+        os.makedirs(directorio, exist_ok=True)
+
+    def _ruta(self, ticker, intervalo):
+        seguro = re.sub(r'[^A-Za-z0-9_.-]', '_', ticker)
+        return os.path.join(self.directorio, f"{seguro}__{intervalo}.pkl")
+
+    def _leer_disco(self, ticker, intervalo, periodo):
+        """Ventana `periodo` del archivo (la caché .pkl de versiones anteriores se migra una vez)."""
+        ruta = self._ruta(ticker, intervalo)
+        if os.path.exists(ruta):
+            try:
+                self.archivo.agregar(ticker, intervalo, pd.read_pickle(ruta))
+                os.remove(ruta)
+            except Exception:
+                pass
+        try:
+            return self.archivo.ultimos(ticker, intervalo, periodo_a_timedelta(periodo))
+        except Exception:
+            return pd.DataFrame(columns=self.COLUMNAS)
+
+    def _cubierta(self, clave, df):
+        """
+        Ventana que `df` cubre de verdad: su extensión (más HOLGURA_INICIO) o, si
+        el proveedor no tiene más historia, el período de la última descarga completa.
+        """
+        if df.empty:
+            return pd.Timedelta(0)
+        return max(df.index[-1] - df.index[0] + HOLGURA_INICIO,
+                   self._completas.get(clave, pd.Timedelta(0)))
+
+    def _en_memoria(self, clave, periodo):
+        """Entrada en memoria de la clave si su ventana cubre `periodo` (llamar con self._lock)."""
+        entrada = self._memoria.get(clave)
+        if entrada is None or self._ventanas[clave] < periodo_a_timedelta(periodo):
+            return None
+        return entrada
+
+    def historia(self, ticker, intervalo, desde=None, hasta=None):
+        """Barras archivadas de [desde, hasta] (sin red; solo se lee ese rango del disco)."""
+        return self.archivo.leer(ticker, intervalo, desde, hasta)
+
+    def _descargar(self, ticker, periodo, intervalo, desde=None):
+        """Petición al proveedor con timeout y reintentos (espera exponencial entre intentos)."""
+        for intento in range(self.reintentos + 1):
+            try:
+                df = self.proveedor.descargar(ticker, periodo, intervalo, desde=desde,
+                                              timeout=self.timeout)
+                break
+            except Exception:
+                if intento == self.reintentos:
+                    raise
+                time.sleep(self.espera_reintento * 2 ** intento)
+        if df is None or df.empty:
+            return pd.DataFrame(columns=self.COLUMNAS)
+        return df[self.COLUMNAS]
+
+    @staticmethod
+    def _fusionar(viejo, nuevo):
+        if viejo.empty:
+            return nuevo.sort_index()
+        if nuevo.empty:
+            return viejo
+        df = pd.concat([viejo, nuevo])
+        return df[~df.index.duplicated(keep='last')].sort_index()
+
+    @staticmethod
+    def _recortar(df, periodo):
+        """Ventana equivalente a `period=` de yfinance, anclada a la última barra."""
+        if df.empty:
+            return df.copy()
+        inicio = df.index[-1] - periodo_a_timedelta(periodo)
+        return df[df.index >= inicio].copy()
+
+    def obtener(self, ticker, periodo, intervalo, esperar=True, ttl=None):
+        """
+        Equivalente cacheado de yf.download(ticker, period=periodo, interval=intervalo).
+        Con `esperar=False` (stale-while-revalidate), si hay algo en caché aunque esté
+        vencido se retorna al instante y el refresco se hace en segundo plano.
+        `ttl` reemplaza al del almacén en este pedido (p. ej. el sondeo del modo en vivo).
+        """
+        ttl = self.ttl if ttl is None else ttl
+        clave = (ticker, intervalo)
+        with self._lock:
+            entrada = self._en_memoria(clave, periodo)
+            lock_clave = self._locks_clave.setdefault(clave, threading.Lock())
+        if entrada is not None and time.time() - entrada[0] < ttl:
+            METRICAS.contar("datos", resultado="acierto")
+            return self._recortar(entrada[1], periodo)
+
+        if not esperar:
+            if entrada is None:
+                df = self._leer_disco(ticker, intervalo, periodo)
+                if not df.empty:
+                    with self._lock:
+                        entrada = self._en_memoria(clave, periodo)
+                        if entrada is None:
+                            entrada = self._memoria[clave] = (0.0, df)
+                            self._ventanas[clave] = min(periodo_a_timedelta(periodo), self._cubierta(clave, df))
+            if entrada is not None:
+                self._revalidar(clave, periodo, lock_clave, ttl)
+                METRICAS.contar("datos", resultado="obsoleto")
+                return self._recortar(entrada[1], periodo)
+
+        # Single-flight: si otra sesión ya está descargando esta clave se espera
+        # su resultado en lugar de repetir la consulta al proveedor
+        with lock_clave:
+            with self._lock:
+                entrada = self._en_memoria(clave, periodo)
+            if entrada is not None and time.time() - entrada[0] < ttl:
+                METRICAS.contar("datos", resultado="compartido")
+                return self._recortar(entrada[1], periodo)
+            METRICAS.contar("datos", resultado="fallo")
+            return self._refrescar(clave, periodo)
+
+    def obtener_varios(self, pedidos, esperar=True, ttl=None):
+        """
+        Varios pedidos (ticker, periodo, intervalo) en paralelo.
+        Retorna una lista alineada con `pedidos`: el DataFrame o la excepción de ese pedido.
+        """
+        # Cada pedido corre con una copia del contexto de quien llama (traza de métricas del rerun)
+        futuros = [self._ejecutor.submit(contextvars.copy_context().run, self.obtener, *p,
+                                         esperar=esperar, ttl=ttl)
+                   for p in pedidos]
+        resultados = []
+        for f in futuros:
+            try:
+                resultados.append(f.result())
+            except Exception as e:
+                resultados.append(e)
+        return resultados
+
+    def _revalidar(self, clave, periodo, lock_clave, ttl):
+        """Refresco en segundo plano; si ya hay una descarga de la clave en curso no hace nada."""
+        if not lock_clave.acquire(blocking=False):
+            return
+
+        def tarea():
+            try:
+                with self._lock:
+                    entrada = self._en_memoria(clave, periodo)
+                if entrada is None or time.time() - entrada[0] >= ttl:
+                    self._refrescar(clave, periodo)
+            except Exception:
+                pass   # sin datos ni caché: el próximo pedido vuelve a intentar
+            finally:
+                lock_clave.release()
+
+        self._fondo.submit(tarea)
+
+    def _refrescar(self, clave, periodo):
+        ticker, intervalo = clave
+        ahora = time.time()
+        with self._lock:
+            ventana = max(periodo_a_timedelta(periodo), self._ventanas.get(clave, pd.Timedelta(0)))
+            entrada = self._en_memoria(clave, ventana)
+        df = entrada[1] if entrada is not None else self._leer_disco(ticker, intervalo, ventana)
+        # Si lo almacenado es más viejo que la ventana pedida o no llega a su
+        # inicio (p. ej. caché de 60 días y pedido de 720), se baja el período completo
+        td = periodo_a_timedelta(periodo)
+        desde = None
+        if not df.empty:
+            limite = pd.Timestamp.now(tz=df.index.tz) - td
+            if df.index[-1] >= limite and self._cubierta(clave, df) >= td:
+                desde = df.index[-1]
+        try:
+            with METRICAS.tramo("descarga", ticker=ticker, intervalo=intervalo):
+                nuevo = self._descargar(ticker, periodo, intervalo, desde=desde)
+            if not nuevo.empty:
+                df = self._fusionar(df, nuevo)
+                self.archivo.agregar(ticker, intervalo, nuevo)
+                if desde is None:
+                    # Es todo lo que el proveedor tiene para el período, aunque empiece después
+                    with self._lock:
+                        self._completas[clave] = max(td, self._completas.get(clave, pd.Timedelta(0)))
+        except Exception:
+            METRICAS.contar("error_descarga", ticker=ticker)
+            if df.empty:
+                raise
+            # Proveedor caído: se sirve la caché y se reintenta al vencer el TTL
+
+        # En memoria queda solo la ventana más larga pedida; el resto vive en el archivo.
+        # Se registra solo lo que de verdad cubre (si la descarga falló, puede ser menos)
+        df = self._recortar(df, ventana)
+        with self._lock:
+            self._memoria[clave] = (ahora, df)
+            self._ventanas[clave] = min(ventana, self._cubierta(clave, df))
+        return self._recortar(df, periodo)
@@ -0,0 +1,290 @@
+"""
+Evaluación walk-forward (origen móvil) de los modelos del radar sobre la historia:
+en cada vela de origen se pronostica como lo haría la app y se compara con lo
+que pasó después.
+
+No se re-estima en cada paso: como en modelos.pronosticar_*, los parámetros se
+estiman cada `refit_cada` velas (arranque en caliente desde los anteriores) y
+entre ajustes el estado filtrado avanza con las observaciones nuevas.
+- ARIMA(`orden`, ORDEN_ARIMA por defecto): un solo filtro de Kalman por bloque; los pronósticos a 1..h
+  pasos de todos los orígenes del bloque salen de los estados filtrados.
+- GARCH(1,1): una sola recursión de varianza por bloque (forecast de arch con
+  `start`), con el régimen (BAJA/NORMAL/ALTA/MUY ALTA) de la app.
+
+    python -m radar.evaluacion GC=F NQ=F BTC-USD --origenes 500 --workers 4
+    python -m radar.evaluacion --archivo watchlist.txt --formato csv --salida eval.csv
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from radar import modelos
+from radar.datos import CACHE_DIR_DEFECTO, PERIODO_BASE, AlmacenOHLCV
+from radar.paralelo import crear_pool
+from radar.proveedores import ProveedorArchivos
+from radar.watchlist import leer_tickers
+
+# Cuantil normal del IC al 95% (el de conf_int(alpha=0.05) de statsmodels)
+Z_95 = 1.959963984540054
+
+COLUMNAS = ["ticker", "modelo", "horizonte", "n", "mae", "rmse", "mape_%", "mae_ingenuo",
+            "acierto_direccion_%", "cobertura_95_%", "sesgo", "acierto_nivel_%", "ajustes", "segundos"]
+
+
+def _origenes(n, ventana, origenes):
+    """Posiciones de origen: las últimas `origenes` con una ventana completa y al menos una vela después."""
+    return np.arange(max(ventana - 1, n - 1 - origenes), n - 1)
+
+
+def _bloques(pos, refit_cada):
+    """Cortes de `pos` en bloques de `refit_cada` orígenes (un ajuste por bloque)."""
+    return [pos[i:i + refit_cada] for i in range(0, len(pos), refit_cada)]
+
+
+def _futuro(v, pos, periodos):
+    """Matriz (orígenes x periodos) con v[t + h] (NaN pasado el final)."""
+    idx = pos[:, None] + np.arange(1, periodos + 1)
+    out = np.full(idx.shape, np.nan)
+    ok = idx < len(v)
+    out[ok] = v[idx[ok]]
+    return out
+
+
+# ─── ARIMA ──────────────────────────────────────────────────────────────────
+
+def _pronosticos_kalman(fr, pos, periodos):
+    """Media y varianza a 1..periodos pasos desde los estados filtrados en `pos`."""
+    Z = fr.design[0, :, 0]
+    T = fr.transition[:, :, 0]
+    R = fr.selection[:, :, 0]
+    RQR = R @ fr.state_cov[:, :, 0] @ R.T
+    c, d, H = fr.state_intercept[:, 0], fr.obs_intercept[0, 0], fr.obs_cov[0, 0, 0]
+    a = fr.filtered_state[:, pos].T                           # (orígenes, k)
+    P = np.moveaxis(fr.filtered_state_cov[:, :, pos], 2, 0)   # (orígenes, k, k)
+    media = np.empty((len(pos), periodos))
+    var = np.empty((len(pos), periodos))
+    for h in range(periodos):
+        a = a @ T.T + c
+        P = T @ P @ T.T + RQR
+        media[:, h] = a @ Z + d
+        var[:, h] = np.einsum('i,mij,j->m', Z, P, Z) + H
+    return media, var
+
+
+def walk_forward_arima(precios, periodos=10, ventana=200, refit_cada=24, origenes=500,
+                       orden=modelos.ORDEN_ARIMA):
+    """
+    Pronósticos ARIMA(`orden`) desde cada origen. Retorna un dict con 'origenes'
+    (timestamps), 'ultimo' (precio en el origen), 'mu', 'ci_inf', 'ci_sup' y 'real'
+    (matrices orígenes x periodos) y 'ajustes' (estimaciones hechas).
+    """
+    from statsmodels.tsa.arima.model import ARIMA
+    s = precios.dropna().astype(float)
+    v = s.to_numpy()
+    pos = _origenes(len(v), ventana, origenes)
+    mu, var = np.empty((len(pos), periodos)), np.empty((len(pos), periodos))
+    params, i = None, 0
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        for bloque in _bloques(pos, refit_cada):
+            # Ajuste con la ventana de la app que termina en el primer origen del bloque
+            inicio = bloque[0] - ventana + 1
+            fit = ARIMA(v[inicio:bloque[0] + 1], order=orden).fit(start_params=params)
+            params = fit.params
+            # Filtro con esos parámetros hasta el último origen del bloque
+            fr = ARIMA(v[inicio:bloque[-1] + 1], order=orden).filter(params).filter_results
+            m, s2 = _pronosticos_kalman(fr, bloque - inicio, periodos)
+            mu[i:i + len(bloque)], var[i:i + len(bloque)] = m, s2
+            i += len(bloque)
+    ancho = Z_95 * np.sqrt(var)
+    return {"origenes": s.index[pos], "ultimo": v[pos], "mu": mu, "ci_inf": mu - ancho,
+            "ci_sup": mu + ancho, "real": _futuro(v, pos, periodos), "ajustes": len(_bloques(pos, refit_cada))}
+
+
+def metricas_arima(wf, horizontes=None):
+    """Una fila por horizonte: errores, error del paseo aleatorio, acierto de dirección y cobertura del IC."""
+    periodos = wf["mu"].shape[1]
+    filas = []
+    for h in horizontes or (1, periodos):
+        j = h - 1
+        real, mu, p0 = wf["real"][:, j], wf["mu"][:, j], wf["ultimo"]
+        ok = ~np.isnan(real)
+        real, mu, p0 = real[ok], mu[ok], p0[ok]
+        inf, sup = wf["ci_inf"][ok, j], wf["ci_sup"][ok, j]
+        err = mu - real
+        filas.append({
+            "modelo": "arima", "horizonte": h, "n": int(ok.sum()),
+            "mae": np.abs(err).mean(), "rmse": np.sqrt((err ** 2).mean()),
+            "mape_%": (np.abs(err) / np.abs(real)).mean() * 100,
+            "mae_ingenuo": np.abs(real - p0).mean(),
+            "acierto_direccion_%": (np.sign(mu - p0) == np.sign(real - p0)).mean() * 100,
+            "cobertura_95_%": ((real >= inf) & (real <= sup)).mean() * 100,
+            "sesgo": err.mean(),
+        })
+    return filas
+
+
+# ─── GARCH ──────────────────────────────────────────────────────────────────
+
+def walk_forward_garch(precios, periodos=10, ventana=200, refit_cada=24, origenes=500):
+    """
+    Volatilidad GARCH(1,1) pronosticada desde cada origen, con la referencia y el
+    régimen de la app (media de la volatilidad pronosticada / desvío de la ventana).
+    La volatilidad realizada es la raíz del retorno cuadrático medio de las
+    `periodos` velas siguientes. Retorna un dict con 'origenes', 'vol_pred'
+    (orígenes x periodos), 'vol_media', 'vol_real', 'nivel', 'nivel_real' y 'ajustes'.
+    """
+    from arch import arch_model
+    ret = precios.dropna().astype(float).pct_change().dropna() * 100
+    r = ret.to_numpy()
+    pos = _origenes(len(r), ventana, origenes)
+    vol_pred = np.empty((len(pos), periodos))
+    params, i = None, 0
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        for bloque in _bloques(pos, refit_cada):
+            inicio = bloque[0] - ventana + 1
+            fit = arch_model(r[inicio:bloque[0] + 1], vol='Garch', p=1, q=1, mean='Zero',
+                             rescale=False).fit(starting_values=params, disp='off', show_warning=False)
+            params = fit.params
+            fijo = arch_model(r[inicio:bloque[-1] + 1], vol='Garch', p=1, q=1, mean='Zero',
+                              rescale=False).fix(params)
+            fc = fijo.forecast(horizon=periodos, start=int(bloque[0] - inicio), reindex=False)
+            vol_pred[i:i + len(bloque)] = np.sqrt(fc.variance.to_numpy())
+            i += len(bloque)
+
+    vol_media = ret.rolling(ventana).std().to_numpy()[pos]
+    futuro = _futuro(r, pos, periodos)
+    completo = ~np.isnan(futuro).any(axis=1)
+    vol_real = np.where(completo, np.sqrt(np.nanmean(futuro ** 2, axis=1)), np.nan)
+    vol_futura = vol_pred.mean(axis=1)
+
+    def niveles(vol):
+        ratio = np.where(vol_media > 0, vol / vol_media, 1.0)
+        return np.array([None if np.isnan(x) else modelos.nivel_volatilidad(x) for x in ratio], dtype=object)
+
+    return {"origenes": ret.index[pos], "vol_pred": vol_pred, "vol_futura": vol_futura,
+            "vol_media": vol_media, "vol_real": vol_real, "nivel": niveles(vol_futura),
+            "nivel_real": niveles(vol_real), "ajustes": len(_bloques(pos, refit_cada))}
+
+
+def metricas_garch(wf):
+    """Errores de la volatilidad media pronosticada vs la realizada y acierto del régimen."""
+    ok = ~np.isnan(wf["vol_real"])
+    err = wf["vol_futura"][ok] - wf["vol_real"][ok]
+    return [{
+        "modelo": "garch", "horizonte": wf["vol_pred"].shape[1], "n": int(ok.sum()),
+        "mae": np.abs(err).mean(), "rmse": np.sqrt((err ** 2).mean()), "sesgo": err.mean(),
+        "acierto_nivel_%": (wf["nivel"][ok] == wf["nivel_real"][ok]).mean() * 100,
+    }]
+
+
+# ─── Por activo ─────────────────────────────────────────────────────────────
+
+def evaluar_activo(ticker, precios, periodos=10, origenes=500, arima_refit_cada=24,
+                   garch_refit_cada=24, horizontes=None):
+    """Filas de métricas ARIMA y GARCH de un activo (cada modelo, si está disponible)."""
+    filas = []
+    if modelos.ARIMA_DISPONIBLE:
+        t0 = time.perf_counter()
+        wf = walk_forward_arima(precios, periodos, refit_cada=arima_refit_cada, origenes=origenes)
+        seg = time.perf_counter() - t0
+        filas += [dict(f, ajustes=wf["ajustes"], segundos=seg) for f in metricas_arima(wf, horizontes)]
+    if modelos.GARCH_DISPONIBLE:
+        t0 = time.perf_counter()
+        wf = walk_forward_garch(precios, periodos, refit_cada=garch_refit_cada, origenes=origenes)
+        seg = time.perf_counter() - t0
+        filas += [dict(f, ajustes=wf["ajustes"], segundos=seg) for f in metricas_garch(wf)]
+    return [dict(f, ticker=ticker) for f in filas]
+
+
+def evaluar_activos(series, pool=None, **kwargs):
+    """
+    `series`: {ticker: precios}. Reparte los activos en el pool (si hay) y
+    retorna un DataFrame con las filas de todos; los que fallan van con su error.
+    """
+    if pool is None:
+        futuros = None
+    else:
+        futuros = {t: pool.submit(evaluar_activo, t, p, **kwargs) for t, p in series.items()}
+    filas, errores = [], {}
+    for ticker, precios in series.items():
+        try:
+            filas += futuros[ticker].result() if futuros else evaluar_activo(ticker, precios, **kwargs)
+        except Exception as e:
+            errores[ticker] = e
+    tabla = pd.DataFrame(filas, columns=COLUMNAS)
+    tabla.attrs["errores"] = errores
+    return tabla
+
+
+def _horizontes(texto):
+    return tuple(int(x) for x in texto.split(",") if x.strip())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m radar.evaluacion", description=__doc__.split("\n")[1])
+    parser.add_argument("tickers", nargs="*")
+    parser.add_argument("--archivo", help="Archivo con un ticker por línea (# = comentario)")
+    parser.add_argument("--origenes", type=int, default=500, help="Velas de 1H evaluadas (las últimas)")
+    parser.add_argument("--periodos", type=int, default=10, help="Horizonte del pronóstico, como en la app")
+    parser.add_argument("--horizontes", type=_horizontes, help="Horizontes ARIMA a reportar (coma; defecto 1 y --periodos)")
+    parser.add_argument("--arima-refit-cada", type=int, default=24)
+    parser.add_argument("--garch-refit-cada", type=int, default=24)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Procesos (1 = sin pool)")
+    parser.add_argument("--formato", choices=["tabla", "csv"], default="tabla")
+    parser.add_argument("--salida", help="Archivo de salida (por defecto, stdout)")
+    parser.add_argument("--cache-dir", default=CACHE_DIR_DEFECTO)
+    parser.add_argument("--datos-dir", help="Leer barras de archivos locales en vez de Yahoo (sin red)")
+    parser.add_argument("--desde", help="Historia archivada desde esta fecha (p. ej. 2022-01-01) en vez de "
+                                        "la ventana de PERIODO_BASE")
+    args = parser.parse_args(argv)
+
+    tickers = list(args.tickers) + (leer_tickers(args.archivo) if args.archivo else [])
+    tickers = list(dict.fromkeys(tickers))
+    if not tickers:
+        parser.error("indicar al menos un ticker o --archivo")
+
+    proveedor = ProveedorArchivos(args.datos_dir) if args.datos_dir else None
+    almacen = AlmacenOHLCV(args.cache_dir, proveedor=proveedor)
+    series = {}
+    for ticker, df in zip(tickers, almacen.obtener_varios([(t, PERIODO_BASE, "1h") for t in tickers])):
+        if isinstance(df, Exception) or df.empty:
+            print(f"{ticker}: sin datos ({df if isinstance(df, Exception) else 'vacío'})", file=sys.stderr)
+        elif args.desde:
+            series[ticker] = almacen.historia(ticker, "1h", desde=args.desde)['Close']
+        else:
+            series[ticker] = df['Close']
+
+    pool = crear_pool(min(args.workers, len(series)))
+    try:
+        tabla = evaluar_activos(series, pool=pool, periodos=args.periodos, origenes=args.origenes,
+                                arima_refit_cada=args.arima_refit_cada,
+                                garch_refit_cada=args.garch_refit_cada, horizontes=args.horizontes)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    for ticker, e in tabla.attrs["errores"].items():
+        print(f"{ticker}: {e}", file=sys.stderr)
+
+    salida = open(args.salida, "w", encoding="utf-8", newline="") if args.salida else sys.stdout
+    try:
+        if args.formato == "csv":
+            tabla.to_csv(salida, index=False)
+        else:
+            with pd.option_context("display.width", 200, "display.max_columns", None,
+                                   "display.float_format", "{:.4g}".format):
+                salida.write(tabla.to_string(index=False) + "\n")
+    finally:
+        if salida is not sys.stdout:
+            salida.close()
+    return 1 if tabla.empty else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
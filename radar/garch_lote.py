@@ -0,0 +1,259 @@
+"""
+GARCH(1,1) por lotes en NumPy: estima muchas series de retornos (media cero) a la
+vez, con la recursión de varianza vectorizada entre series y un solo bucle de
+optimización (BFGS por serie, con búsqueda lineal en paralelo). Sigue las
+convenciones de `arch` (backcast, valores iniciales, verosimilitud gaussiana)
+para dar el mismo vol_pred / ratio / nivel que modelos.calcular_garch, sin el
+costo fijo de un arch_model por activo. No necesita `arch` instalado.
+"""
+import numpy as np
+import pandas as pd
+
+from radar.modelos import nivel_volatilidad
+
+# Valores iniciales de arch: alfa x persistencia (alfa + beta), omega por varianza objetivo
+_ALFAS = (0.01, 0.05, 0.1, 0.2)
+_PERSISTENCIAS = (0.5, 0.7, 0.9, 0.98)
+
+
+def backcast(r):
+    """Varianza inicial de la recursión, por serie (la de arch: EWMA de los primeros 75 r²)."""
+    tau = min(75, r.shape[1])
+    w = 0.94 ** np.arange(tau)
+    return (r[:, :tau] ** 2) @ (w / w.sum())
+
+
+def _filtro(b, a):
+    """
+    x_t = a * x_{t-1} + b_t a lo largo del último eje (x_0 = b_0), con `a` por serie.
+    Barrido de prefijos (Hillis-Steele): log2(T) pasos vectorizados en vez de un
+    bucle de T pasos; solo usa potencias a^k <= 1, así que es estable.
+    """
+    x = b.copy()
+    potencia = a[..., None]
+    s, n = 1, x.shape[-1]
+    while s < n:
+        x[..., s:] = x[..., s:] + potencia * x[..., :-s]
+        potencia = potencia * potencia
+        s *= 2
+    return x
+
+
+def _recursion(r2, omega, alfa, beta, bc, gradiente=False):
+    """
+    Varianzas condicionales (series x T) y, si `gradiente`, sus derivadas respecto
+    de (omega, alfa, beta) como array (3, series, T).
+    s2_0 = omega + (alfa + beta) * backcast; s2_t = omega + alfa * r2_{t-1} + beta * s2_{t-1}.
+    """
+    b = np.empty_like(r2)
+    b[:, 0] = omega + (alfa + beta) * bc
+    b[:, 1:] = omega[:, None] + alfa[:, None] * r2[:, :-1]
+    s2 = _filtro(b, beta)
+    if not gradiente:
+        return s2
+    # d s2_t = (1, r2_{t-1}, s2_{t-1}) + beta * d s2_{t-1}, con r2_{-1} = s2_{-1} = backcast
+    db = np.empty((3,) + r2.shape)
+    db[0] = 1.0
+    db[1, :, 0], db[2, :, 0] = bc, bc
+    db[1, :, 1:], db[2, :, 1:] = r2[:, :-1], s2[:, :-1]
+    return s2, _filtro(db, np.broadcast_to(beta, (3, len(beta))))
+
+
+def _nll(r2, omega, alfa, beta, bc, gradiente=False):
+    """Menos log-verosimilitud gaussiana por serie (y su gradiente en omega, alfa, beta)."""
+    if not gradiente:
+        s2 = _recursion(r2, omega, alfa, beta, bc)
+        return 0.5 * (np.log(2 * np.pi) + np.log(s2) + r2 / s2).sum(axis=1)
+    s2, ds2 = _recursion(r2, omega, alfa, beta, bc, gradiente=True)
+    f = 0.5 * (np.log(2 * np.pi) + np.log(s2) + r2 / s2).sum(axis=1)
+    df_ds2 = 0.5 * (1 / s2 - r2 / s2 ** 2)
+    return f, (ds2 * df_ds2).sum(axis=2).T
+
+
+def _sigmoide(x):
+    return 1 / (1 + np.exp(-np.clip(x, -500, 500)))
+
+
+def _logit(p):
+    p = np.clip(p, 1e-10, 1 - 1e-10)
+    return np.log(p / (1 - p))
+
+
+def _parametros(theta):
+    """
+    theta (series x 3) sin restricciones -> (omega, alfa, beta) con omega > 0,
+    alfa, beta >= 0 y alfa + beta < 1: log omega, logit persistencia, logit alfa/persistencia.
+    Retorna también el jacobiano (series x 3 x 3) de (omega, alfa, beta) respecto de theta.
+    """
+    omega = np.exp(theta[:, 0])
+    p, s = _sigmoide(theta[:, 1]), _sigmoide(theta[:, 2])
+    dp, ds = p * (1 - p), s * (1 - s)
+    jac = np.zeros((len(theta), 3, 3))
+    jac[:, 0, 0] = omega
+    jac[:, 1, 1], jac[:, 1, 2] = s * dp, p * ds
+    jac[:, 2, 1], jac[:, 2, 2] = (1 - s) * dp, -p * ds
+    return omega, p * s, p * (1 - s), jac
+
+
+def _objetivo(theta, r2, bc, gradiente=True):
+    omega, alfa, beta, jac = _parametros(theta)
+    if not gradiente:
+        return _nll(r2, omega, alfa, beta, bc)
+    f, g = _nll(r2, omega, alfa, beta, bc, gradiente=True)
+    return f, np.einsum('mi,mij->mj', g, jac)
+
+
+def _iniciales(r2, bc):
+    """Mejor punto de la grilla de arch por serie (evaluada en bloque)."""
+    objetivo = r2.mean(axis=1)
+    mejor_f = np.full(len(r2), np.inf)
+    mejor = np.zeros((len(r2), 3))
+    for a in _ALFAS:
+        for pers in _PERSISTENCIAS:
+            omega = (1 - pers) * objetivo
+            f = _nll(r2, omega, np.full(len(r2), a), np.full(len(r2), pers - a), bc)
+            mejora = f < mejor_f
+            mejor_f[mejora] = f[mejora]
+            mejor[mejora] = np.column_stack([omega, np.full(len(r2), a), np.full(len(r2), pers - a)])[mejora]
+    return mejor
+
+
+def _theta(omega, alfa, beta):
+    pers = alfa + beta
+    return np.column_stack([np.log(omega), _logit(pers), _logit(alfa / pers)])
+
+
+def ajustar_garch_lote(retornos, max_iter=200, tol=1e-10):
+    """
+    Estima GARCH(1,1) de media cero para cada fila de `retornos` (series x T, en %),
+    desde el mismo punto inicial que arch (así llega al mismo máximo local cuando
+    la verosimilitud tiene varios). Retorna (omega, alfa, beta, convergio) por serie.
+    """
+    r = np.asarray(retornos, dtype=float)
+    # Escala por serie (omega ~ 1): mejora el condicionamiento; se deshace al final
+    escala = np.sqrt((r ** 2).mean(axis=1))
+    escala[escala == 0] = 1.0
+    rs = r / escala[:, None]
+    r2, bc = rs ** 2, backcast(rs)
+
+    ini = _iniciales(r2, bc)
+    theta, _, convergio = _optimizar(_theta(ini[:, 0], ini[:, 1], ini[:, 2]), r2, bc, max_iter, tol)
+    omega, alfa, beta, _ = _parametros(theta)
+    return omega * escala ** 2, alfa, beta, convergio
+
+
+def _optimizar(theta, r2, bc, max_iter, tol):
+    """BFGS por fila sobre theta (sin restricciones). Retorna (theta, f, convergio)."""
+    m = len(theta)
+    theta = theta.copy()
+    f, g = _objetivo(theta, r2, bc)
+    H = np.tile(np.eye(3), (m, 1, 1))      # inversa del hessiano (BFGS), por serie
+    activas = np.ones(m, bool)
+    en_gradiente = np.ones(m, bool)         # H recién reiniciada (paso de máximo descenso)
+
+    for _ in range(max_iter):
+        idx = np.flatnonzero(activas)
+        if not len(idx):
+            break
+        d = -np.einsum('mij,mj->mi', H[idx], g[idx])
+        pendiente = (g[idx] * d).sum(axis=1)
+        # Dirección que no desciende: se reinicia a -gradiente
+        malo = pendiente >= 0
+        H[idx[malo]] = np.eye(3)
+        d[malo], pendiente[malo] = -g[idx[malo]], -(g[idx[malo]] ** 2).sum(axis=1)
+
+        # Búsqueda lineal de Armijo (backtracking), todas las series a la vez
+        paso = np.ones(len(idx))
+        pendientes = np.ones(len(idx), bool)
+        for _ in range(30):
+            k = np.flatnonzero(pendientes)
+            if not len(k):
+                break
+            prueba = _objetivo(theta[idx[k]] + paso[k, None] * d[k], r2[idx[k]], bc[idx[k]], gradiente=False)
+            ok = np.isfinite(prueba) & (prueba <= f[idx[k]] + 1e-4 * paso[k] * pendiente[k])
+            pendientes[k[ok]] = False
+            paso[k[~ok]] *= 0.5
+        # Sin paso aceptable: con H reiniciada es un óptimo numérico; si no, se
+        # reinicia H y se reintenta con máximo descenso en la próxima vuelta
+        fallan = idx[pendientes]
+        activas[fallan[en_gradiente[fallan]]] = False
+        H[fallan] = np.eye(3)
+        en_gradiente[fallan] = True
+        avanzan = ~pendientes
+        if not avanzan.any():
+            continue
+        j = idx[avanzan]
+        en_gradiente[j] = False
+        s = paso[avanzan, None] * d[avanzan]
+        theta_nuevo = theta[j] + s
+        f_nuevo, g_nuevo = _objetivo(theta_nuevo, r2[j], bc[j])
+        y = g_nuevo - g[j]
+
+        # Actualización BFGS de la inversa del hessiano (si la curvatura es positiva)
+        sy = (s * y).sum(axis=1)
+        cur = sy > 1e-12
+        if cur.any():
+            jj, ss, yy = np.flatnonzero(cur), s[cur], y[cur]
+            rho = 1 / sy[cur]
+            I = np.eye(3)
+            A = I - rho[:, None, None] * ss[:, :, None] * yy[:, None, :]
+            B = I - rho[:, None, None] * yy[:, :, None] * ss[:, None, :]
+            H[j[jj]] = A @ H[j[jj]] @ B + rho[:, None, None] * ss[:, :, None] * ss[:, None, :]
+
+        cambio = np.abs(f[j] - f_nuevo) / np.maximum(np.abs(f_nuevo), 1.0)
+        theta[j], f[j], g[j] = theta_nuevo, f_nuevo, g_nuevo
+        activas[j[(cambio < tol) & (np.abs(g_nuevo).max(axis=1) < 1e-6)]] = False
+
+    return theta, f, ~activas
+
+
+def pronosticar_garch_lote(retornos, omega, alfa, beta, periodos=10):
+    """Volatilidad pronosticada (%) a 1..periodos pasos por serie (series x periodos)."""
+    r = np.asarray(retornos, dtype=float)
+    s2 = _recursion(r ** 2, omega, alfa, beta, backcast(r))
+    siguiente = omega + alfa * r[:, -1] ** 2 + beta * s2[:, -1]
+    pers = alfa + beta
+    var = np.empty((len(r), periodos))
+    var[:, 0] = siguiente
+    for h in range(1, periodos):
+        var[:, h] = omega + pers * var[:, h - 1]
+    return np.sqrt(var)
+
+
+def calcular_garch_lote(precios, periodos=10, detalle=True):
+    """
+    modelos.calcular_garch para muchos activos a la vez. `precios`: {ticker: serie
+    de cierres}. Retorna {ticker: dict como calcular_garch o None si faltan datos};
+    con `detalle=False` sin 'vol_hist' ni 'idx_fut' (solo hacen falta para graficar).
+    Las series se agrupan por largo (normalmente todas tienen la ventana completa
+    de 200 retornos) y cada grupo se estima en bloque.
+    """
+    salida, grupos = {}, {}
+    for ticker, p in precios.items():
+        v = p.to_numpy(dtype=float)
+        ok = ~np.isnan(v)
+        if ok.sum() < 100:
+            salida[ticker] = None
+            continue
+        # Los mismos 200 retornos que calcular_garch (pct_change de los cierres válidos)
+        v = v[ok][-201:]
+        ret = (v[1:] / v[:-1] - 1) * 100
+        grupos.setdefault(len(ret), []).append((ticker, ret, p.index[ok][-len(ret):], p.name))
+
+    for miembros in grupos.values():
+        R = np.vstack([m[1] for m in miembros])
+        omega, alfa, beta, _ = ajustar_garch_lote(R)
+        vol_pred = pronosticar_garch_lote(R, omega, alfa, beta, periodos)
+        vol_media = R.std(axis=1, ddof=1)
+        vol_futura = vol_pred.mean(axis=1)
+        for i, (ticker, ret, idx, nombre) in enumerate(miembros):
+            ratio = vol_futura[i] / vol_media[i] if vol_media[i] > 0 else 1
+            res = {"vol_pred": vol_pred[i], "volatilidad_futura": float(vol_futura[i]),
+                   "vol_media": float(vol_media[i]), "ratio": float(ratio), "nivel": nivel_volatilidad(ratio)}
+            if detalle:
+                vol_hist = pd.Series(ret, index=idx, name=nombre).rolling(5).std().tail(50)
+                freq = pd.infer_freq(idx[-20:]) or 'h'
+                res["vol_hist"] = vol_hist
+                res["idx_fut"] = pd.date_range(start=vol_hist.index[-1], periods=periodos + 1, freq=freq)[1:]
+            salida[ticker] = res
+    return salida
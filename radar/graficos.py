@@ -0,0 +1,200 @@
+"""
+Gráficos del radar (matplotlib): predicción ARIMA, volatilidad GARCH y el panel
+por timeframe. Reciben los resultados de `modelos` / `indicadores` y solo dibujan.
+Las huellas identifican los datos de cada gráfico para la caché de render.
+"""
+import io
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+from radar.cache_graficos import huella
+
+COLORES_NIVEL = {"MUY ALTA ⚠️": "red", "ALTA": "orange", "NORMAL": "lime", "BAJA": "cyan"}
+
+
+def graficar_arima_forecast(res, nombre_activo):
+    """ARIMA (orden en res['orden']): predicción de precio con IC al 95% (res = modelos.calcular_arima)."""
+    hist, idx_fut, mu = res['hist'], res['idx_fut'], res['mu']
+
+    fig, ax = plt.subplots(figsize=(8, 4))
+    fig.patch.set_facecolor('#0e1117')
+    ax.set_facecolor('#0e1117')
+    ax.plot(hist.index, hist.values, color='white', linewidth=1.5, label='Precio real')
+    ax.plot(idx_fut, mu, color='lime', linewidth=2, linestyle='--', label='Predicción ARIMA')
+    ax.fill_between(idx_fut, res['ci_inf'], res['ci_sup'],
+                    color='skyblue', alpha=0.35, label='IC 95%')
+    ax.plot([hist.index[-1], idx_fut[0]], [hist.values[-1], mu[0]],
+            color='lime', linewidth=1.5, linestyle='--')
+
+    dir_col = 'lime' if res['prediccion'] > res['ultimo_precio'] else 'tomato'
+    ax.set_title(f"ARIMA{res['orden']} — {nombre_activo}   {res['direccion']}  {res['cambio_pct']:+.2f}%",
+                 color=dir_col, fontsize=11, fontweight='bold')
+    ax.tick_params(axis='x', colors='gray', labelsize=7, rotation=45)
+    ax.tick_params(axis='y', colors='gray', labelsize=8)
+    ax.legend(loc='upper left', fontsize=8, facecolor='#1a1a2e', labelcolor='white')
+    ax.grid(color='gray', linestyle=':', linewidth=0.3, alpha=0.5)
+    plt.tight_layout()
+    return fig
+
+
+def graficar_garch_forecast(res, nombre_activo):
+    """GARCH(1,1): predicción de volatilidad condicional (res = modelos.calcular_garch)."""
+    vol_hist, idx_fut, vol_pred = res['vol_hist'], res['idx_fut'], res['vol_pred']
+
+    fig, ax = plt.subplots(figsize=(8, 4))
+    fig.patch.set_facecolor('#0e1117')
+    ax.set_facecolor('#0e1117')
+    ax.plot(vol_hist.index, vol_hist.values, color='white', linewidth=1.5, label='Volatilidad histórica')
+    ax.plot(idx_fut, vol_pred, color='orange', linewidth=2, linestyle='--', label='Predicción GARCH')
+    ax.fill_between(idx_fut, vol_pred * 0.5, vol_pred * 1.5,
+                    color='skyblue', alpha=0.35, label='Rango esperado')
+    if not np.isnan(vol_hist.values[-1]):
+        ax.plot([vol_hist.index[-1], idx_fut[0]],
+                [vol_hist.values[-1], vol_pred[0]], color='orange', linewidth=1.5, linestyle='--')
+
+    nivel = res['nivel']
+    ax.set_title(f"GARCH — {nombre_activo}   Volatilidad: {nivel}",
+                 color=COLORES_NIVEL[nivel], fontsize=11, fontweight='bold')
+    ax.tick_params(axis='x', colors='gray', labelsize=7, rotation=45)
+    ax.tick_params(axis='y', colors='gray', labelsize=8)
+    ax.legend(loc='upper left', fontsize=8, facecolor='#1a1a2e', labelcolor='white')
+    ax.grid(color='gray', linestyle=':', linewidth=0.3, alpha=0.5)
+    ax.set_ylabel('Volatilidad (%)', color='gray', fontsize=9)
+    plt.tight_layout()
+    return fig
+
+
+def graficar_timeframe(calc, nombre, tf_label, es_diario=False):
+    """
+    Gráfico completo por timeframe:
+    Precio + POC + VWAP + RSI Divergence + Diamante (calc = indicadores.calcular_timeframe).
+    Retorna (fig, tendencia).
+    """
+    if calc is None:
+        return None, "NEUTRO"
+
+    barras      = calc['barras']
+    poc_price   = calc['poc']
+    div_alc     = calc['div_alc']
+    div_baj     = calc['div_baj']
+    es_diamante = calc['diamante']
+    tendencia   = calc['tendencia']
+    color_caja  = {"COMPRA": "#155015", "VENTA": "#7a1515"}.get(tendencia, "#333333")
+
+    # ── Plot: precio arriba | RSI abajo ──────────────────────────────────────
+    tail = 80
+    ultimas = barras.tail(tail)
+    idx, close = ultimas.indice(), ultimas.close
+    rsi_v = calc['rsi'][-tail:]
+    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(7, 5.2),
+                                   gridspec_kw={'height_ratios': [3, 1]},
+                                   sharex=True)
+    fig.patch.set_facecolor('#0e1117')
+    ax1.set_facecolor('#0e1117')
+    ax2.set_facecolor('#0e1117')
+
+    # Precio
+    ax1.plot(idx, close, color='white', alpha=0.85, linewidth=1.3, label='Precio')
+    # VWAP
+    ax1.plot(idx, calc['vwap'][-tail:], color='cyan', linewidth=1.6, label='VWAP')
+    # Área de valor (70% del volumen) + POC
+    if calc['val'] is not None:
+        ax1.axhspan(calc['val'], calc['vah'], color='red', alpha=0.07, label='Área de valor')
+    ax1.axhline(y=poc_price, color='red', alpha=0.85, linewidth=1.8, label='POC')
+    ax1.text(idx[-1], poc_price, f'  {poc_price:,.2f}',
+             color='red', fontsize=7.5, fontweight='bold',
+             ha='left', va='center', backgroundcolor='#0e1117')
+
+    # Nota vela diaria en formación
+    if es_diario:
+        ax1.text(0.99, 0.03, '⚠️ Última vela: sesión en curso',
+                 transform=ax1.transAxes, color='#ffdd57',
+                 fontsize=6.5, ha='right', va='bottom', alpha=0.85)
+
+    # Diamante
+    if es_diamante:
+        ax1.scatter(idx[-1], float(close[-1]),
+                    color='#00d4ff', s=200, marker='d',
+                    edgecolors='white', linewidths=1.5, zorder=8, label='💎 Compresión Vol.')
+
+    # Divergencias sobre el precio
+    offset = float(np.nanstd(close.astype(float), ddof=1)) * 0.45
+    n_total = len(barras)
+    base    = n_total - tail
+    for i in div_alc:
+        ri = i - base
+        if 0 <= ri < len(idx):
+            ax1.scatter(idx[ri],
+                        float(close[ri]) - offset,
+                        marker='^', color='lime', s=110, zorder=9,
+                        label='Div. Alcista ▲')
+    for i in div_baj:
+        ri = i - base
+        if 0 <= ri < len(idx):
+            ax1.scatter(idx[ri],
+                        float(close[ri]) + offset,
+                        marker='v', color='tomato', s=110, zorder=9,
+                        label='Div. Bajista ▼')
+
+    # Badge tendencia
+    ax1.text(0.02, 0.94, tendencia,
+             transform=ax1.transAxes, color='white',
+             fontsize=11, fontweight='bold',
+             bbox=dict(facecolor=color_caja, alpha=0.92, boxstyle='round,pad=0.4'))
+
+    ax1.set_title(f"TF: {tf_label}  ·  {nombre}  ·  {tendencia}",
+                  color='white', fontsize=10, fontweight='bold')
+    ax1.tick_params(axis='y', colors='gray', labelsize=7)
+    ax1.grid(color='gray', linestyle=':', linewidth=0.3, alpha=0.35)
+    # Leyenda sin duplicados
+    hdls, lbls = ax1.get_legend_handles_labels()
+    ax1.legend(dict(zip(lbls, hdls)).values(), dict(zip(lbls, hdls)).keys(),
+               loc='upper right', fontsize=6.5,
+               facecolor='#1a1a2e', labelcolor='white')
+
+    # Panel RSI
+    ax2.plot(idx, rsi_v, color='#c77dff', linewidth=1.2, label='RSI(14)')
+    ax2.axhline(70, color='tomato', linewidth=0.8, linestyle='--', alpha=0.7)
+    ax2.axhline(30, color='lime',   linewidth=0.8, linestyle='--', alpha=0.7)
+    ax2.axhline(50, color='gray',   linewidth=0.5, linestyle=':', alpha=0.5)
+    ax2.fill_between(idx, rsi_v, 70, where=(rsi_v >= 70), color='tomato', alpha=0.18)
+    ax2.fill_between(idx, rsi_v, 30, where=(rsi_v <= 30), color='lime',   alpha=0.18)
+    ax2.set_ylim(0, 100)
+    ax2.set_ylabel('RSI', color='gray', fontsize=7)
+    ax2.tick_params(axis='x', colors='gray', labelsize=6, rotation=45)
+    ax2.tick_params(axis='y', colors='gray', labelsize=6)
+    ax2.grid(color='gray', linestyle=':', linewidth=0.3, alpha=0.3)
+    ax2.legend(loc='upper right', fontsize=6.5, facecolor='#1a1a2e', labelcolor='white')
+
+    plt.tight_layout(h_pad=0.5)
+    return fig, tendencia
+
+
+# ── Huellas: identifican los datos de cada gráfico (clave de la caché de render) ──
+
+def huella_arima(res, nombre_activo):
+    return huella("arima", nombre_activo, res['orden'], res['hist'], res['idx_fut'],
+                  res['mu'], res['ci_inf'], res['ci_sup'])
+
+
+def huella_garch(res, nombre_activo):
+    return huella("garch", nombre_activo, res['vol_hist'], res['idx_fut'],
+                  res['vol_pred'], res['nivel'])
+
+
+def huella_timeframe(calc, nombre, tf_label, es_diario):
+    barras = calc['barras']
+    ultimas = barras.tail(80)
+    return huella("tf", nombre, tf_label, es_diario, ultimas.tiempos, ultimas.close,
+                  calc['vwap'][-80:], calc['rsi'][-80:], len(barras),
+                  calc['poc'], calc['val'], calc['vah'], calc['div_alc'], calc['div_baj'],
+                  calc['diamante'], calc['tendencia'])
+
+
+def figura_a_png(fig):
+    """Rasteriza como st.pyplot (PNG, 200 dpi, bbox ajustado) y libera la figura."""
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', dpi=200, bbox_inches='tight')
+    plt.close(fig)
+    return buf.getvalue()
@@ -0,0 +1,265 @@
+"""
+Gráficos del radar para el navegador: specs de Vega-Lite (dict JSON) con las
+series ya reducidas, que dibuja el cliente (st.vega_lite_chart) con zoom y
+tooltips. Es la alternativa a `graficos` (PNG de matplotlib en el servidor).
+
+Las series largas se reducen con LTTB (Largest-Triangle-Three-Buckets), que
+conserva la forma (picos y valles) con pocos puntos; los marcadores
+(divergencias, diamante) y los niveles (POC, área de valor) van completos.
+La historia larga de un TF (años de velas) va en una franja de contexto aparte,
+así la ventana del radar conserva todo su detalle.
+Sin matplotlib: solo NumPy/pandas.
+"""
+import numpy as np
+import pandas as pd
+
+ESQUEMA = "https://vega.github.io/schema/vega-lite/v5.json"
+PUNTOS = 400
+
+COLORES_NIVEL = {"MUY ALTA ⚠️": "red", "ALTA": "orange", "NORMAL": "lime", "BAJA": "cyan"}
+COLORES_TENDENCIA = {"COMPRA": "#2e9e2e", "VENTA": "#d04040"}
+
+
+def lttb(x, y, umbral):
+    """
+    Índices de los `umbral` puntos que conserva LTTB (siempre el primero y el
+    último). Los NaN de `y` se descartan. Con `umbral` >= puntos válidos, todos.
+    """
+    y = np.asarray(y, dtype=float)
+    validos = np.flatnonzero(~np.isnan(y))
+    n = len(validos)
+    if umbral >= n or umbral < 3:
+        return validos
+    x = np.asarray(x, dtype=float)[validos]
+    y = y[validos]
+    bordes = np.linspace(1, n - 1, umbral - 1).astype(int)   # umbral - 2 buckets entre el primero y el último
+    idx = np.empty(umbral, dtype=int)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i in range(umbral - 2):
+        lo, hi = bordes[i], bordes[i + 1]
+        # Tercer vértice: promedio del bucket siguiente (el último punto para el último bucket)
+        sig_hi = bordes[i + 2] if i + 2 < len(bordes) else n
+        cx, cy = x[hi:sig_hi].mean(), y[hi:sig_hi].mean()
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        idx[i + 1] = a
+    return validos[idx]
+
+
+def _ms(index):
+    """Milisegundos de la hora de pared (se muestra la hora del mercado, no la del navegador)."""
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.as_unit("ns").asi8 // 1_000_000
+
+
+def _redondear(v, cifras=6):
+    """Lista JSON con `cifras` significativas (NaN -> null): payload más chico."""
+    v = np.asarray(v, dtype=float)
+    finitos = np.abs(v[np.isfinite(v)])
+    escala = int(np.floor(np.log10(finitos.max()))) if len(finitos) and finitos.max() > 0 else 0
+    v = np.round(v, max(cifras - 1 - escala, 0))
+    return [None if x != x else x for x in v.tolist()]
+
+
+def _serie(t_ms, columnas, idx):
+    """Filas {t, col: valor} de las posiciones `idx`."""
+    cols = {k: _redondear(np.asarray(v)[idx]) for k, v in columnas.items()}
+    return [dict(t=int(t), **{k: cols[k][i] for k in cols}) for i, t in enumerate(t_ms[idx])]
+
+
+def _eje_x(titulo=None):
+    return {"field": "t", "type": "temporal", "scale": {"type": "utc"}, "title": titulo,
+            "axis": {"format": "%d %b %H:%M", "labelAngle": -45}}
+
+
+TOOLTIP_FECHA = {"field": "t", "type": "temporal", "timeUnit": "utcyearmonthdatehoursminutes",
+                 "format": "%Y-%m-%d %H:%M", "title": "fecha"}
+
+# Zoom y arrastre sobre el eje temporal; va en una sola capa y mueve la escala compartida
+ZOOM = {"name": "zoom", "select": {"type": "interval", "encodings": ["x"]}, "bind": "scales"}
+
+
+def _linea(dataset, campo, color, titulo, ancho=1.5, trazo=None, zoom=False, dominio=None):
+    capa = {
+        "data": {"name": dataset},
+        "mark": {"type": "line", "color": color, "strokeWidth": ancho, "interpolate": "linear"},
+        "encoding": {
+            "x": _eje_x(),
+            "y": {"field": campo, "type": "quantitative", "title": titulo,
+                  "scale": {"zero": False} if dominio is None else {"domain": dominio}},
+            "tooltip": [TOOLTIP_FECHA, {"field": campo, "type": "quantitative", "title": titulo}],
+        },
+    }
+    if trazo:
+        capa["mark"]["strokeDash"] = trazo
+    if zoom:
+        capa["params"] = [ZOOM]
+    return capa
+
+
+def _franja_historia(historia, t0, t1, puntos, ancho):
+    """(panel, filas): cierre de toda la `historia` reducido con LTTB, con la ventana [t0, t1] sombreada."""
+    t = _ms(historia.index)
+    close = historia['Close'].to_numpy(dtype=float)
+    eje = dict(_eje_x(), axis={"format": "%b %Y", "labelAngle": 0})
+    linea = _linea("historia", "close", "#9e9e9e", "Historia", 1)
+    linea["encoding"]["x"] = eje
+    linea["params"] = [dict(ZOOM, name="zoom_historia")]
+    return {
+        "height": 60, "width": ancho,
+        "layer": [
+            {"data": {"values": [{"t": int(t0), "t2": int(t1)}]},
+             "mark": {"type": "rect", "color": "cyan", "opacity": 0.15},
+             "encoding": {"x": eje, "x2": {"field": "t2"}}},
+            linea,
+        ],
+    }, _serie(t, {"close": close}, lttb(t, close, puntos))
+
+
+def spec_timeframe(calc, nombre, tf_label, es_diario=False, puntos=PUNTOS, ancho=380, historia=None):
+    """
+    Precio + VWAP + POC/área de valor + divergencias + diamante arriba y RSI
+    abajo, con zoom/arrastre en el eje temporal compartido. Dibuja toda la
+    ventana del TF (no solo las últimas 80 velas), reducida a `puntos`.
+    `historia`: OHLCV del mismo TF más largo que la ventana (p. ej. todo lo
+    archivado); se agrega debajo como franja de contexto, también a `puntos`.
+    `ancho` en px: los paneles apilados no se ajustan solos al contenedor.
+    (calc = indicadores.calcular_timeframe)
+    """
+    barras = calc['barras']
+    t = _ms(barras.indice())
+    close = barras.close.astype(float)
+    tendencia = calc['tendencia']
+
+    i_precio = lttb(t, close, puntos)
+    precio = _serie(t, {"close": close, "vwap": calc['vwap']}, i_precio)
+    rsi = _serie(t, {"rsi": calc['rsi']}, lttb(t, calc['rsi'], puntos))
+
+    offset = float(np.nanstd(close, ddof=1)) * 0.45
+    marcas = [{"t": int(t[i]), "y": float(close[i]) - offset, "tipo": "Div. Alcista ▲"} for i in calc['div_alc']]
+    marcas += [{"t": int(t[i]), "y": float(close[i]) + offset, "tipo": "Div. Bajista ▼"} for i in calc['div_baj']]
+    if calc['diamante']:
+        marcas.append({"t": int(t[-1]), "y": float(close[-1]), "tipo": "💎 Compresión Vol."})
+
+    niveles = {"poc": calc['poc'], "val": calc['val'], "vah": calc['vah']}
+    capas = []
+    if calc['val'] is not None:
+        capas.append({"data": {"name": "niveles"},
+                      "mark": {"type": "rect", "color": "red", "opacity": 0.07},
+                      "encoding": {"y": {"field": "val", "type": "quantitative"},
+                                   "y2": {"field": "vah"}}})
+    capas += [
+        _linea("precio", "close", "#9e9e9e", "Precio", 1.3, zoom=True),
+        _linea("precio", "vwap", "cyan", "VWAP", 1.6),
+        {"data": {"name": "niveles"},
+         "mark": {"type": "rule", "color": "red", "strokeWidth": 1.8, "opacity": 0.85},
+         "encoding": {"y": {"field": "poc", "type": "quantitative"},
+                      "tooltip": [{"field": "poc", "type": "quantitative", "title": "POC", "format": ",.2f"}]}},
+    ]
+    if marcas:
+        capas.append({
+            "data": {"name": "marcas"},
+            "mark": {"type": "point", "filled": True, "size": 110, "opacity": 1},
+            "encoding": {
+                "x": _eje_x(),
+                "y": {"field": "y", "type": "quantitative"},
+                "shape": {"field": "tipo", "type": "nominal",
+                          "scale": {"domain": ["Div. Alcista ▲", "Div. Bajista ▼", "💎 Compresión Vol."],
+                                    "range": ["triangle-up", "triangle-down", "diamond"]},
+                          "legend": {"title": None, "orient": "top"}},
+                "color": {"field": "tipo", "type": "nominal",
+                          "scale": {"domain": ["Div. Alcista ▲", "Div. Bajista ▼", "💎 Compresión Vol."],
+                                    "range": ["lime", "tomato", "#00d4ff"]},
+                          "legend": None},
+                "tooltip": [{"field": "tipo", "type": "nominal", "title": "señal"}, TOOLTIP_FECHA],
+            },
+        })
+
+    titulo = f"TF: {tf_label}  ·  {nombre}  ·  {tendencia}"
+    if es_diario:
+        titulo += "  (última vela: sesión en curso)"
+    spec = {
+        "$schema": ESQUEMA,
+        "title": {"text": titulo, "color": COLORES_TENDENCIA.get(tendencia, "gray"), "fontSize": 12},
+        "datasets": {"precio": precio, "rsi": rsi, "marcas": marcas, "niveles": [niveles]},
+        "vconcat": [
+            {"height": 260, "width": ancho, "layer": capas},
+            {
+                "height": 90, "width": ancho,
+                "layer": [
+                    _linea("rsi", "rsi", "#c77dff", "RSI(14)", 1.2, dominio=[0, 100]),
+                    {"data": {"values": [{"y": 70, "c": "tomato"}, {"y": 50, "c": "gray"}, {"y": 30, "c": "lime"}]},
+                     "mark": {"type": "rule", "strokeDash": [4, 3], "opacity": 0.6},
+                     "encoding": {"y": {"field": "y", "type": "quantitative"},
+                                  "color": {"field": "c", "type": "nominal", "scale": None}}},
+                ],
+            },
+        ],
+        "resolve": {"scale": {"x": "shared"}},
+    }
+    if historia is None or not len(historia) or _ms(historia.index[:1])[0] >= t[0]:
+        return spec
+    # Ventana y franja con ejes x independientes: la franja abarca toda la historia
+    franja, spec["datasets"]["historia"] = _franja_historia(historia, t[0], t[-1], puntos, ancho)
+    ventana = {"vconcat": spec.pop("vconcat"), "resolve": spec.pop("resolve")}
+    spec["vconcat"] = [ventana, franja]
+    spec["resolve"] = {"scale": {"x": "independent"}}
+    return spec
+
+
+def spec_arima(res, nombre_activo, puntos=PUNTOS):
+    """Precio reciente + predicción ARIMA con IC al 95% (res = modelos.calcular_arima)."""
+    hist = res['hist']
+    t_h = _ms(hist.index)
+    historia = _serie(t_h, {"precio": hist.values}, lttb(t_h, hist.values, puntos))
+    t_f = _ms(res['idx_fut'])
+    # El pronóstico arranca en la última vela real para que las líneas queden unidas
+    pronostico = _serie(np.r_[t_h[-1], t_f],
+                        {"mu": np.r_[hist.values[-1], res['mu']],
+                         "inf": np.r_[hist.values[-1], res['ci_inf']],
+                         "sup": np.r_[hist.values[-1], res['ci_sup']]},
+                        np.arange(len(t_f) + 1))
+    color = "#2e9e2e" if res['prediccion'] > res['ultimo_precio'] else "tomato"
+    return {
+        "$schema": ESQUEMA,
+        "title": {"text": f"ARIMA{res['orden']} — {nombre_activo}   {res['direccion']}  {res['cambio_pct']:+.2f}%",
+                  "color": color, "fontSize": 12},
+        "width": "container", "height": 260,
+        "datasets": {"historia": historia, "pronostico": pronostico},
+        "layer": [
+            {"data": {"name": "pronostico"},
+             "mark": {"type": "area", "color": "skyblue", "opacity": 0.35},
+             "encoding": {"x": _eje_x(), "y": {"field": "inf", "type": "quantitative"}, "y2": {"field": "sup"}}},
+            _linea("historia", "precio", "#9e9e9e", "Precio", zoom=True),
+            _linea("pronostico", "mu", "lime", "Predicción ARIMA", 2, [6, 3]),
+        ],
+    }
+
+
+def spec_garch(res, nombre_activo, puntos=PUNTOS):
+    """Volatilidad reciente + predicción GARCH con rango esperado (res = modelos.calcular_garch)."""
+    vol_hist = res['vol_hist']
+    t_h = _ms(vol_hist.index)
+    historia = _serie(t_h, {"vol": vol_hist.values}, lttb(t_h, vol_hist.values, puntos))
+    t_f = _ms(res['idx_fut'])
+    vol_pred = np.asarray(res['vol_pred'], dtype=float)
+    pronostico = _serie(t_f, {"vol": vol_pred, "inf": vol_pred * 0.5, "sup": vol_pred * 1.5},
+                        np.arange(len(t_f)))
+    nivel = res['nivel']
+    return {
+        "$schema": ESQUEMA,
+        "title": {"text": f"GARCH — {nombre_activo}   Volatilidad: {nivel}",
+                  "color": COLORES_NIVEL[nivel], "fontSize": 12},
+        "width": "container", "height": 260,
+        "datasets": {"historia": historia, "pronostico": pronostico},
+        "layer": [
+            {"data": {"name": "pronostico"},
+             "mark": {"type": "area", "color": "skyblue", "opacity": 0.35},
+             "encoding": {"x": _eje_x(), "y": {"field": "inf", "type": "quantitative"}, "y2": {"field": "sup"}}},
+            _linea("historia", "vol", "#9e9e9e", "Volatilidad (%)", zoom=True),
+            _linea("pronostico", "vol", "orange", "Predicción GARCH", 2, [6, 3]),
+        ],
+    }
@@ -0,0 +1,312 @@
+"""
+Indicadores incrementales: mismo VWAP, RSI, RVOL/rango (diamante), tendencia y
+divergencias que `indicadores.calcular_timeframe`, pero actualizados en O(1) por barra.
+Pensado para evaluar señales en cada tick sin recalcular el histórico completo:
+`SenalesIncrementales` los alimenta con las ventanas del motor multi-TF y la
+watchlist y el modo en vivo de la app leen de ahí las señales de la última vela.
+"""
+import threading
+from collections import deque
+
+import numpy as np
+
+from radar.datos import periodo_a_timedelta
+from radar.perfil import calcular_perfil
+from radar.resampleo import VENTANAS_RADAR
+
+# Velas mínimas de una ventana para tener señales (como calcular_timeframe)
+MIN_VELAS = 15
+
+
+class _Ventana:
+    """Ventana móvil de tamaño fijo con suma corriente de los valores no NaN (media en O(1))."""
+
+    def __init__(self, tam):
+        self.valores = deque(maxlen=tam)
+        self.suma = 0.0
+        self.validos = 0
+        self.no_ceros = 0   # con 0 no-ceros la suma es exactamente 0 (sin residuo flotante)
+        self._cambios = 0
+
+    def agregar(self, x):
+        if len(self.valores) == self.valores.maxlen:
+            self._descontar(self.valores[0])
+        self.valores.append(x)
+        if x == x:
+            self.suma += x
+            self.validos += 1
+            self.no_ceros += x != 0
+        # Cada `tam` altas la suma se rehace desde los valores: el error de sumar y restar no se acumula
+        self._cambios += 1
+        if self._cambios >= self.valores.maxlen:
+            self.suma = float(np.nansum(self.valores))
+            self._cambios = 0
+
+    def quitar_ultimo(self):
+        self._descontar(self.valores.pop())
+
+    def _descontar(self, x):
+        if x == x:
+            self.suma -= x
+            self.validos -= 1
+            self.no_ceros -= x != 0
+
+    @property
+    def llena(self):
+        return len(self.valores) == self.valores.maxlen
+
+    def media(self):
+        """Media de los valores no NaN (NaN si no hay ninguno)."""
+        if not self.validos:
+            return float('nan')
+        return (self.suma if self.no_ceros else 0.0) / self.validos
+
+
+class _VentanaVwap:
+    """
+    Sumas de precio·volumen y volumen de la ventana del VWAP: las últimas
+    `velas` barras (int), las de los últimos `periodo` ('60d', Timedelta) o
+    todas desde la primera (None).
+    """
+
+    def __init__(self, ventana=None):
+        self.velas = ventana if isinstance(ventana, int) else None
+        self.duracion = None if ventana is None or self.velas else periodo_a_timedelta(ventana).value
+        self.barras = deque()       # (ts, pv, vol) con NaN ya reemplazados por 0
+        self.suma_pv = self.suma_v = 0.0
+        self._cambios = 0
+
+    def __len__(self):
+        return len(self.barras)
+
+    def agregar(self, ts, pv, vol):
+        pv, vol = (pv if pv == pv else 0.0), (vol if vol == vol else 0.0)   # cumsum de pandas salta los NaN
+        self.barras.append((ts, pv, vol))
+        self.suma_pv += pv
+        self.suma_v += vol
+        while self.barras and ((self.velas is not None and len(self.barras) > self.velas)
+                               or (self.duracion is not None and self.barras[0][0] < ts - self.duracion)):
+            _, pv0, vol0 = self.barras.popleft()
+            self.suma_pv -= pv0
+            self.suma_v -= vol0
+        self._cambios += 1
+        if self._cambios >= max(len(self.barras), 64):
+            self.suma_pv = sum(b[1] for b in self.barras)
+            self.suma_v = sum(b[2] for b in self.barras)
+            self._cambios = 0
+
+    def quitar_ultimo(self):
+        _, pv, vol = self.barras.pop()
+        self.suma_pv -= pv
+        self.suma_v -= vol
+
+    def valor(self):
+        return self.suma_pv / self.suma_v if self.suma_v else float('nan')
+
+
+class IndicadoresIncrementales:
+    """
+    Estado de indicadores de un ticker/TF.
+    `actualizar` agrega una barra; si llega otra vez el timestamp de la última barra
+    (vela aún en formación) la revisa en lugar de agregarla. `ventana_vwap` es la
+    ventana del TF en el radar (resampleo.VENTANAS_RADAR): con ella `estado()` da
+    lo mismo que calcular_timeframe sobre esa ventana.
+    """
+
+    def __init__(self, periodo_rsi=14, ventana=20, lookback=5, ventana_vwap=None):
+        self.periodo_rsi = periodo_rsi
+        self.lookback = lookback
+        self.n = 0
+        self.ts = None                     # timestamp (int64 ns) de la última barra
+        self.div_alc, self.div_baj = deque(maxlen=2), deque(maxlen=2)   # índices de las últimas
+        self._cierre_previo = None         # cierre de la barra anterior a la última
+        self._ultima = None                # aportes de la última barra (para revisarla)
+        self._vwap      = _VentanaVwap(ventana_vwap)
+        self._ganancias = _Ventana(periodo_rsi)
+        self._perdidas  = _Ventana(periodo_rsi)
+        self._volumen   = _Ventana(ventana)
+        self._rango     = _Ventana(ventana)
+        self._hist      = deque(maxlen=lookback + 1)   # (cierre, rsi) de las últimas barras
+
+    @classmethod
+    def desde_barras(cls, barras, **kwargs):
+        """Inicializa el estado recorriendo un radar.barras.Barras (una sola vez, O(n))."""
+        motor = cls(**kwargs)
+        motor.agregar_barras(barras)
+        return motor
+
+    @classmethod
+    def desde_df(cls, df, **kwargs):
+        """Inicializa el estado recorriendo un DataFrame OHLCV."""
+        from radar.barras import Barras
+        return cls.desde_barras(Barras.desde_df(df), **kwargs)
+
+    def agregar_barras(self, barras, desde=0):
+        """Procesa las velas de `barras` desde la posición `desde`."""
+        t, x = barras.tiempos, barras.ohlcv.astype(float)
+        for i in range(desde, len(t)):
+            self.actualizar(int(t[i]), *x[:, i].tolist())
+
+    def actualizar(self, ts, open_, high, low, close, volume):
+        """Agrega (o revisa) una barra y retorna el estado de la última vela."""
+        if self.ts is not None:
+            if ts == self.ts:
+                self._deshacer_ultima()   # el cierre previo sigue siendo el de la barra anterior
+            elif ts > self.ts:
+                self._cierre_previo = self._ultima["close"]
+            else:
+                raise ValueError(f"Barra fuera de orden: {ts} < {self.ts}")
+        self._aplicar(ts, high, low, close, volume)
+        return self.estado()
+
+    def _aplicar(self, ts, high, low, close, volume):
+        i = self.n
+        vol = volume if volume != 0 else 1.0   # igual que Volume.replace(0, 1)
+        pv = close * vol
+        self._vwap.agregar(ts, pv, vol)
+
+        # Primera barra o cierre NaN: delta NaN -> ganancia/pérdida 0 (como delta.where(...) en pandas)
+        delta = float('nan') if self._cierre_previo is None else close - self._cierre_previo
+        self._ganancias.agregar(delta if delta > 0 else 0.0)
+        self._perdidas.agregar(-delta if delta < 0 else 0.0)
+        self._volumen.agregar(vol)
+        self._rango.agregar(high - low)
+
+        rsi = self._rsi()
+        self._hist.append((close, rsi))
+        if i >= self.lookback * 2 and len(self._hist) == self.lookback + 1:
+            p_prev, r_prev = self._hist[0]
+            if rsi == rsi and r_prev == r_prev:   # ambos no-NaN
+                if close > p_prev and rsi < r_prev and rsi > 60:
+                    self.div_baj.append(i)
+                if close < p_prev and rsi > r_prev and rsi < 40:
+                    self.div_alc.append(i)
+
+        self._ultima = {"close": close, "high": high, "low": low, "vol": vol, "rsi": rsi}
+        self.ts = ts
+        self.n = i + 1
+
+    def _deshacer_ultima(self):
+        i = self.n - 1
+        self._vwap.quitar_ultimo()
+        for v in (self._ganancias, self._perdidas, self._volumen, self._rango):
+            v.quitar_ultimo()
+        self._hist.pop()
+        if self.div_alc and self.div_alc[-1] == i:
+            self.div_alc.pop()
+        if self.div_baj and self.div_baj[-1] == i:
+            self.div_baj.pop()
+        self.n = i
+
+    def _rsi(self):
+        if not self._ganancias.llena:
+            return float('nan')
+        loss = self._perdidas.media()
+        if loss == 0:
+            return float('nan')
+        return 100 - (100 / (1 + self._ganancias.media() / loss))
+
+    def _hace(self, divergencias):
+        """
+        Velas desde la última divergencia, o None. Solo cuentan las que
+        calcular_timeframe ve en la ventana: RSI válido en la vela y `lookback` atrás.
+        """
+        if not divergencias:
+            return None
+        hace = self.n - 1 - divergencias[-1]
+        minimo = max(2 * self.lookback, self.periodo_rsi + self.lookback)
+        return hace if len(self._vwap) - 1 - hace >= minimo else None
+
+    def estado(self):
+        """Señales de la última vela (mismas reglas que calcular_timeframe)."""
+        if self.n == 0:
+            return None
+        u = self._ultima
+        vwap = self._vwap.valor()
+        rvol = u["vol"] / self._volumen.media()
+        rvol = 0.0 if rvol != rvol else rvol
+        rango = u["high"] - u["low"]
+        rango = 0.0 if rango != rango else rango
+        alc, baj = self._hace(self.div_alc), self._hace(self.div_baj)
+        return {
+            "cierre": u["close"],
+            "vwap": vwap,
+            "rsi": u["rsi"],
+            "rvol": rvol,
+            "rango": rango,
+            "rango_medio": self._rango.media(),
+            "diamante": bool(rvol > 2.0 and rango < self._rango.media()),
+            "tendencia": "COMPRA" if u["close"] > vwap else "VENTA",
+            "div_alcista": alc == 0,
+            "div_bajista": baj == 0,
+            "div_alcista_hace": alc,
+            "div_bajista_hace": baj,
+        }
+
+
+class SenalesIncrementales:
+    """
+    Señales de la última vela de cada TF del radar de un ticker. Hay un
+    IndicadoresIncrementales por TF, alimentado con las ventanas del motor
+    multi-TF (resampleo.timeframes_radar): cada llamada procesa solo las velas
+    nuevas y la revisión de la que está en formación. El POC / área de valor se
+    recalcula sobre la ventana (perfil vectorizado) solo en los TF que cambiaron.
+    """
+
+    def __init__(self, ventanas=None):
+        self.ventanas = dict(VENTANAS_RADAR if ventanas is None else ventanas)
+        self._indicadores = {}   # tf -> IndicadoresIncrementales
+        self._perfiles = {}      # tf -> (última vela, (poc, val, vah))
+        self._lock = threading.Lock()
+
+    def actualizar(self, timeframes):
+        """
+        `timeframes`: TF -> Barras de la ventana del radar. Retorna TF -> estado
+        de IndicadoresIncrementales más fecha, poc, val y vah (las claves de
+        scanner.resumen_timeframe), o None con menos de MIN_VELAS velas.
+        """
+        with self._lock:
+            return {tf: self._actualizar_tf(tf, barras) for tf, barras in timeframes.items()}
+
+    def _actualizar_tf(self, tf, barras):
+        if len(barras) < MIN_VELAS:
+            self._indicadores.pop(tf, None)
+            return None
+        t = barras.tiempos
+        ind = self._indicadores.get(tf)
+        k = 0 if ind is None else int(np.searchsorted(t, ind.ts))
+        if ind is None or k == len(t) or t[k] != ind.ts:
+            # Primera vez, o la última vela procesada ya no está en la ventana: se arma desde la ventana
+            ind = self._indicadores[tf] = IndicadoresIncrementales(ventana_vwap=self.ventanas.get(tf))
+            k = 0
+        ind.agregar_barras(barras, k)
+        estado = ind.estado()
+
+        ultima = (int(t[-1]), barras.ohlcv[:, -1].tobytes())
+        previo = self._perfiles.get(tf)
+        if previo is None or previo[0] != ultima:
+            perfil = calcular_perfil(barras, n_bins=50)
+            if perfil is None:
+                niveles = (float(np.nanmean(barras.close.astype(float))), None, None)
+            else:
+                niveles = (perfil["poc"], perfil["val"], perfil["vah"])
+            self._perfiles[tf] = previo = (ultima, niveles)
+        estado["poc"], estado["val"], estado["vah"] = previo[1]
+        estado["fecha"] = barras.fecha(-1)
+        estado["cierre"] = float(np.float64(barras.close[-1]))   # valor exacto del float32 del motor
+        return estado
+
+
+# Señales por ticker, compartidas por todo el proceso (como los motores de resampleo)
+_SENALES = {}
+_SENALES_LOCK = threading.Lock()
+
+
+def senales_de(ticker):
+    """SenalesIncrementales del ticker (se crean la primera vez)."""
+    with _SENALES_LOCK:
+        senales = _SENALES.get(ticker)
+        if senales is None:
+            senales = _SENALES[ticker] = SenalesIncrementales()
+        return senales
+
@@ -0,0 +1,173 @@
+"""
+Indicadores técnicos del TRIPLE RADAR: RSI, divergencias, resampleo,
+POC, VWAP y diamante. Solo NumPy/pandas: sin Streamlit ni matplotlib.
+"""
+import numpy as np
+import pandas as pd
+
+from radar.barras import Barras
+from radar.perfil import calcular_perfil
+
+
+def calcular_rsi(series, periodo=14):
+    """RSI estándar de Wilder (14 períodos)."""
+    delta = series.diff()
+    gain = delta.where(delta > 0, 0.0).rolling(window=periodo).mean()
+    loss = (-delta.where(delta < 0, 0.0)).rolling(window=periodo).mean()
+    rs = gain / loss.replace(0, np.nan)
+    return 100 - (100 / (1 + rs))
+
+
+def detectar_divergencias(precios, rsi, lookback=5, modo="offset"):
+    """
+    Detección algorítmica de divergencias RSI-Precio (vectorizada con NumPy).
+    Retorna índices de divergencias alcistas y bajistas.
+    - modo="offset":  compara cada barra con la barra `lookback` posiciones atrás.
+    - modo="pivotes": compara máximos/mínimos locales consecutivos (swing pivots de
+      ventana ±lookback); el índice devuelto es el del segundo pivote.
+    Umbrales: bajista con RSI > 60, alcista con RSI < 40.
+    """
+    p = np.asarray(precios, dtype=float)
+    r = np.asarray(rsi, dtype=float)
+    if modo == "pivotes":
+        return _divergencias_pivotes(p, r, lookback)
+    n = len(p)
+    if n <= lookback * 2:
+        return [], []
+    i = np.arange(lookback * 2, n)
+    p_curr, p_prev = p[i], p[i - lookback]
+    r_curr, r_prev = r[i], r[i - lookback]
+    validos = ~(np.isnan(r_curr) | np.isnan(r_prev))
+    # Divergencia bajista: precio HH, RSI LH (señal de agotamiento alcista)
+    bajistas = validos & (p_curr > p_prev) & (r_curr < r_prev) & (r_curr > 60)
+    # Divergencia alcista: precio LL, RSI HL (señal de agotamiento bajista)
+    alcistas = validos & (p_curr < p_prev) & (r_curr > r_prev) & (r_curr < 40)
+    return i[alcistas].tolist(), i[bajistas].tolist()
+
+
+def _divergencias_pivotes(p, r, ventana):
+    """Divergencias entre swing pivots consecutivos (máximos y mínimos locales)."""
+    n = len(p)
+    ancho = 2 * ventana + 1
+    if n < ancho:
+        return [], []
+    vistas = np.lib.stride_tricks.sliding_window_view(p, ancho)
+    centro = p[ventana:n - ventana]
+    idx = np.arange(ventana, n - ventana)
+    maximos = idx[centro >= np.nanmax(vistas, axis=1)]
+    minimos = idx[centro <= np.nanmin(vistas, axis=1)]
+
+    def comparar(piv, es_max):
+        if len(piv) < 2:
+            return []
+        a, b = piv[:-1], piv[1:]
+        validos = ~(np.isnan(r[a]) | np.isnan(r[b]))
+        if es_max:
+            senal = validos & (p[b] > p[a]) & (r[b] < r[a]) & (r[b] > 60)
+        else:
+            senal = validos & (p[b] < p[a]) & (r[b] > r[a]) & (r[b] < 40)
+        return b[senal].tolist()
+
+    return comparar(minimos, False), comparar(maximos, True)
+
+
+def resamplear_4h(df_1h):
+    """Resamplea OHLCV de 1H a 4H."""
+    if df_1h.empty:
+        return pd.DataFrame()
+    try:
+        df_4h = df_1h[['Open', 'High', 'Low', 'Close', 'Volume']].resample('4h').agg({
+            'Open':   'first',
+            'High':   'max',
+            'Low':    'min',
+            'Close':  'last',
+            'Volume': 'sum'
+        }).dropna(subset=['Close'])
+        return df_4h
+    except Exception:
+        return pd.DataFrame()
+
+
+def _media_final(x, n=20):
+    """Media de las últimas `n` posiciones ignorando NaN (rolling(n, min_periods=1) en la última vela)."""
+    x = x[-n:]
+    x = x[~np.isnan(x)]
+    return float(x.mean()) if len(x) else np.nan
+
+
+def calcular_timeframe(barras):
+    """
+    Parte numérica de un timeframe: POC + VWAP + RSI Divergence + Diamante + tendencia.
+    `barras` es un radar.barras.Barras (o un DataFrame OHLCV, que se convierte).
+    Retorna None si no hay datos suficientes; si no, un dict con las barras (sin
+    copiar), las columnas VWAP y RSI (float32, alineadas con las barras) y las
+    señales de la última vela.
+    """
+    if isinstance(barras, pd.DataFrame):
+        barras = Barras.desde_df(barras)
+    if barras is None or len(barras) < 15:
+        return None
+
+    close = barras.close.astype(float)
+
+    # ── POC + Área de valor (perfil de volumen High–Low) ─────────────────────
+    perfil = calcular_perfil(barras, n_bins=50)
+    if perfil is not None:
+        poc_price, val, vah = perfil['poc'], perfil['val'], perfil['vah']
+    else:
+        poc_price = float(np.nanmean(close))
+        val = vah = None
+
+    # ── VWAP ─────────────────────────────────────────────────────────────────
+    vol = barras.volume.astype(float)
+    vol[vol == 0] = 1.0
+    vwap = pd.Series(close * vol).cumsum() / pd.Series(vol).cumsum()
+    vwap = vwap.ffill().bfill().to_numpy()
+
+    # ── RSI + Divergencias ───────────────────────────────────────────────────
+    rsi = calcular_rsi(pd.Series(close), periodo=14).to_numpy()
+    div_alc, div_baj = detectar_divergencias(close, rsi, lookback=5)
+
+    # ── Diamante ─────────────────────────────────────────────────────────────
+    rango = barras.high.astype(float) - barras.low.astype(float)
+    rvol_v = vol[-1] / _media_final(vol)
+    rvol_v = 0 if np.isnan(rvol_v) else rvol_v
+    rng_v = 0 if np.isnan(rango[-1]) else rango[-1]
+    es_diamante = bool(rvol_v > 2.0 and rng_v < _media_final(rango))
+
+    # ── Tendencia (precio vs VWAP) ───────────────────────────────────────────
+    tendencia = "COMPRA" if close[-1] > vwap[-1] else "VENTA"
+
+    return {
+        "barras": barras,
+        "vwap": vwap.astype(np.float32),
+        "rsi": rsi.astype(np.float32),
+        "poc": poc_price,
+        "val": val,
+        "vah": vah,
+        "div_alc": div_alc,
+        "div_baj": div_baj,
+        "diamante": es_diamante,
+        "tendencia": tendencia,
+    }
+
+
+def calcular_consenso(tendencias):
+    """
+    Fuego Maestro: consenso de tendencias (precio vs VWAP) entre timeframes.
+    Retorna None con menos de 2 TF; si no, uno de "ALCISTA_TOTAL", "BAJISTA_TOTAL",
+    "ALCISTA_PARCIAL", "BAJISTA_PARCIAL" o "MIXTO".
+    """
+    if len(tendencias) < 2:
+        return None
+    compras = tendencias.count("COMPRA")
+    ventas  = tendencias.count("VENTA")
+    if compras == 3:
+        return "ALCISTA_TOTAL"
+    elif ventas == 3:
+        return "BAJISTA_TOTAL"
+    elif compras == 2:
+        return "ALCISTA_PARCIAL"
+    elif ventas == 2:
+        return "BAJISTA_PARCIAL"
+    return "MIXTO"
@@ -0,0 +1,132 @@
+"""
+Instrumentación del radar: tiempos por etapa (descarga, resampleo, ARIMA, GARCH,
+indicadores, render...) con etiquetas (ticker, tf...) y contadores (aciertos y
+fallos de caché). Se acumulan en un registro por proceso que se puede mostrar,
+exportar en formato Prometheus o volcar como logs JSON (logger "radar.metricas").
+"""
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+log = logging.getLogger("radar.metricas")
+
+# Eventos del rerun en curso (lista por hilo/contexto; None = sin traza)
+_TRAZA = contextvars.ContextVar("radar_traza", default=None)
+
+
+def _clave(nombre, etiquetas):
+    return nombre, tuple(sorted((k, str(v)) for k, v in etiquetas.items() if v is not None))
+
+
+def _etiquetas_prom(etiquetas):
+    if not etiquetas:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in etiquetas) + "}"
+
+
+class Metricas:
+    """Registro de tiempos por etapa y contadores, seguro entre hilos."""
+
+    def __init__(self):
+        self._tiempos = {}      # (etapa, etiquetas) -> [n, total_s, max_s, ultimo_s]
+        self._contadores = {}   # (nombre, etiquetas) -> n
+        self._lock = threading.Lock()
+
+    def observar(self, etapa, segundos, **etiquetas):
+        """Registra una duración ya medida (p. ej. la que devuelve un worker)."""
+        clave = _clave(etapa, etiquetas)
+        with self._lock:
+            t = self._tiempos.setdefault(clave, [0, 0.0, 0.0, 0.0])
+            t[0] += 1
+            t[1] += segundos
+            t[2] = max(t[2], segundos)
+            t[3] = segundos
+        traza = _TRAZA.get()
+        if traza is not None:
+            traza.append((etapa, dict(clave[1]), segundos))
+        if log.isEnabledFor(logging.INFO):
+            log.info(json.dumps({"etapa": etapa, "segundos": round(segundos, 6), **dict(clave[1])},
+                                ensure_ascii=False))
+
+    @contextmanager
+    def tramo(self, etapa, **etiquetas):
+        """Mide el bloque `with` como una observación de `etapa`."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(etapa, time.perf_counter() - t0, **etiquetas)
+
+    def contar(self, nombre, n=1, **etiquetas):
+        clave = _clave(nombre, etiquetas)
+        with self._lock:
+            self._contadores[clave] = self._contadores.get(clave, 0) + n
+
+    def nueva_traza(self):
+        """Empieza a guardar los eventos de este contexto (un rerun). Retorna la lista."""
+        traza = []
+        _TRAZA.set(traza)
+        return traza
+
+    def tiempos(self):
+        """Filas {etapa, etiquetas..., n, total_s, media_ms, max_ms, ultimo_ms}."""
+        with self._lock:
+            items = list(self._tiempos.items())
+        return [{"etapa": etapa, **dict(et), "n": n, "total_s": total,
+                 "media_ms": total / n * 1000, "max_ms": mx * 1000, "ultimo_ms": ult * 1000}
+                for (etapa, et), (n, total, mx, ult) in sorted(items)]
+
+    def contadores(self):
+        """Filas {contador, etiquetas..., n}."""
+        with self._lock:
+            items = list(self._contadores.items())
+        return [{"contador": nombre, **dict(et), "n": n} for (nombre, et), n in sorted(items)]
+
+    def prometheus(self, extra=None):
+        """
+        Texto en formato de exposición de Prometheus. `extra` agrega contadores
+        externos: {nombre: {etiqueta_resultado: valor}} (p. ej. los de las cachés).
+        """
+        with self._lock:
+            tiempos = sorted(self._tiempos.items())
+            contadores = sorted(self._contadores.items())
+        lineas = ["# TYPE radar_etapa_segundos summary"]
+        for (etapa, et), (n, total, _, _) in tiempos:
+            e = _etiquetas_prom((("etapa", etapa),) + et)
+            lineas.append(f"radar_etapa_segundos_sum{e} {total:.6f}")
+            lineas.append(f"radar_etapa_segundos_count{e} {n}")
+        lineas.append("# TYPE radar_etapa_segundos_max gauge")
+        for (etapa, et), (_, _, mx, _) in tiempos:
+            lineas.append(f"radar_etapa_segundos_max{_etiquetas_prom((('etapa', etapa),) + et)} {mx:.6f}")
+        lineas.append("# TYPE radar_eventos_total counter")
+        for (nombre, et), n in contadores:
+            lineas.append(f"radar_eventos_total{_etiquetas_prom((('evento', nombre),) + et)} {n}")
+        for nombre, valores in (extra or {}).items():
+            lineas.append(f"# TYPE radar_{nombre}_total counter")
+            for resultado, n in valores.items():
+                lineas.append(f'radar_{nombre}_total{{resultado="{resultado}"}} {n}')
+        return "\n".join(lineas) + "\n"
+
+    def exportar(self, ruta, extra=None):
+        """Escribe `prometheus()` en `ruta` de forma atómica (textfile collector de node_exporter)."""
+        tmp = f"{ruta}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.prometheus(extra))
+        os.replace(tmp, ruta)
+
+
+# Registro del proceso (lo comparten todas las sesiones de la app)
+METRICAS = Metricas()
+
+
+def resumen_traza(traza):
+    """Segundos por etapa de una traza, de mayor a menor: [(etapa, segundos, n)]."""
+    acum = {}
+    for etapa, _, segundos in traza:
+        s, n = acum.get(etapa, (0.0, 0))
+        acum[etapa] = (s + segundos, n + 1)
+    return sorted(((e, s, n) for e, (s, n) in acum.items()), key=lambda x: -x[1])
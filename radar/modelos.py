@@ -0,0 +1,317 @@
+"""
+Modelos cuantitativos del TRIPLE RADAR: ARIMA (ORDEN_ARIMA o el orden elegido)
+para precio y GARCH(1,1) para volatilidad. Solo cálculo (sin Streamlit ni matplotlib).
+Los ajustes se cachean por (modelo, ticker, TF) en CACHE_MODELOS, que vive
+mientras viva el proceso (el módulo no se re-ejecuta en cada rerun) y comparten
+las sesiones: se lee y escribe con CACHE_LOCK (los ajustes corren fuera del lock).
+El orden del ARIMA puede elegirse: d con tests de raíz unitaria (ADF/KPSS) y
+luego (p, q) por AIC/BIC con ese d fijo (los criterios de modelos con distinto d
+no son comparables); el orden elegido se cachea igual, por ticker y TF, y se
+re-busca cada tantas barras.
+"""
+import threading
+import warnings
+from importlib.util import find_spec
+
+import numpy as np
+import pandas as pd
+
+# Dependencias opcionales: se detectan al cargar y se importan en el primer ajuste,
+# para que importar el núcleo (p. ej. desde el scanner) sea rápido.
+ARIMA_DISPONIBLE = find_spec("statsmodels") is not None
+GARCH_DISPONIBLE = find_spec("arch") is not None
+
+# (modelo, (ticker, TF)) -> estado del último ajuste ('orden_arima': orden elegido)
+CACHE_MODELOS = {}
+CACHE_LOCK = threading.RLock()
+
+ORDEN_ARIMA = (2, 1, 2)     # orden fijo (sin búsqueda) y de respaldo
+VENTANA_ARIMA = 200         # velas sobre las que se ajusta el ARIMA
+
+
+def entradas_de(cache, ticker):
+    """Subconjunto de la caché de modelos que corresponde a un ticker."""
+    with CACHE_LOCK:
+        return {k: v for k, v in cache.items() if k[1][0] == ticker}
+
+
+def actualizar_cache(cache, entradas):
+    """Incorpora a `cache` las entradas que devolvió un worker."""
+    with CACHE_LOCK:
+        cache.update(entradas)
+
+
+def pronosticar_arima(s, periodos=10, clave=None, refit_cada=24, cache=None, orden=ORDEN_ARIMA):
+    """
+    Pronóstico ARIMA(`orden`) con caché del ajuste por `clave` (ticker, TF).
+    - Misma última barra (timestamp y valor): se devuelve el pronóstico guardado.
+    - Barras nuevas: se extiende el estado filtrado con los parámetros ya estimados
+      (sin MLE) hasta acumular `refit_cada` barras; entonces se re-estima con
+      arranque en caliente desde los parámetros previos.
+    - Orden distinto al del ajuste guardado: se ajusta desde cero.
+    La entrada guarda en 'modo' cómo se obtuvo el último pronóstico: cache / filtro / ajuste.
+    Retorna (media, ic_inferior, ic_superior) como arrays de longitud `periodos`.
+    """
+    if clave is None:
+        cache = {}
+    elif cache is None:
+        cache = CACHE_MODELOS
+    ck = ('arima', clave)
+    ultimo, ultimo_valor = s.index[-1], float(s.iloc[-1])
+    with CACHE_LOCK:
+        entrada = cache.get(ck)
+        if entrada is not None and entrada.get('orden', ORDEN_ARIMA) != orden:
+            entrada = None
+        if (entrada is not None and entrada['ultimo'] == ultimo
+                and entrada['ultimo_valor'] == ultimo_valor and entrada['periodos'] == periodos):
+            entrada['modo'] = 'cache'
+            return entrada['pronostico']
+
+    from statsmodels.tsa.arima.model import ARIMA
+    with warnings.catch_warnings():
+        # statsmodels avisa en cada ajuste (frecuencia inferida, arranque, convergencia)
+        warnings.simplefilter('ignore')
+        # Se ajusta sobre los valores: las velas intradía tienen huecos (fines de semana,
+        # pausas) y statsmodels no pronostica fuera de muestra con un índice de fechas irregular
+        modelo = ARIMA(s.to_numpy(), order=orden)
+        modo = 'ajuste'
+        if entrada is None:
+            fit, desde_ajuste = modelo.fit(), 0
+        else:
+            nuevas = int((s.index > entrada['ultimo']).sum())
+            desde_ajuste = entrada['desde_ajuste'] + nuevas
+            if desde_ajuste < refit_cada:
+                fit, modo = modelo.filter(entrada['params']), 'filtro'
+            else:
+                fit, desde_ajuste = modelo.fit(start_params=entrada['params']), 0
+        fc = fit.get_forecast(steps=periodos)
+
+    ci = np.asarray(fc.conf_int(alpha=0.05))
+    pronostico = (np.asarray(fc.predicted_mean), ci[:, 0], ci[:, 1])
+    with CACHE_LOCK:
+        cache[ck] = {
+            'ultimo': ultimo, 'ultimo_valor': ultimo_valor, 'periodos': periodos,
+            'params': np.asarray(fit.params), 'desde_ajuste': desde_ajuste, 'modo': modo,
+            'orden': orden, 'pronostico': pronostico,
+        }
+    return pronostico
+
+
+def orden_diferencia(valores, d_max=1, alfa=0.05):
+    """
+    d de la búsqueda automática: se diferencia mientras la serie no sea
+    estacionaria (ADF no rechaza la raíz unitaria o KPSS rechaza la
+    estacionariedad, al nivel `alfa`), hasta `d_max`.
+    """
+    from statsmodels.tsa.stattools import adfuller, kpss
+    x = np.asarray(valores, dtype=float)
+    for d in range(d_max):
+        with warnings.catch_warnings():
+            # KPSS avisa cuando el p-valor cae fuera de su tabla (se usa el extremo)
+            warnings.simplefilter('ignore')
+            try:
+                estacionaria = adfuller(x)[1] < alfa and kpss(x, nlags="auto")[1] >= alfa
+            except (ValueError, np.linalg.LinAlgError):
+                estacionaria = True     # serie constante o degenerada: no se diferencia más
+        if estacionaria:
+            return d
+        x = np.diff(x)
+    return d_max
+
+
+def grilla_ordenes(d=1, p_max=3, q_max=3):
+    """Órdenes (p, d, q) candidatos de la búsqueda automática, con `d` ya elegido."""
+    return [(p, d, q) for p in range(p_max + 1) for q in range(q_max + 1)]
+
+
+def ajustar_candidato(valores, orden, criterio="aic", maxiter=50):
+    """
+    Criterio (AIC o BIC) de un ARIMA(`orden`) sobre `valores`. Retorna None si el
+    ajuste falla o no converge en `maxiter` iteraciones: el candidato se poda sin
+    gastar más tiempo en él. Función de módulo para poder enviarla a un worker.
+    """
+    from statsmodels.tsa.arima.model import ARIMA
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        try:
+            fit = ARIMA(valores, order=orden).fit(method_kwargs={"maxiter": maxiter})
+        except Exception:
+            return None
+    if not fit.mle_retvals.get('converged', True):
+        return None
+    valor = float(getattr(fit, criterio))
+    return valor if np.isfinite(valor) else None
+
+
+def mejor_orden(valores_por_orden):
+    """(orden, criterio) del menor criterio; (ORDEN_ARIMA, None) si se podaron todos."""
+    validos = {o: v for o, v in valores_por_orden.items() if v is not None}
+    if not validos:
+        return ORDEN_ARIMA, None
+    orden = min(validos, key=validos.get)
+    return orden, validos[orden]
+
+
+def seleccionar_orden(valores, ordenes=None, criterio="aic", pool=None):
+    """
+    Mejor orden por `criterio` (por defecto la grilla con el d de orden_diferencia);
+    los candidatos se ajustan en `pool` si hay.
+    """
+    ordenes = grilla_ordenes(orden_diferencia(valores)) if ordenes is None else ordenes
+    if pool is None:
+        return mejor_orden({o: ajustar_candidato(valores, o, criterio) for o in ordenes})
+    futuros = {o: pool.submit(ajustar_candidato, valores, o, criterio) for o in ordenes}
+    return mejor_orden({o: f.result() for o, f in futuros.items()})
+
+
+def busqueda_pendiente(s, clave, cache, buscar_cada):
+    """True si el orden de `clave` no se buscó nunca o ya pasaron `buscar_cada` barras."""
+    with CACHE_LOCK:
+        entrada = cache.get(('orden_arima', clave))
+    return entrada is None or int((s.index > entrada['ultimo']).sum()) >= buscar_cada
+
+
+def guardar_orden(cache, clave, s, orden, valor, criterio):
+    """Registra el orden elegido para `clave` con la última barra de la búsqueda."""
+    with CACHE_LOCK:
+        cache[('orden_arima', clave)] = {'orden': orden, 'valor': valor, 'criterio': criterio,
+                                         'ultimo': s.index[-1]}
+
+
+def orden_de(cache, clave):
+    """Orden elegido para `clave` (ORDEN_ARIMA si no hubo búsqueda)."""
+    entrada = (cache or {}).get(('orden_arima', clave))
+    return ORDEN_ARIMA if entrada is None else entrada['orden']
+
+
+def serie_arima(precios):
+    """Serie sobre la que se ajusta el ARIMA (últimas VENTANA_ARIMA velas)."""
+    return precios.dropna().astype(float).tail(VENTANA_ARIMA)
+
+
+def calcular_arima(precios, periodos=10, clave=None, refit_cada=24, cache=None,
+                   buscar_cada=None, criterio="aic"):
+    """
+    ARIMA: predicción de precio con IC al 95%.
+    Orden fijo ORDEN_ARIMA, o con `buscar_cada` el d de orden_diferencia y el mejor
+    (p, q) por `criterio` ('aic' / 'bic'), re-buscado cada `buscar_cada` barras (aquí en serie; el
+    cálculo por lotes de radar.paralelo reparte la búsqueda en el pool).
+    Retorna None si el modelo no está disponible o faltan datos; si no, un dict
+    con la serie reciente, el pronóstico, el orden y el resumen (dirección y cambio %).
+    """
+    if not ARIMA_DISPONIBLE:
+        return None
+    s = serie_arima(precios)
+    if len(s) < 50:
+        return None
+    orden = ORDEN_ARIMA
+    if buscar_cada:
+        if cache is None:
+            cache = CACHE_MODELOS if clave is not None else {}
+        if busqueda_pendiente(s, clave, cache, buscar_cada):
+            guardar_orden(cache, clave, s, *seleccionar_orden(s.to_numpy(), criterio=criterio),
+                          criterio=criterio)
+        orden = orden_de(cache, clave)
+    mu, ci_inf, ci_sup = pronosticar_arima(s, periodos, clave=clave,
+                                           refit_cada=refit_cada, cache=cache, orden=orden)
+    freq = pd.infer_freq(s.index[-20:]) or 'h'
+    idx_fut = pd.date_range(start=s.index[-1], periods=periodos + 1, freq=freq)[1:]
+
+    p0 = float(s.iloc[-1])
+    pf = float(mu[-1])
+    return {
+        "hist": s.tail(50), "idx_fut": idx_fut,
+        "mu": mu, "ci_inf": ci_inf, "ci_sup": ci_sup, "orden": orden,
+        "prediccion": pf, "ultimo_precio": p0,
+        "cambio_pct": (pf - p0) / p0 * 100,
+        "direccion": "▲ SUBE" if pf > p0 else "▼ BAJA",
+    }
+
+
+def pronosticar_garch(ret, periodos=10, clave=None, refit_cada=24, cache=None):
+    """
+    Pronóstico de volatilidad GARCH(1,1) con caché de parámetros por `clave` (ticker, TF).
+    - Sin retorno nuevo (mismo timestamp y valor): se devuelve el pronóstico guardado.
+    - Retornos nuevos: se fijan omega/alpha/beta ya estimados y se pronostica sin
+      re-estimar, hasta acumular `refit_cada` barras; entonces se re-estima usando
+      los parámetros previos como valores iniciales.
+    Retorna el array de volatilidad pronosticada (%) de longitud `periodos`.
+    """
+    if clave is None:
+        cache = {}
+    elif cache is None:
+        cache = CACHE_MODELOS
+    ck = ('garch', clave)
+    ultimo, ultimo_valor = ret.index[-1], float(ret.iloc[-1])
+    with CACHE_LOCK:
+        entrada = cache.get(ck)
+        if (entrada is not None and entrada['ultimo'] == ultimo
+                and entrada['ultimo_valor'] == ultimo_valor and entrada['periodos'] == periodos):
+            entrada['modo'] = 'cache'
+            return entrada['pronostico']
+
+    from arch import arch_model
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        modelo = arch_model(ret, vol='Garch', p=1, q=1, mean='Zero', rescale=False)
+        modo = 'ajuste'
+        if entrada is None:
+            fit, desde_ajuste = modelo.fit(disp='off', show_warning=False), 0
+        else:
+            nuevas = int((ret.index > entrada['ultimo']).sum())
+            desde_ajuste = entrada['desde_ajuste'] + nuevas
+            if desde_ajuste < refit_cada:
+                fit, modo = modelo.fix(entrada['params']), 'filtro'
+            else:
+                fit = modelo.fit(starting_values=entrada['params'], disp='off', show_warning=False)
+                desde_ajuste = 0
+        fc = fit.forecast(horizon=periodos)
+
+    vol_pred = np.sqrt(fc.variance.values[-1, :])
+    with CACHE_LOCK:
+        cache[ck] = {
+            'ultimo': ultimo, 'ultimo_valor': ultimo_valor, 'periodos': periodos,
+            'params': np.asarray(fit.params), 'desde_ajuste': desde_ajuste, 'modo': modo,
+            'pronostico': vol_pred,
+        }
+    return vol_pred
+
+
+def nivel_volatilidad(ratio):
+    """Régimen de volatilidad según vol. pronosticada / vol. media."""
+    if ratio > 1.5:
+        return "MUY ALTA ⚠️"
+    elif ratio > 1.0:
+        return "ALTA"
+    elif ratio > 0.5:
+        return "NORMAL"
+    return "BAJA"
+
+
+def calcular_garch(precios, periodos=10, clave=None, refit_cada=24, cache=None):
+    """
+    GARCH(1,1): predicción de volatilidad condicional.
+    Retorna None si el modelo no está disponible o faltan datos; si no, un dict
+    con la volatilidad histórica, el pronóstico y el régimen (nivel).
+    """
+    if not GARCH_DISPONIBLE:
+        return None
+    s = precios.dropna().astype(float)
+    if len(s) < 100:
+        return None
+    ret = s.pct_change().dropna() * 100
+    ret = ret.tail(200)
+    vol_pred = pronosticar_garch(ret, periodos, clave=clave,
+                                 refit_cada=refit_cada, cache=cache)
+    vol_hist = ret.rolling(5).std().tail(50)
+    freq = pd.infer_freq(ret.index[-20:]) or 'h'
+    idx_fut = pd.date_range(start=vol_hist.index[-1], periods=periodos + 1, freq=freq)[1:]
+
+    vol_media  = float(ret.std())
+    vol_futura = float(np.mean(vol_pred))
+    ratio = vol_futura / vol_media if vol_media > 0 else 1
+    return {
+        "vol_hist": vol_hist, "idx_fut": idx_fut, "vol_pred": vol_pred,
+        "volatilidad_futura": vol_futura, "vol_media": vol_media,
+        "ratio": ratio, "nivel": nivel_volatilidad(ratio),
+    }
@@ -0,0 +1,209 @@
+"""
+Cálculo por activo en paralelo (pool de procesos).
+Todo el trabajo numérico de un activo — ARIMA, GARCH e indicadores por TF —
+corre en un worker; el render (matplotlib/Streamlit) queda en el proceso principal.
+"""
+import multiprocessing as mp
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from radar import modelos
+from radar.indicadores import calcular_consenso, calcular_timeframe
+from radar.metricas import METRICAS
+
+
+def calcular_activo(ticker, df_1h, timeframes, cache=None, arima_refit_cada=24, garch_refit_cada=24,
+                    con_modelos=True, arima_buscar_cada=None, arima_criterio="aic"):
+    """
+    Trabajo numérico completo de un activo, sin render.
+    `df_1h` es el feed base (modelos) y `timeframes` el dict TF -> Barras ya
+    construido por el motor multi-timeframe (resampleo.timeframes_radar).
+    `cache` son las entradas de CACHE_MODELOS del ticker; el worker las actualiza
+    y las devuelve para que el proceso principal las conserve entre reruns.
+    Con `con_modelos=False` se omiten ARIMA/GARCH (solo indicadores).
+    Con `arima_buscar_cada` el orden del ARIMA se elige por `arima_criterio`
+    (ver modelos.calcular_arima) y se cachea con el resto de las entradas.
+    Los tiempos por etapa viajan en el resultado (el worker no ve las métricas del proceso principal).
+    Retorna (resultado, cache).
+    """
+    cache = {} if cache is None else cache
+    res = {
+        "ticker": ticker,
+        "modelos": con_modelos and not df_1h.empty and len(df_1h) > 100,
+        "arima": None,
+        "garch": None,
+        "errores": {},
+        "timeframes": {},
+        "tiempos": [],      # [(etapa, segundos, etiquetas)] medidos en el worker
+        "modos": {},        # modelo -> cache / filtro / ajuste
+    }
+    if res["modelos"]:
+        t0 = time.perf_counter()
+        try:
+            res["arima"] = modelos.calcular_arima(df_1h['Close'], clave=(ticker, "1H"),
+                                                  refit_cada=arima_refit_cada, cache=cache,
+                                                  buscar_cada=arima_buscar_cada, criterio=arima_criterio)
+        except Exception as e:
+            res["errores"]["ARIMA"] = str(e)
+        t1 = time.perf_counter()
+        try:
+            res["garch"] = modelos.calcular_garch(df_1h['Close'], clave=(ticker, "1H"),
+                                                  refit_cada=garch_refit_cada, cache=cache)
+        except Exception as e:
+            res["errores"]["GARCH"] = str(e)
+        t2 = time.perf_counter()
+        res["tiempos"] += [("arima", t1 - t0, {"tf": "1H"}), ("garch", t2 - t1, {"tf": "1H"})]
+        for m in ("arima", "garch"):
+            res["modos"][m] = cache.get((m, (ticker, "1H")), {}).get("modo")
+
+    for tf, df_tf in timeframes.items():
+        t0 = time.perf_counter()
+        res["timeframes"][tf] = calcular_timeframe(df_tf)
+        res["tiempos"].append(("indicadores", time.perf_counter() - t0, {"tf": tf}))
+    res["consenso"] = calcular_consenso([c["tendencia"] for c in res["timeframes"].values()
+                                         if c is not None])
+    return res, cache
+
+
+def crear_pool(workers):
+    """Pool de procesos para `calcular_activos`; None (ejecución en línea) si workers <= 1."""
+    if workers <= 1:
+        return None
+    # spawn: el servidor de Streamlit tiene hilos vivos y fork no es seguro con ellos
+    return ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn"))
+
+
+def clave_activo(ticker, df_1h, **kwargs):
+    """
+    Clave de un resultado: ticker + última barra base (timestamp y OHLCV) + configuración.
+    NaN pasa a None (NaN != NaN: un Volume vacío en la vela en formación haría fallar siempre la caché).
+    """
+    ultima = None
+    if not df_1h.empty:
+        valores = tuple(None if v != v else v for v in df_1h.iloc[-1].tolist())
+        ultima = (df_1h.index[-1], valores)
+    return ticker, ultima, tuple(sorted(kwargs.items()))
+
+
+def calcular_activos(tareas, pool=None, compartido=None, timeout=None, **kwargs):
+    """
+    Calcula varios activos, en paralelo si hay `pool`.
+    `tareas`: iterable de (ticker, df_1h, timeframes).
+    Con `compartido` (ResultadosCompartidos) se reutilizan resultados de otras
+    sesiones y, si otra sesión ya está calculando el mismo activo, se espera
+    su resultado (hasta `timeout` s) en lugar de repetir el cálculo.
+    Retorna {ticker: resultado}; si un activo falla, su valor es la excepción.
+    """
+    tareas = list(tareas)
+    if compartido is None:
+        return _calcular_lote(tareas, pool, **kwargs)
+
+    resultados, esperas, propias = {}, {}, {}
+    for tarea in tareas:
+        ticker = tarea[0]
+        clave = clave_activo(ticker, tarea[1], **kwargs)
+        estado, x = compartido.reservar(clave)
+        if estado == "hecho":
+            resultados[ticker] = x
+        elif estado == "esperar":
+            esperas[ticker] = x
+        else:
+            propias[ticker] = (tarea, clave)
+
+    calculados = {}
+    try:
+        calculados = _calcular_lote([t for t, _ in propias.values()], pool, **kwargs)
+    finally:
+        # Siempre se libera la reserva: quien espera recibe el resultado o el error
+        for ticker, (_, clave) in propias.items():
+            res = calculados.get(ticker)
+            if res is None or isinstance(res, Exception):
+                compartido.fallar(clave, res or RuntimeError(f"Cálculo de {ticker} interrumpido"))
+            else:
+                compartido.completar(clave, res)
+    resultados.update(calculados)
+
+    for ticker, futuro in esperas.items():
+        try:
+            resultados[ticker] = futuro.result(timeout=timeout)
+        except Exception as e:
+            resultados[ticker] = e
+    return resultados
+
+
+def _buscar_ordenes(tareas, pool, cache, buscar_cada, criterio="aic"):
+    """
+    Búsqueda del orden ARIMA de los activos que la tienen vencida: el d de cada
+    activo sale del test de raíz unitaria y todos los pares (activo, candidato
+    con ese d) van juntos al pool y el ganador de cada activo
+    queda en `cache`, así el worker que calcula el activo ya no busca.
+    """
+    series = {}
+    for ticker, df_1h, _ in tareas:
+        s = modelos.serie_arima(df_1h['Close'])
+        if len(s) >= 50 and modelos.busqueda_pendiente(s, (ticker, "1H"), cache, buscar_cada):
+            series[ticker] = s
+    if not series:
+        return
+    with METRICAS.tramo("orden_arima"):
+        ordenes = {t: modelos.grilla_ordenes(modelos.orden_diferencia(s.to_numpy()))
+                   for t, s in series.items()}
+        futuros = {(t, o): pool.submit(modelos.ajustar_candidato, s.to_numpy(), o, criterio)
+                   for t, s in series.items() for o in ordenes[t]}
+        for ticker, s in series.items():
+            try:
+                valores = {o: futuros[(ticker, o)].result() for o in ordenes[ticker]}
+            except Exception:
+                continue    # pool caído: el activo busca en serie dentro de calcular_activo
+            modelos.guardar_orden(cache, (ticker, "1H"), s, *modelos.mejor_orden(valores), criterio=criterio)
+            METRICAS.contar("busqueda_orden", ticker=ticker)
+
+
+def _calcular_lote(tareas, pool=None, **kwargs):
+    cache = modelos.CACHE_MODELOS
+    resultados = {}
+    if pool is not None:
+        futuros, pendientes = {}, []
+        con_modelos = kwargs.get("con_modelos", True)
+        if con_modelos and kwargs.get("arima_buscar_cada") and modelos.ARIMA_DISPONIBLE:
+            try:
+                _buscar_ordenes(tareas, pool, cache, kwargs["arima_buscar_cada"],
+                                kwargs.get("arima_criterio", "aic"))
+            except (BrokenProcessPool, RuntimeError):
+                pass
+        for ticker, df_1h, timeframes in tareas:
+            try:
+                # Sin modelos el worker no usa el feed base: no se serializa entero
+                base = df_1h if con_modelos else df_1h.iloc[-1:]
+                futuros[ticker] = pool.submit(calcular_activo, ticker, base, timeframes,
+                                              modelos.entradas_de(cache, ticker), **kwargs)
+            except (BrokenProcessPool, RuntimeError):
+                pendientes.append(ticker)
+        for ticker, futuro in futuros.items():
+            try:
+                res, cache_activo = futuro.result()
+                modelos.actualizar_cache(cache, cache_activo)
+                resultados[ticker] = res
+            except BrokenProcessPool:
+                pendientes.append(ticker)
+            except Exception as e:
+                resultados[ticker] = e
+        # Pool caído (worker muerto): esos activos se calculan en este proceso
+        tareas = [t for t in tareas if t[0] in pendientes]
+
+    for ticker, df_1h, timeframes in tareas:
+        try:
+            resultados[ticker], _ = calcular_activo(ticker, df_1h, timeframes, cache, **kwargs)
+        except Exception as e:
+            resultados[ticker] = e
+
+    for ticker, res in resultados.items():
+        if isinstance(res, Exception):
+            METRICAS.contar("error_calculo", ticker=ticker)
+            continue
+        for etapa, segundos, etiquetas in res["tiempos"]:
+            METRICAS.observar(etapa, segundos, ticker=ticker, **etiquetas)
+        for modelo, modo in res["modos"].items():
+            METRICAS.contar("modelo", modelo=modelo, modo=modo)
+    return resultados
@@ -0,0 +1,172 @@
+"""
+Perfil de volumen (volume-at-price) para el POC y el área de valor.
+El volumen de cada vela se reparte uniformemente entre su Low y su High sobre
+una grilla de precios de paso fijo (k·paso), en vez de asignarlo entero al cierre.
+"""
+import numpy as np
+
+
+def _bin_inicial(precio, paso):
+    return int(np.floor(precio / paso))
+
+
+def perfil_volumen(high, low, volume, paso=None, n_bins=50):
+    """
+    Histograma de volumen por precio, vectorizado (O((n + bins)·log n)).
+    `paso` es el tamaño de cada nivel de precio (tick); si es None se usa
+    (máximo High − mínimo Low) / n_bins.
+    Retorna (bordes, volumen): len(bordes) == len(volumen) + 1.
+    """
+    h = np.asarray(high, dtype=float)
+    l = np.asarray(low, dtype=float)
+    v = np.asarray(volume, dtype=float)
+    ok = ~(np.isnan(h) | np.isnan(l) | np.isnan(v)) & (v > 0)
+    h, l, v = h[ok], l[ok], v[ok]
+    if len(v) == 0:
+        return np.array([]), np.array([])
+    h, l = np.maximum(h, l), np.minimum(h, l)
+    lo, hi = float(l.min()), float(h.max())
+    if paso is None:
+        paso = (hi - lo) / n_bins if hi > lo else 1.0
+    k0 = _bin_inicial(lo, paso)
+    k1 = _bin_inicial(hi, paso)
+    bordes = np.arange(k0, k1 + 2) * paso
+    # Se trabaja relativo al primer borde para no perder precisión con precios altos
+    origen = bordes[0]
+    e, l_r, h_r = bordes - origen, l - origen, h - origen
+
+    vol = np.zeros(len(bordes) - 1)
+    planas = h_r <= l_r
+    if planas.any():
+        idx = np.minimum(((l_r[planas]) // paso).astype(int), len(vol) - 1)
+        vol += np.bincount(idx, weights=v[planas], minlength=len(vol))
+
+    con_rango = ~planas
+    if con_rango.any():
+        # Volumen acumulado bajo cada borde: G(e) = Σ w·(clip(e, l, h) − l), w = v / (h − l)
+        lr, hr = l_r[con_rango], h_r[con_rango]
+        w = v[con_rango] / (hr - lr)
+
+        def _parcial(x):
+            orden = np.argsort(x)
+            xs, ws = x[orden], w[orden]
+            W = np.concatenate(([0.0], np.cumsum(ws)))
+            S = np.concatenate(([0.0], np.cumsum(ws * xs)))
+            k = np.searchsorted(xs, e, side='right')
+            return e * W[k] - S[k]
+
+        G = _parcial(lr) - _parcial(hr)
+        vol += np.maximum(np.diff(G), 0.0)
+    return bordes, vol
+
+
+def area_de_valor(bordes, volumen, pct=0.70):
+    """
+    POC y área de valor: desde el nivel de mayor volumen se agrega el vecino
+    (arriba o abajo) con más volumen hasta cubrir `pct` del total.
+    Retorna (poc, val, vah) o None si el perfil está vacío.
+    """
+    total = float(volumen.sum()) if len(volumen) else 0.0
+    if total <= 0:
+        return None
+    i_poc = int(np.argmax(volumen))
+    lo = hi = i_poc
+    acum = float(volumen[i_poc])
+    ultimo = len(volumen) - 1
+    while acum < pct * total and (lo > 0 or hi < ultimo):
+        abajo  = volumen[lo - 1] if lo > 0 else -1.0
+        arriba = volumen[hi + 1] if hi < ultimo else -1.0
+        if arriba >= abajo:
+            hi += 1
+            acum += arriba
+        else:
+            lo -= 1
+            acum += abajo
+    poc = float((bordes[i_poc] + bordes[i_poc + 1]) / 2)
+    return poc, float(bordes[lo]), float(bordes[hi + 1])
+
+
+def calcular_perfil(df, paso=None, n_bins=50, pct=0.70):
+    """Perfil de volumen de un DataFrame OHLCV (o Barras): dict con poc, val, vah, bordes y volumen."""
+    bordes, vol = perfil_volumen(df['High'], df['Low'], df['Volume'], paso=paso, n_bins=n_bins)
+    area = area_de_valor(bordes, vol, pct)
+    if area is None:
+        return None
+    poc, val, vah = area
+    return {"poc": poc, "val": val, "vah": vah, "bordes": bordes, "volumen": vol}
+
+
+class PerfilVolumen:
+    """
+    Perfil de volumen incremental sobre una grilla fija de paso `paso`.
+    `agregar`/`quitar` cuestan O(niveles que toca la vela), así que sirve para
+    ventanas de sesión (se agregan velas nuevas y se quitan las que salen) y
+    para perfiles compuestos de historias largas.
+    """
+
+    def __init__(self, paso):
+        self.paso = float(paso)
+        self._k0 = None                 # índice de grilla del primer nivel almacenado
+        self._vol = np.zeros(0)
+
+    def _reparto(self, high, low, volume):
+        """(primer nivel, volumen por nivel) de una vela."""
+        high, low = max(high, low), min(high, low)
+        k0 = _bin_inicial(low, self.paso)
+        if high <= low:
+            return k0, np.array([float(volume)])
+        k1 = _bin_inicial(high, self.paso)
+        bordes = np.arange(k0, k1 + 2) * self.paso
+        frac = np.diff(np.clip(bordes, low, high)) / (high - low)
+        return k0, frac * volume
+
+    def _asegurar(self, k0, k1):
+        if self._k0 is None:
+            self._k0, self._vol = k0, np.zeros(k1 - k0 + 1)
+            return
+        izq = max(0, self._k0 - k0)
+        der = max(0, k1 - (self._k0 + len(self._vol) - 1))
+        if izq or der:
+            self._vol = np.concatenate((np.zeros(izq), self._vol, np.zeros(der)))
+            self._k0 -= izq
+
+    def _sumar(self, high, low, volume, signo):
+        if not volume or volume != volume:
+            return
+        k0, reparto = self._reparto(high, low, volume)
+        self._asegurar(k0, k0 + len(reparto) - 1)
+        i = k0 - self._k0
+        self._vol[i:i + len(reparto)] += signo * reparto
+
+    def agregar(self, high, low, volume):
+        self._sumar(high, low, volume, 1.0)
+
+    def quitar(self, high, low, volume):
+        self._sumar(high, low, volume, -1.0)
+
+    def _sumar_df(self, df, signo):
+        """Todas las velas de un bloque de una vez (perfil_volumen sobre la misma grilla)."""
+        bordes, vol = perfil_volumen(df['High'], df['Low'], df['Volume'], paso=self.paso)
+        if not len(vol):
+            return
+        k0 = int(round(bordes[0] / self.paso))
+        self._asegurar(k0, k0 + len(vol) - 1)
+        i = k0 - self._k0
+        self._vol[i:i + len(vol)] += signo * vol
+
+    def agregar_df(self, df):
+        self._sumar_df(df, 1.0)
+
+    def quitar_df(self, df):
+        self._sumar_df(df, -1.0)
+
+    def perfil(self):
+        """(bordes, volumen) del estado actual."""
+        if self._k0 is None:
+            return np.array([]), np.array([])
+        vol = np.maximum(self._vol, 0.0)   # residuos negativos de agregar/quitar
+        return np.arange(self._k0, self._k0 + len(vol) + 1) * self.paso, vol
+
+    def resultado(self, pct=0.70):
+        """(poc, val, vah) del estado actual, o None si no hay volumen."""
+        return area_de_valor(*self.perfil(), pct=pct)
@@ -0,0 +1,92 @@
+"""
+Proveedores de barras OHLCV para el almacén (radar.datos.AlmacenOHLCV).
+Un proveedor implementa `descargar(ticker, periodo, intervalo, desde=None, timeout=None)`
+y retorna un DataFrame con columnas Open/High/Low/Close/Volume (vacío si no hay datos).
+- ProveedorYahoo:    yfinance (import diferido).
+- ProveedorArchivos: archivos locales, para trabajar y probar sin red.
+"""
+import os
+import re
+import time
+
+import pandas as pd
+
+COLUMNAS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def _vacio():
+    return pd.DataFrame(columns=COLUMNAS)
+
+
+def _nombre_archivo(ticker, intervalo, extension):
+    seguro = re.sub(r'[^A-Za-z0-9_.-]', '_', ticker)
+    return f"{seguro}__{intervalo}.{extension}"
+
+
+class ProveedorYahoo:
+    """Yahoo Finance vía yfinance; `timeout` se pasa a cada petición HTTP."""
+
+    def descargar(self, ticker, periodo, intervalo, desde=None, timeout=None):
+        import yfinance as yf
+        opciones = dict(interval=intervalo, progress=False)
+        if timeout is not None:
+            opciones["timeout"] = timeout
+        if desde is None:
+            df = yf.download(ticker, period=periodo, **opciones)
+        else:
+            df = yf.download(ticker, start=desde, **opciones)
+        if df is None or df.empty:
+            return _vacio()
+        if isinstance(df.columns, pd.MultiIndex):
+            df.columns = df.columns.get_level_values(0)
+        return df[COLUMNAS]
+
+
+class ProveedorArchivos:
+    """
+    Proveedor falso respaldado por archivos: `<directorio>/<ticker>__<intervalo>.csv`
+    (o `.pkl`), con índice de fechas y columnas OHLCV. Respeta `periodo` y `desde`
+    como Yahoo. `latencia` (s) simula una red lenta: si supera el `timeout` de la
+    petición se lanza TimeoutError, igual que un proveedor que no responde.
+    """
+
+    def __init__(self, directorio, latencia=0.0):
+        self.directorio = directorio
+        self.latencia = latencia
+        self.peticiones = 0
+
+    def guardar(self, ticker, intervalo, df):
+        """Escribe el archivo de un ticker (para preparar datos de prueba)."""
+        os.makedirs(self.directorio, exist_ok=True)
+        df[COLUMNAS].to_csv(os.path.join(self.directorio, _nombre_archivo(ticker, intervalo, "csv")))
+
+    def _leer(self, ticker, intervalo):
+        for extension in ("pkl", "csv"):
+            ruta = os.path.join(self.directorio, _nombre_archivo(ticker, intervalo, extension))
+            if os.path.exists(ruta):
+                if extension == "pkl":
+                    return pd.read_pickle(ruta)
+                return pd.read_csv(ruta, index_col=0, parse_dates=[0])
+        return None
+
+    def descargar(self, ticker, periodo, intervalo, desde=None, timeout=None):
+        self.peticiones += 1
+        if self.latencia:
+            if timeout is not None and self.latencia > timeout:
+                time.sleep(timeout)
+                raise TimeoutError(f"{ticker} {intervalo}: sin respuesta en {timeout}s")
+            time.sleep(self.latencia)
+        df = self._leer(ticker, intervalo)
+        if df is None or df.empty:
+            return _vacio()
+        df = df[COLUMNAS].sort_index()
+        if desde is not None:
+            return df[df.index >= desde]
+        from radar.datos import periodo_a_timedelta
+        return df[df.index >= df.index[-1] - periodo_a_timedelta(periodo)]
+
+
+def proveedor_defecto():
+    """Yahoo, salvo que TRIPLE_RADAR_DATOS_DIR apunte a un directorio de archivos (modo sin red)."""
+    directorio = os.environ.get("TRIPLE_RADAR_DATOS_DIR")
+    return ProveedorArchivos(directorio) if directorio else ProveedorYahoo()
@@ -0,0 +1,258 @@
+"""
+Motor multi-timeframe: todos los TF se construyen desde un solo feed base (1H por defecto),
+anclados a la sesión del activo, y al llegar barras base nuevas solo se
+re-agregan los buckets afectados (normalmente el último de cada TF).
+Cada TF vive en un `radar.barras.Barras` (columnar, float32) y se entrega como
+vista sin copia.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from radar.barras import Barras, tiempos_de
+from radar.datos import periodo_a_timedelta
+
+TF_FRECUENCIA = {
+    "15m": "15min", "30m": "30min", "1H": "1h", "2H": "2h", "4H": "4h",
+    "1D": "1D", "1W": "7D",
+}
+
+# Sesión: (zona horaria, hora local de apertura). Los futuros CME (Globex) abren
+# a las 18:00 ET del día anterior; el cripto opera 24/7 y se ancla a 00:00 UTC.
+SESIONES = {
+    "futuros": ("America/New_York", 18),
+    "24x7":    ("UTC", 0),
+}
+
+AGREGACION = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+
+
+def sesion_de(ticker):
+    """Tipo de sesión según el ticker de Yahoo (BTC-USD, ETH-USD... son 24/7)."""
+    return "24x7" if ticker.upper().endswith(("-USD", "-USDT")) else "futuros"
+
+
+def etiquetas(index, tf, sesion="futuros"):
+    """
+    Etiqueta de bucket de cada timestamp para el TF dado.
+    - Intradía: inicio del bucket, alineado a la apertura de sesión (p. ej. 4H de
+      futuros: 18:00, 22:00, 02:00... ET) y con la zona horaria de la sesión.
+    - 1D / 1W: fecha de sesión sin hora (como las velas diarias de Yahoo); la sesión
+      de futuros que abre el domingo 18:00 es la del lunes. 1W se etiqueta en lunes.
+    """
+    tz, hora = SESIONES[sesion]
+    idx = index if index.tz is not None else index.tz_localize("UTC")
+    aware = idx.tz_convert(tz)
+    local = aware.tz_localize(None)
+    if tf in ("1D", "1W"):
+        fecha = (local + pd.Timedelta(hours=(24 - hora) % 24)).normalize()
+        if tf == "1W":
+            fecha = fecha - pd.to_timedelta(fecha.dayofweek, unit="D")
+        return pd.DatetimeIndex(fecha)
+
+    freq = pd.Timedelta(TF_FRECUENCIA[tf])
+    offset = pd.Timedelta(hours=hora) % freq
+    inicio = (local - offset).floor(freq) + offset
+    # Cambios de horario: la hora repetida se desambigua con el DST del timestamp original
+    estandar = pd.Timestamp("2000-01-01", tz=tz).utcoffset()
+    es_dst = np.asarray((local - idx.tz_convert(None)) != estandar)
+    return inicio.tz_localize(tz, ambiguous=es_dst, nonexistent="shift_forward")
+
+
+def agregar_ohlcv(df, etiq):
+    """OHLCV agregado por etiqueta de bucket."""
+    if df.empty:
+        return pd.DataFrame(columns=list(AGREGACION))
+    out = df[list(AGREGACION)].groupby(etiq).agg(AGREGACION).dropna(subset=['Close'])
+    out.index.name = None
+    return out
+
+
+def resamplear(df, tf, sesion="futuros", base_tf="1H"):
+    """`df` (feed base) agregado al TF con las mismas etiquetas de sesión que el motor."""
+    if tf == base_tf or df.empty:
+        return df
+    return agregar_ohlcv(df, etiquetas(df.index, tf, sesion))
+
+
+def agregar_barras(t, x, etiq):
+    """
+    OHLCV agregado por etiqueta de bucket sobre arrays (t int64, x (5, n) en el
+    orden de barras.COLUMNAS, etiquetas ordenadas). Mismas reglas que
+    `agregar_ohlcv`: first/last/max/min ignoran NaN, el volumen se suma y se
+    descartan los buckets sin Close.
+    Retorna (tiempos de las etiquetas, OHLCV agregado, posición de la primera
+    vela del último bucket).
+    """
+    t_etiq = tiempos_de(etiq)
+    inicio = np.flatnonzero(np.r_[True, t_etiq[1:] != t_etiq[:-1]])
+    pos = np.arange(len(t))
+    o, h, l, c, v = x
+    primera = np.minimum.reduceat(np.where(np.isnan(o), len(t), pos), inicio)
+    ultima = np.maximum.reduceat(np.where(np.isnan(c), -1, pos), inicio)
+    agregado = np.vstack((
+        np.where(primera < len(t), o[np.minimum(primera, len(t) - 1)], np.nan),
+        np.fmax.reduceat(h, inicio),
+        np.fmin.reduceat(l, inicio),
+        np.where(ultima >= 0, c[ultima], np.nan),
+        np.add.reduceat(np.nan_to_num(v.astype(float)), inicio),
+    ))
+    ok = ultima >= 0
+    return t_etiq[inicio][ok], agregado[:, ok], int(inicio[-1])
+
+
+class MultiTimeframe:
+    """
+    Feed base + TF derivados de un ticker, cada uno en un `Barras` (columnar,
+    float32) con su capacidad de ring buffer (`capacidad`: TF -> velas; sin
+    entrada = sin tope).
+    `actualizar` recibe el feed base (completo o solo lo nuevo): las barras anteriores
+    a la última almacenada se ignoran, la última se revisa si vuelve a llegar y
+    solo se re-agregan los buckets que tocan las barras nuevas.
+    """
+
+    def __init__(self, tfs=("4H", "1D"), sesion="futuros", base_tf="1H", capacidad=None):
+        self.tfs = tuple(tfs)      # TF derivados: deben ser iguales o más largos que base_tf
+        self.sesion = sesion
+        self.base_tf = base_tf
+        self.capacidad = dict(capacidad or {})
+        self.base = None
+        self._barras = {}       # tf -> Barras del TF derivado
+        self._abierto = {}      # tf -> (etiqueta, tiempo de su primera barra base) del último bucket
+        self._lock = threading.Lock()
+
+    def _reagregar(self, tf, desde):
+        """Re-agrega el TF con las barras base de tiempo >= desde."""
+        tramo = self.base.desde(desde)
+        etiq = etiquetas(tramo.indice(), tf, self.sesion)
+        t, x, k = agregar_barras(tramo.tiempos, tramo.ohlcv, etiq)
+        barras = self._barras.get(tf)
+        if barras is None:
+            barras = self._barras[tf] = Barras(self.capacidad.get(tf), etiq.tz)
+        if len(t):
+            barras.truncar(barras.posicion(t[0]))
+            barras.agregar(t, x)
+        self._abierto[tf] = (int(tiempos_de(etiq[-1:])[0]), int(tramo.tiempos[k]))
+
+    def actualizar(self, df):
+        """Incorpora barras base. Retorna True si algo cambió."""
+        if df is None or df.empty:
+            return False
+        with self._lock:
+            if self.base is None or not len(self.base):
+                # Los TF derivados se agregan con todo el feed, antes de recortar la base
+                completo = Barras.desde_df(df)
+                self.base = completo
+                for tf in self.tfs:
+                    self._reagregar(tf, completo.tiempos[0])
+                self.base = Barras(self.capacidad.get(self.base_tf), completo.tz)
+                self.base.agregar(completo.tiempos, completo.ohlcv)
+                return True
+
+            t_ult, x_ult = self.base.ultima()
+            nuevas = df.iloc[df.index.searchsorted(self.base.fecha(-1)):]
+            if nuevas.empty:
+                return False
+            nuevas = Barras.desde_df(nuevas)
+            t0, x0 = nuevas.ultima() if len(nuevas) == 1 else (None, None)
+            if t0 == t_ult and np.array_equal(x0, x_ult, equal_nan=True):
+                return False
+            t0 = int(nuevas.tiempos[0])
+            self.base.truncar(self.base.posicion(t0))
+            self.base.agregar(nuevas.tiempos, nuevas.ohlcv)
+            for tf in self.tfs:
+                # Primer bucket afectado: se re-agrega desde su primera barra base
+                primera = int(tiempos_de(etiquetas(nuevas.indice()[:1], tf, self.sesion))[0])
+                etiqueta, inicio = self._abierto[tf]
+                self._reagregar(tf, inicio if primera == etiqueta else t0)
+            return True
+
+    def timeframe(self, tf, periodo=None):
+        """Barras del TF (vista sin copia; opcionalmente solo los últimos `periodo`, p. ej. '60d')."""
+        with self._lock:
+            barras = self.base if tf == self.base_tf else self._barras.get(tf)
+            if barras is None or not len(barras):
+                return Barras()
+            if periodo is None:
+                return barras.vista()
+            t_ult, _ = barras.ultima()
+            return barras.desde(t_ult - periodo_a_timedelta(periodo).value)
+
+
+# Ventana de cada TF del radar: int = últimas N velas, str = período ('60d', '1y').
+# Son parte de la señal: la historia archivada no las alarga (la usan --desde y --perfil-desde)
+VENTANAS_RADAR = {"1H": 7 * 24, "4H": "60d", "1D": "1y"}
+
+# Velas que guarda el motor por TF: la ventana del radar con margen (1H además
+# cubre las barras base del bucket diario en formación, que se re-agrega)
+CAPACIDAD_RADAR = {"1H": 512, "4H": 512, "1D": 512}
+
+# Motores por ticker, compartidos por todo el proceso
+_MOTORES = {}
+_MOTORES_LOCK = threading.Lock()
+
+
+def motor_de(ticker, tfs=("4H", "1D")):
+    """Motor multi-timeframe del ticker (se crea la primera vez)."""
+    with _MOTORES_LOCK:
+        motor = _MOTORES.get(ticker)
+        if motor is None or motor.tfs != tuple(tfs):
+            motor = _MOTORES[ticker] = MultiTimeframe(tfs, sesion_de(ticker), capacidad=CAPACIDAD_RADAR)
+        return motor
+
+
+def timeframes_radar(motor):
+    """Los tres TF del radar con sus ventanas (vistas sin copia): 1H ~7 días, 4H 60 días, 1D 1 año."""
+    out = {}
+    for tf, ventana in VENTANAS_RADAR.items():
+        if isinstance(ventana, int):
+            out[tf] = motor.timeframe(tf).tail(ventana)
+        else:
+            out[tf] = motor.timeframe(tf, ventana)
+    return out
+
+
+def historias_timeframes(archivo, ticker, periodo, tfs, sesion="futuros", memo=None):
+    """
+    TF -> historia archivada de 1H de los últimos `periodo`, re-agregada a ese TF
+    (`archivo`: archivo.ArchivoHistorico). `memo` (ticker -> (firma del archivo,
+    periodo, historias)) evita releer y re-agregar si no llegó ninguna barra.
+    """
+    memo = {} if memo is None else memo
+    clave = (archivo.firma(ticker, "1h"), periodo)
+    previo = memo.get(ticker)
+    if previo is not None and previo[:2] == clave and all(tf in previo[2] for tf in tfs):
+        return previo[2]
+    base = archivo.ultimos(ticker, "1h", periodo_a_timedelta(periodo))
+    historias = {tf: resamplear(base, tf, sesion) for tf in tfs}
+    memo[ticker] = (*clave, historias)
+    return historias
+
+
+def firma_timeframes(timeframes):
+    """
+    TF -> (tiempo, bytes OHLCV) de la última vela, o None sin velas: cambia con
+    una vela nueva o con la revisión de la que está en formación.
+    """
+    firma = {}
+    for tf, barras in timeframes.items():
+        if not len(barras):
+            firma[tf] = None
+            continue
+        t, x = barras.ultima()
+        firma[tf] = (t, x.tobytes())
+    return firma
+
+
+def timeframes_cambiados(firma_vieja, firma_nueva, revisiones=True):
+    """
+    TF cuya última vela difiere entre dos firmas (todas si no hay firma vieja).
+    Con `revisiones=False` solo los que tienen una vela nueva (otro timestamp).
+    """
+    if not firma_vieja:
+        return list(firma_nueva)
+    if not revisiones:
+        return [tf for tf, f in firma_nueva.items()
+                if (f and f[0]) != ((firma_vieja.get(tf) or (None,))[0])]
+    return [tf for tf, f in firma_nueva.items() if firma_vieja.get(tf) != f]
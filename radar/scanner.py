@@ -0,0 +1,226 @@
+"""
+Scanner por lotes del TRIPLE RADAR: mismas señales que la app, sin Streamlit ni gráficos.
+
+    python -m radar.scanner GC=F NQ=F BTC-USD
+    python -m radar.scanner --archivo tickers.txt --formato csv --salida senales.csv --workers 8
+    python -m radar.scanner --archivo tickers.txt --sin-modelos      # solo indicadores
+    python -m radar.scanner GC=F --perfil-desde 2022-01-01           # + perfil de la historia archivada
+
+Por cada ticker y TF (1H · 4H · 1D) emite tendencia, POC y área de valor, VWAP, RSI,
+divergencias y diamante, más el consenso Fuego Maestro y el resumen ARIMA/GARCH del ticker.
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+
+import numpy as np
+
+from radar.datos import CACHE_DIR_DEFECTO, PERIODO_BASE, AlmacenOHLCV
+from radar.metricas import METRICAS
+from radar.paralelo import calcular_activos, crear_pool
+from radar.proveedores import ProveedorArchivos
+from radar.resampleo import motor_de, timeframes_radar
+from radar.watchlist import leer_tickers
+
+COLUMNAS_CSV = [
+    "ticker", "tf", "fecha", "cierre", "tendencia", "poc", "val", "vah", "vwap", "rsi",
+    "div_alcista_hace", "div_bajista_hace", "diamante", "consenso",
+    "arima_orden", "arima_prediccion", "arima_cambio_pct", "arima_direccion",
+    "garch_volatilidad", "garch_nivel", "error",
+]
+# Con --perfil-desde: POC y área de valor de la historia 1H archivada
+COLUMNAS_PERFIL = ["historico_poc", "historico_val", "historico_vah"]
+
+
+def _limpio(v):
+    """Valor apto para JSON/CSV (NaN -> None, escalares NumPy -> Python, float32 a su decimal más corto)."""
+    if v is None:
+        return None
+    if isinstance(v, np.float32):
+        v = float(str(v))
+    elif hasattr(v, "item"):
+        v = v.item()
+    if isinstance(v, float) and math.isnan(v):
+        return None
+    return v
+
+
+def resumen_timeframe(calc):
+    """Señales de la última vela de un TF (calc = indicadores.calcular_timeframe)."""
+    if calc is None:
+        return None
+    barras = calc["barras"]
+    n = len(barras)
+    return {
+        "fecha": barras.fecha(-1).isoformat(),
+        "cierre": _limpio(barras.close[-1]),
+        "tendencia": calc["tendencia"],
+        "poc": _limpio(calc["poc"]),
+        "val": _limpio(calc["val"]),
+        "vah": _limpio(calc["vah"]),
+        "vwap": _limpio(calc["vwap"][-1]),
+        "rsi": _limpio(calc["rsi"][-1]),
+        # Barras desde la última divergencia (None si no hubo)
+        "div_alcista_hace": n - 1 - calc["div_alc"][-1] if calc["div_alc"] else None,
+        "div_bajista_hace": n - 1 - calc["div_baj"][-1] if calc["div_baj"] else None,
+        "diamante": bool(calc["diamante"]),
+    }
+
+
+def resumen_activo(ticker, res):
+    """Resumen serializable de un resultado de paralelo.calcular_activo (o de su excepción)."""
+    if isinstance(res, Exception):
+        return {"ticker": ticker, "error": str(res)}
+    arima, garch = res["arima"], res["garch"]
+    return {
+        "ticker": ticker,
+        "consenso": res["consenso"],
+        "arima": None if arima is None else {
+            "orden": list(arima["orden"]),
+            "prediccion": _limpio(arima["prediccion"]),
+            "cambio_pct": _limpio(arima["cambio_pct"]),
+            "direccion": arima["direccion"],
+        },
+        "garch": None if garch is None else {
+            "volatilidad_futura": _limpio(garch["volatilidad_futura"]),
+            "vol_media": _limpio(garch["vol_media"]),
+            "nivel": garch["nivel"],
+        },
+        "timeframes": {tf: resumen_timeframe(c) for tf, c in res["timeframes"].items()},
+        "errores": res["errores"],
+    }
+
+
+def perfil_historico(almacen, ticker, desde):
+    """POC y área de valor de la historia 1H archivada desde `desde` (None si no hay volumen)."""
+    perfil = almacen.archivo.perfil(ticker, "1h", desde=desde)
+    if perfil is None:
+        return None
+    return {"desde": str(desde), **{k: _limpio(perfil[k]) for k in ("poc", "val", "vah")}}
+
+
+def filas_csv(resumen):
+    """Aplana el resumen de un activo en una fila por TF."""
+    base = {"ticker": resumen["ticker"], "error": resumen.get("error")}
+    if "error" in resumen:
+        return [base]
+    arima, garch = resumen["arima"] or {}, resumen["garch"] or {}
+    base.update({
+        "consenso": resumen["consenso"],
+        "arima_orden": "({},{},{})".format(*arima["orden"]) if arima.get("orden") else None,
+        "arima_prediccion": arima.get("prediccion"),
+        "arima_cambio_pct": arima.get("cambio_pct"),
+        "arima_direccion": arima.get("direccion"),
+        "garch_volatilidad": garch.get("volatilidad_futura"),
+        "garch_nivel": garch.get("nivel"),
+        "error": "; ".join(f"{k}: {v}" for k, v in resumen["errores"].items()) or None,
+    })
+    if resumen.get("perfil_historico"):
+        base.update({f"historico_{k}": resumen["perfil_historico"][k] for k in ("poc", "val", "vah")})
+    return [dict(base, tf=tf, **(senales or {})) for tf, senales in resumen["timeframes"].items()]
+
+
+def escanear(tickers, almacen, pool=None, con_modelos=True, perfil_desde=None, **kwargs):
+    """
+    Descarga (vía caché) y calcula cada ticker. Retorna la lista de resúmenes, en orden.
+    Con `perfil_desde` cada resumen suma 'perfil_historico' (ver perfil_historico).
+    `kwargs` pasa a calcular_activo (p. ej. arima_buscar_cada / arima_criterio).
+    """
+    tareas, errores = [], {}
+    feeds = almacen.obtener_varios([(t, PERIODO_BASE, "1h") for t in tickers])
+    for ticker, df_1h in zip(tickers, feeds):
+        try:
+            if isinstance(df_1h, Exception):
+                raise df_1h
+            if df_1h.empty:
+                raise ValueError("sin datos del proveedor")
+            motor = motor_de(ticker)
+            motor.actualizar(df_1h)
+            tareas.append((ticker, df_1h, timeframes_radar(motor)))
+        except Exception as e:
+            errores[ticker] = e
+    resultados = calcular_activos(tareas, pool=pool, con_modelos=con_modelos, **kwargs)
+    resultados.update(errores)
+    resumenes = [resumen_activo(t, resultados[t]) for t in tickers]
+    if perfil_desde is not None:
+        for r in resumenes:
+            if "error" not in r:
+                with METRICAS.tramo("perfil_historico", ticker=r["ticker"]):
+                    r["perfil_historico"] = perfil_historico(almacen, r["ticker"], perfil_desde)
+    return resumenes
+
+
+def _leer_tickers(args):
+    tickers = list(args.tickers)
+    if args.archivo:
+        tickers += leer_tickers(args.archivo)
+    return list(dict.fromkeys(tickers))   # sin duplicados, en orden
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m radar.scanner", description=__doc__.split("\n")[1])
+    parser.add_argument("tickers", nargs="*", help="Tickers de Yahoo Finance (GC=F, NQ=F, BTC-USD...)")
+    parser.add_argument("--archivo", help="Archivo con un ticker por línea (# = comentario)")
+    parser.add_argument("--formato", choices=["json", "csv"], default="json")
+    parser.add_argument("--salida", help="Archivo de salida (por defecto, stdout)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Procesos de cálculo (1 = sin pool)")
+    parser.add_argument("--sin-modelos", action="store_true", help="Omitir ARIMA/GARCH")
+    parser.add_argument("--arima-auto", action="store_true",
+                        help="Elegir el orden ARIMA en vez de (2,1,2): d por raíz unitaria, "
+                             "(p, q) por criterio de información")
+    parser.add_argument("--criterio", choices=["aic", "bic"], default="aic", help="Criterio de --arima-auto")
+    parser.add_argument("--perfil-desde", metavar="FECHA",
+                        help="Agregar el POC y el área de valor de la historia 1H archivada desde FECHA")
+    parser.add_argument("--cache-dir", default=CACHE_DIR_DEFECTO)
+    parser.add_argument("--ttl", type=int, default=300, help="TTL de la caché en memoria (s)")
+    parser.add_argument("--datos-dir",
+                        help="Leer barras de archivos <ticker>__<intervalo>.csv en vez de Yahoo (sin red)")
+    parser.add_argument("--timeout", type=float, default=20, help="Timeout por petición al proveedor (s)")
+    parser.add_argument("--metricas", help="Escribir tiempos por etapa y contadores (formato Prometheus)")
+    args = parser.parse_args(argv)
+
+    tickers = _leer_tickers(args)
+    if not tickers:
+        parser.error("indicar al menos un ticker o --archivo")
+
+    proveedor = ProveedorArchivos(args.datos_dir) if args.datos_dir else None
+    almacen = AlmacenOHLCV(args.cache_dir, ttl=args.ttl, proveedor=proveedor, timeout=args.timeout)
+    pool = crear_pool(min(args.workers, len(tickers)))
+    try:
+        resumenes = escanear(tickers, almacen, pool=pool, con_modelos=not args.sin_modelos,
+                             perfil_desde=args.perfil_desde,
+                             arima_buscar_cada=1 if args.arima_auto else None, arima_criterio=args.criterio)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    salida = open(args.salida, "w", encoding="utf-8", newline="") if args.salida else sys.stdout
+    try:
+        if args.formato == "json":
+            json.dump(resumenes, salida, ensure_ascii=False, indent=2)
+            salida.write("\n")
+        else:
+            columnas = COLUMNAS_CSV + (COLUMNAS_PERFIL if args.perfil_desde else [])
+            w = csv.DictWriter(salida, fieldnames=columnas)
+            w.writeheader()
+            for r in resumenes:
+                w.writerows(filas_csv(r))
+    finally:
+        if salida is not sys.stdout:
+            salida.close()
+
+    if args.metricas:
+        METRICAS.exportar(args.metricas)
+
+    fallidos = [r["ticker"] for r in resumenes if "error" in r]
+    if fallidos:
+        print(f"Sin datos/errores: {', '.join(fallidos)}", file=sys.stderr)
+    return 1 if len(fallidos) == len(resumenes) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,237 @@
+"""
+Historial de señales: todas las señales del radar para cada vela del feed base,
+en una sola pasada vectorizada, tal como las habría mostrado la app al cierre de
+esa vela (mismas ventanas por TF, sin mirar hacia adelante).
+
+- 1H (TF base): tendencia (precio vs VWAP de las últimas 168 velas), RSI,
+  divergencias y diamante en cada vela.
+- 4H / 1D: la tendencia se evalúa con la vela del TF *en formación* (agregada
+  con las velas base hasta ese momento), igual que el motor multi-TF; las
+  divergencias y el diamante del TF se marcan en la primera vela base posterior
+  al cierre de la vela del TF que los produjo.
+- consenso: Fuego Maestro sobre las tendencias de 1H/4H/1D de esa misma vela.
+
+Sobre eso, `resumen_backtest` da frecuencia, retorno futuro medio y tasa de
+acierto por estado de cada señal.
+
+    python -m radar.senales GC=F BTC-USD --horizontes 1,4,24
+"""
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from radar.datos import CACHE_DIR_DEFECTO, PERIODO_BASE, AlmacenOHLCV, periodo_a_timedelta
+from radar.indicadores import calcular_rsi, detectar_divergencias
+from radar.proveedores import ProveedorArchivos
+from radar.resampleo import VENTANAS_RADAR, etiquetas, sesion_de
+
+# calcular_timeframe no evalúa un TF con menos velas que esto en la ventana
+MIN_VELAS = 15
+
+CONSENSOS = ["ALCISTA_TOTAL", "BAJISTA_TOTAL", "ALCISTA_PARCIAL", "BAJISTA_PARCIAL", "MIXTO"]
+
+
+def _vol_vwap(v):
+    """Volumen para VWAP/RVOL como en calcular_timeframe (0 -> 1; NaN se mantiene)."""
+    return np.where(v == 0, 1.0, v)
+
+
+def _diamante(high, low, vol):
+    """
+    Compresión de volatilidad vela a vela: RVOL > 2 y rango bajo su media de 20.
+    Las medias ignoran NaN; sin volumen no hay diamante y un rango NaN cuenta 0.
+    """
+    v = pd.Series(_vol_vwap(vol))
+    rng = pd.Series(high - low)
+    rvol = v / v.rolling(20, min_periods=1).mean()
+    return ((rvol > 2.0) & (rng.fillna(0) < rng.rolling(20, min_periods=1).mean())).to_numpy()
+
+
+def _divergencias(close, lookback=5):
+    """(alcistas, bajistas) como máscaras booleanas por vela."""
+    c = pd.Series(close)
+    alc, baj = detectar_divergencias(c, calcular_rsi(c), lookback=lookback)
+    m_alc, m_baj = np.zeros(len(c), bool), np.zeros(len(c), bool)
+    m_alc[alc] = True
+    m_baj[baj] = True
+    return m_alc, m_baj
+
+
+def _tendencia_asof(close, vol_parcial, grupo, lo, vol_grupo, close_grupo):
+    """
+    Tendencia (+1 COMPRA, -1 VENTA, 0 sin datos) en cada vela base: precio vs VWAP
+    de las velas del TF de `lo` a `grupo` (la última, en formación). Las velas
+    cerradas se suman con prefijos acumulados: O(1) por vela base. Una vela con
+    volumen NaN pesa 0 (como en el cumsum de calcular_timeframe).
+    """
+    v_grupo = np.nan_to_num(_vol_vwap(vol_grupo))
+    pcv = np.concatenate(([0.0], np.cumsum(close_grupo * v_grupo)))
+    pv = np.concatenate(([0.0], np.cumsum(v_grupo)))
+    v = np.nan_to_num(_vol_vwap(vol_parcial))
+    vwap = (pcv[grupo] - pcv[lo] + close * v) / (pv[grupo] - pv[lo] + v)
+    tendencia = np.where(close > vwap, 1, -1).astype(np.int8)
+    tendencia[grupo - lo + 1 < MIN_VELAS] = 0
+    return tendencia
+
+
+def historial_senales(df, sesion="futuros", ventanas=None, base_tf="1H", lookback=5):
+    """
+    DataFrame con una fila por vela de `df` (OHLCV del TF base) y las columnas:
+    tendencia_<TF> (+1/-1/0), rsi_<base>, div_alc_<TF>, div_baj_<TF>,
+    diamante_<TF> (bool) y consenso (categoría; NaN con menos de 2 TF evaluables).
+    `ventanas`: TF -> ventana (como resampleo.VENTANAS_RADAR).
+    """
+    ventanas = VENTANAS_RADAR if ventanas is None else ventanas
+    df = df[['Open', 'High', 'Low', 'Close', 'Volume']].sort_index()
+    n = len(df)
+    high = df['High'].to_numpy(float)
+    low = df['Low'].to_numpy(float)
+    close = df['Close'].to_numpy(float)
+    # Volumen NaN: se mantiene en el TF base y cuenta 0 al agregar 4H/1D, como el motor
+    vol = df['Volume'].to_numpy(float)
+    vol_suma = np.nan_to_num(vol)
+    out = {}
+
+    for tf, ventana in ventanas.items():
+        if tf == base_tf:
+            grupo = np.arange(n)
+            etiq = df.index
+            vol_parcial, vol_grupo, close_grupo = vol, vol, close
+            h_g, l_g = high, low
+        else:
+            etiq_base = etiquetas(df.index, tf, sesion)
+            grupo, etiq = pd.factorize(etiq_base)   # etiquetas ordenadas: grupo creciente
+            inicio = np.flatnonzero(np.r_[True, np.diff(grupo) != 0])
+            fin = np.r_[inicio[1:], n] - 1
+            vol_parcial = pd.Series(vol_suma).groupby(grupo).cumsum().to_numpy()
+            vol_grupo = np.add.reduceat(vol_suma, inicio)
+            close_grupo = close[fin]
+            h_g = np.fmax.reduceat(high, inicio)
+            l_g = np.fmin.reduceat(low, inicio)
+
+        if isinstance(ventana, int):
+            lo = np.maximum(grupo - ventana + 1, 0)
+        else:
+            desde = etiq - periodo_a_timedelta(ventana)
+            lo = np.searchsorted(etiq, desde, side='left')[grupo]
+        out[f"tendencia_{tf}"] = _tendencia_asof(close, vol_parcial, grupo, lo, vol_grupo, close_grupo)
+
+        div_alc, div_baj = _divergencias(close_grupo, lookback)
+        diamante = _diamante(h_g, l_g, vol_grupo)
+        if tf == base_tf:
+            out[f"rsi_{tf}"] = calcular_rsi(df['Close']).to_numpy()
+        else:
+            # Señal de la vela k del TF: visible desde la primera vela base de la vela k+1
+            primera = np.zeros(n, bool)
+            primera[inicio[1:]] = True
+            previa = grupo - 1
+            div_alc = primera & div_alc[previa]
+            div_baj = primera & div_baj[previa]
+            diamante = primera & diamante[previa]
+        out[f"div_alc_{tf}"] = div_alc
+        out[f"div_baj_{tf}"] = div_baj
+        out[f"diamante_{tf}"] = diamante
+
+    tendencias = np.column_stack([out[f"tendencia_{tf}"] for tf in ventanas])
+    compras = (tendencias == 1).sum(axis=1)
+    ventas = (tendencias == -1).sum(axis=1)
+    evaluables = compras + ventas
+    consenso = np.select(
+        [evaluables < 2, compras == 3, ventas == 3, compras == 2, ventas == 2],
+        [None, "ALCISTA_TOTAL", "BAJISTA_TOTAL", "ALCISTA_PARCIAL", "BAJISTA_PARCIAL"],
+        default="MIXTO",
+    )
+    out["consenso"] = pd.Categorical(consenso, categories=CONSENSOS)
+    return pd.DataFrame(out, index=df.index)
+
+
+# ─── Backtest ───────────────────────────────────────────────────────────────
+
+def _estados(senales):
+    """(señal, estado, máscara, dirección esperada: +1 / -1 / 0 sin dirección)."""
+    yield "(todas)", "", np.ones(len(senales), bool), 1
+    for col in senales.columns:
+        s = senales[col]
+        if col.startswith("tendencia_"):
+            yield col, "COMPRA", (s == 1).to_numpy(), 1
+            yield col, "VENTA", (s == -1).to_numpy(), -1
+        elif col == "consenso":
+            for estado in CONSENSOS:
+                direccion = 1 if estado.startswith("ALCISTA") else -1 if estado.startswith("BAJISTA") else 0
+                yield col, estado, (s == estado).to_numpy(), direccion
+        elif s.dtype == bool:
+            direccion = 1 if col.startswith("div_alc") else -1 if col.startswith("div_baj") else 0
+            yield col, "sí", s.to_numpy(), direccion
+
+
+def resumen_backtest(senales, close, horizontes=(1, 4, 24)):
+    """
+    Por señal y estado: n velas, retorno futuro medio (%) a cada horizonte (en
+    velas base) y % de aciertos (retorno en la dirección de la señal; NaN si la
+    señal no tiene dirección, como el diamante o MIXTO). La fila "(todas)" es la
+    referencia sin condicionar. Los retornos futuros solo se usan para evaluar.
+    """
+    close = close.reindex(senales.index).to_numpy(float)
+    futuros = {}
+    for h in horizontes:
+        fut = np.full(len(close), np.nan)
+        if h < len(close):
+            fut[:-h] = (close[h:] / close[:-h] - 1) * 100
+        futuros[h] = fut
+
+    filas = []
+    for senal, estado, mascara, direccion in _estados(senales):
+        fila = {"senal": senal, "estado": estado, "n": int(mascara.sum())}
+        for h, fut in futuros.items():
+            r = fut[mascara]
+            r = r[~np.isnan(r)]
+            fila[f"ret_{h}_%"] = r.mean() if len(r) else np.nan
+            fila[f"acierto_{h}_%"] = (np.sign(r) == direccion).mean() * 100 if len(r) and direccion else np.nan
+        filas.append(fila)
+    return pd.DataFrame(filas)
+
+
+def _horizontes(texto):
+    return tuple(int(x) for x in texto.split(",") if x.strip())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m radar.senales",
+                                     description="Backtest de las señales del radar sobre el historial de 1H")
+    parser.add_argument("tickers", nargs="+")
+    parser.add_argument("--horizontes", type=_horizontes, default=(1, 4, 24),
+                        help="Horizontes del retorno futuro, en velas de 1H (coma)")
+    parser.add_argument("--formato", choices=["tabla", "csv"], default="tabla")
+    parser.add_argument("--cache-dir", default=CACHE_DIR_DEFECTO)
+    parser.add_argument("--datos-dir", help="Leer barras de archivos locales en vez de Yahoo (sin red)")
+    parser.add_argument("--desde", help="Historia archivada desde esta fecha (p. ej. 2022-01-01) en vez de "
+                                        "la ventana de PERIODO_BASE")
+    args = parser.parse_args(argv)
+
+    proveedor = ProveedorArchivos(args.datos_dir) if args.datos_dir else None
+    almacen = AlmacenOHLCV(args.cache_dir, proveedor=proveedor)
+    tablas = []
+    for ticker, df in zip(args.tickers, almacen.obtener_varios([(t, PERIODO_BASE, "1h") for t in args.tickers])):
+        if isinstance(df, Exception) or df.empty:
+            print(f"{ticker}: sin datos ({df if isinstance(df, Exception) else 'vacío'})", file=sys.stderr)
+            continue
+        if args.desde:
+            df = almacen.historia(ticker, "1h", desde=args.desde)
+        resumen = resumen_backtest(historial_senales(df, sesion_de(ticker)), df['Close'], args.horizontes)
+        resumen.insert(0, "ticker", ticker)
+        tablas.append(resumen)
+    if not tablas:
+        return 1
+    tabla = pd.concat(tablas, ignore_index=True)
+    if args.formato == "csv":
+        tabla.to_csv(sys.stdout, index=False)
+    else:
+        with pd.option_context("display.width", 200, "display.max_rows", None, "display.float_format", "{:.3f}".format):
+            print(tabla.to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
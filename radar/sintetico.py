@@ -0,0 +1,77 @@
+"""
+Datos OHLCV sintéticos y deterministas (misma semilla -> mismas barras), para
+benchmarks y pruebas sin proveedor. Imitan lo que llega de Yahoo: huecos de fin
+de semana y mantenimiento en 1h, feriados en diario, barras con volumen cero y
+regímenes de volatilidad.
+"""
+import numpy as np
+import pandas as pd
+
+
+def _indice_1h(n, fin, rng, huecos):
+    """n timestamps horarios (UTC) con el calendario de futuros CME si `huecos`."""
+    # ~31% de las horas caen en el cierre de fin de semana o en la pausa diaria
+    extra = int(n * 0.5) + 64 if huecos else 0
+    while True:
+        idx = pd.date_range(end=fin, periods=n + extra, freq="h", tz="UTC")
+        if huecos:
+            dia, hora = idx.dayofweek, idx.hour
+            # Cierre de viernes 21:00 UTC a domingo 22:00 UTC + pausa diaria de 21:00 UTC
+            abierto = ~((dia == 5) | ((dia == 4) & (hora >= 21)) | ((dia == 6) & (hora < 22)) | (hora == 21))
+            # Huecos sueltos (barras que el proveedor no envía)
+            abierto &= rng.random(len(idx)) > 0.003
+            idx = idx[abierto]
+        if len(idx) >= n:
+            return idx[-n:]
+        extra *= 2
+
+
+def _indice_1d(n, fin, rng, huecos):
+    """n fechas de sesión (sin hora, como las velas diarias de Yahoo)."""
+    extra = int(n * 0.05) + 16 if huecos else 0
+    while True:
+        idx = pd.bdate_range(end=pd.Timestamp(fin).tz_localize(None).normalize(), periods=n + extra)
+        if huecos:
+            idx = idx[rng.random(len(idx)) > 0.04]   # ~10 feriados por año
+        if len(idx) >= n:
+            return idx[-n:]
+        extra *= 2
+
+
+def generar_ohlcv(n, intervalo="1h", semilla=0, precio=100.0, huecos=True,
+                  volumen_cero=0.01, fin="2026-01-02 20:00"):
+    """
+    DataFrame OHLCV con `n` barras de `intervalo` ('1h' o '1d') que terminan en `fin`.
+    Precio: paseo log-normal con volatilidad que cambia de régimen (agrupamiento
+    de volatilidad, para que GARCH tenga algo que estimar). `volumen_cero` es la
+    fracción de barras con volumen 0.
+    """
+    rng = np.random.default_rng(semilla)
+    if intervalo == "1h":
+        idx, sigma_base = _indice_1h(n, fin, rng, huecos), 0.004
+    elif intervalo == "1d":
+        idx, sigma_base = _indice_1d(n, fin, rng, huecos), 0.015
+    else:
+        raise ValueError(f"Intervalo no soportado: {intervalo}")
+    n = len(idx)
+
+    # Log-volatilidad: paseo aleatorio suavizado con reversión a la media (vectorizado)
+    choques = rng.standard_normal(n) * 0.05
+    nivel = np.cumsum(choques)
+    nivel -= pd.Series(nivel).rolling(500, min_periods=1).mean().to_numpy()
+    sigma = sigma_base * np.exp(nivel)
+
+    ret = rng.standard_normal(n) * sigma
+    cierre = precio * np.exp(np.cumsum(ret))
+    apertura = np.empty(n)
+    apertura[0] = precio
+    apertura[1:] = cierre[:-1] * np.exp(rng.standard_normal(n - 1) * sigma[1:] * 0.1)
+    mecha = np.abs(rng.standard_normal((2, n))) * sigma * cierre * 0.5
+    high = np.maximum(apertura, cierre) + mecha[0]
+    low = np.minimum(apertura, cierre) - mecha[1]
+
+    volumen = np.round(rng.lognormal(8, 0.6, n) * (1 + 50 * np.abs(ret)))
+    volumen[rng.random(n) < volumen_cero] = 0.0
+
+    return pd.DataFrame({"Open": apertura, "High": high, "Low": low,
+                         "Close": cierre, "Volume": volumen}, index=idx)
@@ -0,0 +1,112 @@
+"""
+Watchlist: señales baratas (sin ARIMA/GARCH ni gráficos) para un universo grande
+de tickers, en una sola tabla, más el régimen de volatilidad GARCH de todos con el
+estimador por lotes. Las señales salen de los indicadores incrementales de cada
+ticker (solo se procesan las velas nuevas). Los modelos y gráficos quedan para el
+ticker que se elija en detalle.
+"""
+import math
+import os
+
+import pandas as pd
+
+from radar.garch_lote import calcular_garch_lote
+from radar.incremental import senales_de
+from radar.indicadores import calcular_consenso
+
+# Universo por defecto: archivo con un ticker por línea (# = comentario)
+WATCHLIST_DEFECTO = os.environ.get(
+    "TRIPLE_RADAR_WATCHLIST",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "watchlist.txt"),
+)
+
+TFS = ("1H", "4H", "1D")
+
+# Una divergencia cuenta como "reciente" si ocurrió en las últimas N velas del TF
+DIVERGENCIA_RECIENTE = 5
+
+
+def leer_tickers(ruta):
+    """Tickers de un archivo (uno por línea, # = comentario), sin duplicados y en orden."""
+    with open(ruta, encoding="utf-8") as f:
+        tickers = [l.split("#")[0].strip() for l in f]
+    return list(dict.fromkeys(t for t in tickers if t))
+
+
+def senales_watchlist(ticker, timeframes):
+    """
+    Señales de la última vela de cada TF (`timeframes` = resampleo.timeframes_radar)
+    con los indicadores incrementales del ticker, más el consenso.
+    """
+    senales = senales_de(ticker).actualizar(timeframes)
+    return {"senales": senales,
+            "consenso": calcular_consenso([s["tendencia"] for s in senales.values() if s is not None])}
+
+
+def _redondear_float32(v, cifras=7):
+    """Valor que vino de un float32 a sus `cifras` significativas (2345.1 y no 2345.10009765625)."""
+    if v is None or not math.isfinite(v) or v == 0:
+        return v
+    return round(v, cifras - 1 - math.floor(math.log10(abs(v))))
+
+
+def fila_watchlist(ticker, res):
+    """Fila de la tabla para un resultado de senales_watchlist (o su excepción)."""
+    fila = {"ticker": ticker}
+    if isinstance(res, Exception):
+        fila["error"] = str(res)
+        return fila
+
+    div_alc, div_baj, diamante = [], [], []
+    for tf in TFS:
+        s = res["senales"].get(tf)
+        if s is None:
+            continue
+        if tf == "1H":
+            fila["cierre"] = _redondear_float32(s["cierre"])
+        fila[f"vwap_{tf}"] = "▲" if s["tendencia"] == "COMPRA" else "▼"
+        fila[f"rsi_{tf}"] = s["rsi"]
+        # Distancia del cierre al POC del TF, en % del POC
+        if s["poc"] and s["cierre"] is not None:
+            fila[f"poc_{tf}_%"] = (s["cierre"] - s["poc"]) / s["poc"] * 100
+        if s["div_alcista_hace"] is not None and s["div_alcista_hace"] < DIVERGENCIA_RECIENTE:
+            div_alc.append(tf)
+        if s["div_bajista_hace"] is not None and s["div_bajista_hace"] < DIVERGENCIA_RECIENTE:
+            div_baj.append(tf)
+        if s["diamante"]:
+            diamante.append(tf)
+
+    fila["consenso"] = res["consenso"]
+    fila["div_alcista"] = " ".join(div_alc)
+    fila["div_bajista"] = " ".join(div_baj)
+    fila["diamante"] = " ".join(diamante)
+    fila["error"] = None
+    return fila
+
+
+def niveles_garch(feeds, memo=None):
+    """
+    Régimen de volatilidad GARCH (BAJA / NORMAL / ALTA / MUY ALTA) de cada ticker,
+    con el estimador por lotes. `feeds`: {ticker: OHLCV 1H}. `memo` (ticker ->
+    (última barra, nivel)) evita re-estimar los que no tienen barras nuevas.
+    """
+    memo = {} if memo is None else memo
+    claves = {t: (df.index[-1], float(df['Close'].iloc[-1])) for t, df in feeds.items() if not df.empty}
+    nuevos = {t: feeds[t]['Close'] for t, c in claves.items() if memo.get(t, (None,))[0] != c}
+    for ticker, res in calcular_garch_lote(nuevos, detalle=False).items():
+        memo[ticker] = (claves[ticker], None if res is None else res["nivel"])
+    return {t: memo[t][1] for t in claves}
+
+
+def tabla_watchlist(tickers, resultados, garch=None):
+    """
+    DataFrame con una fila por ticker (en el orden de `tickers`).
+    `garch`: {ticker: régimen} (niveles_garch) para la columna de volatilidad.
+    """
+    columnas = (["ticker", "cierre", "consenso", "garch"]
+                + [f"vwap_{tf}" for tf in TFS] + [f"rsi_{tf}" for tf in TFS]
+                + [f"poc_{tf}_%" for tf in TFS]
+                + ["div_alcista", "div_bajista", "diamante", "error"])
+    filas = [dict(fila_watchlist(t, resultados[t]), garch=(garch or {}).get(t))
+             for t in tickers if t in resultados]
+    return pd.DataFrame(filas, columns=columnas)
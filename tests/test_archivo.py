@@ -0,0 +1,86 @@
+"""Archivo histórico: lecturas consistentes con escrituras intercaladas y la historia por TF de los gráficos."""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from radar.archivo import ArchivoHistorico
+from radar.resampleo import historias_timeframes, resamplear
+from radar.sintetico import generar_ohlcv
+
+
+def test_bloques_no_repiten_ni_saltan_con_escritura_entre_bloques(tmp_path):
+    df = generar_ohlcv(1200)
+    archivo = ArchivoHistorico(str(tmp_path))
+    archivo.agregar("GC=F", "1h", df.iloc[:1000])
+    leidos = []
+    for i, bloque in enumerate(archivo.bloques("GC=F", "1h", filas=300)):
+        leidos.append(bloque)
+        if i == 0:
+            # Revisión de la última barra + barras nuevas mientras se itera
+            revisada = df.iloc[999:1200].copy()
+            revisada.iloc[0, revisada.columns.get_loc("Close")] += 1
+            archivo.agregar("GC=F", "1h", revisada)
+    todo = pd.concat(leidos)
+    assert todo.index.is_unique and todo.index.is_monotonic_increasing
+    assert len(todo) == 1200
+    assert todo["Close"].iloc[999] == df["Close"].iloc[999] + 1
+
+
+def test_lectores_no_ven_reescrituras_a_medias(tmp_path):
+    df = generar_ohlcv(3000)
+    archivo = ArchivoHistorico(str(tmp_path))
+    archivo.agregar("GC=F", "1h", df)
+    fin = threading.Event()
+
+    def escritor():
+        # Reescribe las últimas 2000 filas con todas las columnas desplazadas en +k
+        k = 0
+        while not fin.is_set():
+            k += 1
+            archivo.agregar("GC=F", "1h", df.iloc[1000:] + k)
+
+    hilo = threading.Thread(target=escritor)
+    hilo.start()
+    try:
+        for _ in range(200):
+            leido = archivo.ultimos("GC=F", "1h", pd.Timedelta(days=60))
+            # En cada fila todas las columnas vienen de la misma escritura
+            desplazamiento = leido["Close"].to_numpy() - df["Close"].loc[leido.index].to_numpy()
+            for c in ("Open", "High", "Low", "Volume"):
+                np.testing.assert_allclose(leido[c] - df[c].loc[leido.index], desplazamiento, atol=1e-6)
+            assert np.unique(np.round(desplazamiento, 6)).size == 1
+    finally:
+        fin.set()
+        hilo.join()
+
+
+def test_historias_por_tf_se_reutilizan_hasta_que_cambia_el_archivo(tmp_path, monkeypatch):
+    df = generar_ohlcv(3000)
+    archivo = ArchivoHistorico(str(tmp_path))
+    assert archivo.firma("GC=F", "1h") is None
+    archivo.agregar("GC=F", "1h", df.iloc[:-1])
+    lecturas = []
+    ultimos = archivo.ultimos
+    monkeypatch.setattr(archivo, "ultimos", lambda *a: lecturas.append(a) or ultimos(*a))
+    memo, tfs = {}, ("1H", "4H", "1D")
+
+    historias = historias_timeframes(archivo, "GC=F", "60d", tfs, memo=memo)
+    base = archivo.leer("GC=F", "1h")
+    base = base[base.index >= base.index[-1] - pd.Timedelta(days=60)]
+    for tf in tfs:
+        pd.testing.assert_frame_equal(historias[tf], resamplear(base, tf))
+    # Otro rerun sin barras nuevas: mismos frames, sin leer el archivo
+    assert historias_timeframes(archivo, "GC=F", "60d", tfs, memo=memo) is historias
+    assert len(lecturas) == 1
+    # Revisión de la última barra (mismas filas y tiempo) y barra nueva: se recalcula
+    revisada = df.iloc[-2:-1] * 1.01
+    archivo.agregar("GC=F", "1h", revisada)
+    revisadas = historias_timeframes(archivo, "GC=F", "60d", tfs, memo=memo)
+    assert revisadas["1H"]["Close"].iloc[-1] == revisada["Close"].iloc[-1]
+    archivo.agregar("GC=F", "1h", df.iloc[-1:])
+    nuevas = historias_timeframes(archivo, "GC=F", "60d", tfs, memo=memo)
+    assert nuevas["1H"].index[-1] == df.index[-1] and len(lecturas) == 3
+    # Otro período: otra historia
+    historias_timeframes(archivo, "GC=F", "30d", tfs, memo=memo)
+    assert len(lecturas) == 4
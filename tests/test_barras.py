@@ -0,0 +1,83 @@
+"""Ring buffer columnar: descarte al llenarse, vistas sin copia de solo lectura y vistas estables ante revisiones."""
+import numpy as np
+import pytest
+
+from radar.barras import Barras
+
+
+def _velas(t0, n):
+    """n velas con tiempos t0.. y Close = tiempo (fácil de verificar)."""
+    t = np.arange(t0, t0 + n, dtype=np.int64)
+    x = np.tile(t.astype(np.float32), (5, 1))
+    return t, x
+
+
+def test_descarta_las_mas_viejas_al_llenarse():
+    barras = Barras(capacidad=10)
+    for t0 in range(0, 25, 5):
+        barras.agregar(*_velas(t0, 5))
+        assert len(barras) == min(t0 + 5, 10)
+    assert barras.tiempos.tolist() == list(range(15, 25))
+    assert barras.close.tolist() == list(range(15, 25))
+    # Un lote más grande que la capacidad: solo entran sus últimas velas
+    barras.agregar(*_velas(100, 13))
+    assert barras.tiempos.tolist() == list(range(103, 113))
+    # Sin tope no se descarta nada
+    libre = Barras()
+    for t0 in range(0, 500, 50):
+        libre.agregar(*_velas(t0, 50))
+    assert len(libre) == 500 and libre.tiempos[0] == 0
+
+
+def test_vistas_sin_copia_y_de_solo_lectura():
+    barras = Barras(capacidad=100)
+    barras.agregar(*_velas(0, 60))
+    for vista, primera in ((barras.tail(20), 40), (barras.desde(45), 45), (barras.vista(), 0)):
+        assert vista.tiempos[0] == primera and vista.tiempos[-1] == 59
+        assert np.shares_memory(vista.tiempos, barras._t)
+        assert np.shares_memory(vista.close, barras._x)
+        assert not vista.tiempos.flags.writeable and not vista.ohlcv.flags.writeable
+        with pytest.raises(ValueError):
+            vista.close[-1] = 0
+        with pytest.raises(ValueError):
+            vista.agregar(*_velas(60, 1))
+    assert len(barras.tail(0)) == 0 and len(barras.tail(500)) == 60
+
+
+def test_crece_en_el_lugar_sin_vistas_pendientes():
+    barras = Barras(capacidad=100)
+    barras.agregar(*_velas(0, 10))
+    t = barras._t
+    barras.agregar(*_velas(10, 10))
+    assert barras._t is t
+
+
+def test_vistas_estables_ante_revision():
+    barras = Barras(capacidad=100)
+    barras.agregar(*_velas(0, 30))
+    vista = barras.tail(5)
+    antes = vista.ohlcv.copy()
+    # La vela en formación se revisa: truncar + agregar sobre posiciones que la vista cubre
+    barras.truncar(29)
+    t, x = _velas(29, 1)
+    barras.agregar(t, x * 2)
+    assert np.array_equal(vista.ohlcv, antes)
+    assert barras.close[-1] == 58 and len(barras) == 30
+    assert not np.shares_memory(vista.ohlcv, barras._x)
+    # Una vela nueva después de la vista no necesita realojar
+    barras.agregar(*_velas(30, 1))
+    assert barras.tiempos[-1] == 30 and np.array_equal(vista.ohlcv, antes)
+
+
+def test_vistas_estables_ante_compactacion():
+    barras = Barras(capacidad=8)
+    barras.agregar(*_velas(0, 8))
+    vista = barras.vista()
+    antes = vista.tiempos.copy(), vista.ohlcv.copy()
+    almacenamiento = barras._t
+    # Al acabarse la holgura se compacta al inicio de un almacenamiento nuevo
+    for t0 in range(8, 400):
+        barras.agregar(*_velas(t0, 1))
+    assert barras._t is not almacenamiento
+    assert np.array_equal(vista.tiempos, antes[0]) and np.array_equal(vista.ohlcv, antes[1])
+    assert barras.tiempos.tolist() == list(range(392, 400))
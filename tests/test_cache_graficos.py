@@ -0,0 +1,51 @@
+"""Caché de PNG por huella de datos: reutiliza sin renderizar, re-renderiza si cambian, LRU por bytes."""
+import numpy as np
+
+from radar.cache_graficos import CacheGraficos, huella
+from radar.sintetico import generar_ohlcv
+
+
+class Render:
+    """renderizar() falso que cuenta llamadas y devuelve `tam` bytes."""
+
+    def __init__(self, tam=100):
+        self.tam, self.llamadas = tam, 0
+
+    def __call__(self):
+        self.llamadas += 1
+        return bytes([self.llamadas % 256]) * self.tam
+
+
+def test_misma_huella_reutiliza_el_png():
+    df = generar_ohlcv(300)
+    cache, render = CacheGraficos(), Render()
+    png = cache.obtener_o_renderizar(huella(df, "GC=F", "1H"), render)
+    # Otro rerun: DataFrame igual pero otro objeto
+    assert cache.obtener_o_renderizar(huella(df.copy(), "GC=F", "1H"), render) is png
+    assert render.llamadas == 1 and (cache.aciertos, cache.fallos) == (1, 1)
+
+
+def test_datos_distintos_re_renderizan():
+    df = generar_ohlcv(300)
+    cache, render = CacheGraficos(), Render()
+    cache.obtener_o_renderizar(huella(df, "1H"), render)
+    revisado = df.copy()
+    revisado.iloc[-1, revisado.columns.get_loc("Close")] += 0.01      # vela en formación revisada
+    cache.obtener_o_renderizar(huella(revisado, "1H"), render)
+    cache.obtener_o_renderizar(huella(df, "4H"), render)                # mismo dato, otro gráfico
+    cache.obtener_o_renderizar(huella(df.values.astype(np.float32), "1H"), render)
+    assert render.llamadas == 4 and len(cache) == 4
+
+
+def test_lru_respeta_el_tope_de_bytes():
+    cache, render = CacheGraficos(max_bytes=350), Render(tam=100)
+    for clave in "abc":
+        cache.obtener_o_renderizar(clave, render)
+    cache.obtener("a")                                  # 'a' pasa a ser la más reciente
+    cache.obtener_o_renderizar("d", render)             # 400 bytes > 350: sale la menos usada, 'b'
+    assert len(cache) == 3 and cache._bytes <= 350
+    assert cache.obtener("b") is None
+    assert all(cache.obtener(c) is not None for c in "acd")
+    # Un solo PNG más grande que el tope se guarda igual (si no, se renderizaría siempre)
+    cache.guardar("e", b"x" * 1000)
+    assert len(cache) == 1 and cache.obtener("e") is not None
@@ -0,0 +1,104 @@
+"""AlmacenOHLCV: backfill del inicio, stale-while-revalidate, reintentos y single-flight (sin red)."""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from radar.datos import PERIODO_BASE, AlmacenOHLCV
+from radar.proveedores import ProveedorArchivos
+from radar.resampleo import CAPACIDAD_RADAR, MultiTimeframe, sesion_de, timeframes_radar
+from radar.sintetico import generar_ohlcv
+
+TICKER = "GC=F"
+
+
+@pytest.fixture
+def proveedor(tmp_path):
+    prov = ProveedorArchivos(str(tmp_path / "proveedor"))
+    fin = pd.Timestamp.now(tz="UTC").floor("h") - pd.Timedelta("1h")
+    prov.guardar(TICKER, "1h", generar_ohlcv(13000, fin=fin))
+    return prov
+
+
+def _dias_1d(df):
+    motor = MultiTimeframe(("4H", "1D"), sesion_de(TICKER), capacidad=CAPACIDAD_RADAR)
+    motor.actualizar(df)
+    diario = timeframes_radar(motor)["1D"].indice()
+    return (diario[-1] - diario[0]).days
+
+
+@pytest.mark.parametrize("reinicio", [False, True])
+def test_historia_corta_se_completa(tmp_path, proveedor, reinicio):
+    cache = str(tmp_path / "cache")
+    almacen = AlmacenOHLCV(cache, proveedor=proveedor)
+    corta = almacen.obtener(TICKER, "60d", "1h")
+    assert (corta.index[-1] - corta.index[0]).days <= 60
+    if reinicio:
+        almacen = AlmacenOHLCV(cache, proveedor=proveedor)
+
+    df = almacen.obtener(TICKER, PERIODO_BASE, "1h")
+    assert (df.index[-1] - df.index[0]).days >= 700
+    assert _dias_1d(df) >= 360
+
+    # Ya cubierta: el siguiente refresco es una sola petición incremental
+    peticiones = proveedor.peticiones
+    AlmacenOHLCV(cache, proveedor=proveedor, ttl=0).obtener(TICKER, PERIODO_BASE, "1h")
+    assert proveedor.peticiones == peticiones + 1
+
+
+def _almacen(tmp_path, proveedor, **kwargs):
+    kwargs.setdefault("espera_reintento", 0.01)
+    return AlmacenOHLCV(str(tmp_path / "cache"), proveedor=proveedor, **kwargs)
+
+
+def _nueva_barra(proveedor, ticker=TICKER):
+    """El proveedor pasa a tener una barra más (la hora siguiente)."""
+    df = proveedor.descargar(ticker, "730d", "1h")
+    siguiente = df.iloc[-1:].copy()
+    siguiente.index = siguiente.index + pd.Timedelta("1h")
+    proveedor.guardar(ticker, "1h", pd.concat([df, siguiente]))
+    return siguiente.index[0]
+
+
+def test_obsoleto_al_instante_y_refresco_en_segundo_plano(tmp_path, proveedor):
+    almacen = _almacen(tmp_path, proveedor, timeout=5)
+    viejo = almacen.obtener(TICKER, "60d", "1h")
+    nueva = _nueva_barra(proveedor)
+    proveedor.latencia = 0.5                      # más lento que la app, dentro del timeout
+
+    t0 = time.perf_counter()
+    df = almacen.obtener(TICKER, "60d", "1h", esperar=False, ttl=0)
+    assert time.perf_counter() - t0 < 0.3         # no espera al proveedor
+    assert df.index[-1] == viejo.index[-1]
+
+    limite = time.time() + 10
+    while almacen.obtener(TICKER, "60d", "1h", esperar=False).index[-1] != nueva:
+        assert time.time() < limite, "el refresco en segundo plano no llegó"
+        time.sleep(0.05)
+
+
+def test_reintentos_y_caché_si_fallan_todos(tmp_path, proveedor):
+    almacen = _almacen(tmp_path, proveedor, timeout=0.1, reintentos=2)
+    guardado = almacen.obtener(TICKER, "60d", "1h")
+    proveedor.latencia = 0.3                      # ningún intento responde a tiempo
+    peticiones = proveedor.peticiones
+    df = almacen.obtener(TICKER, "60d", "1h", ttl=0)
+    assert proveedor.peticiones - peticiones == 3          # 1 + reintentos
+    pd.testing.assert_frame_equal(df, guardado)
+
+    # Sin nada guardado el error llega a quien pidió, también tras los reintentos
+    proveedor.guardar("NQ=F", "1h", guardado)
+    peticiones = proveedor.peticiones
+    with pytest.raises(TimeoutError):
+        almacen.obtener("NQ=F", "60d", "1h")
+    assert proveedor.peticiones - peticiones == 3
+
+
+def test_pedidos_concurrentes_una_sola_descarga(tmp_path, proveedor):
+    almacen = _almacen(tmp_path, proveedor, timeout=5)
+    proveedor.latencia = 0.3
+    with ThreadPoolExecutor(8) as ejecutor:
+        resultados = list(ejecutor.map(lambda _: almacen.obtener(TICKER, "60d", "1h"), range(8)))
+    assert proveedor.peticiones == 1
+    assert all(r.equals(resultados[0]) for r in resultados)
@@ -0,0 +1,106 @@
+"""Walk-forward de ARIMA/GARCH contra los ajustes directos y métricas sobre casos armados a mano."""
+import warnings
+
+import numpy as np
+import pytest
+
+from radar import evaluacion, modelos
+from radar.sintetico import generar_ohlcv
+
+CLOSE = generar_ohlcv(420, semilla=2)["Close"]
+VENTANA, PERIODOS, REFIT = 200, 10, 8
+
+
+@pytest.mark.skipif(not modelos.ARIMA_DISPONIBLE, reason="statsmodels no instalado")
+def test_arima_igual_al_ajuste_directo():
+    from statsmodels.tsa.arima.model import ARIMA
+    wf = evaluacion.walk_forward_arima(CLOSE, PERIODOS, VENTANA, refit_cada=REFIT, origenes=20)
+    v = CLOSE.to_numpy(float)
+    pos = evaluacion._origenes(len(v), VENTANA, 20)
+    assert wf["ajustes"] == 3 and len(wf["mu"]) == len(pos)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        # Origen de re-ajuste (primer bloque: arranque en frío, como un ajuste directo)
+        ventana = v[pos[0] - VENTANA + 1:pos[0] + 1]
+        fit = ARIMA(ventana, order=modelos.ORDEN_ARIMA).fit()
+        fc = fit.get_forecast(PERIODOS)
+        ci = fc.conf_int(alpha=0.05)
+        assert np.allclose(wf["mu"][0], fc.predicted_mean, rtol=1e-9)
+        assert np.allclose(wf["ci_inf"][0], ci[:, 0], rtol=1e-9)
+        assert np.allclose(wf["ci_sup"][0], ci[:, 1], rtol=1e-9)
+        # Orígenes entre ajustes: filtro de Kalman con los parámetros del bloque
+        for j in range(1, REFIT):
+            filtrado = ARIMA(v[pos[0] - VENTANA + 1:pos[j] + 1], order=modelos.ORDEN_ARIMA).filter(fit.params)
+            fc = filtrado.get_forecast(PERIODOS)
+            ci = fc.conf_int(alpha=0.05)
+            assert np.allclose(wf["mu"][j], fc.predicted_mean, rtol=1e-9)
+            assert np.allclose(wf["ci_inf"][j], ci[:, 0], rtol=1e-9)
+            assert np.allclose(wf["ci_sup"][j], ci[:, 1], rtol=1e-9)
+        # Segundo bloque: re-ajuste en caliente desde los parámetros del primero, sin
+        # perder verosimilitud frente al ajuste en frío
+        modelo = ARIMA(v[pos[REFIT] - VENTANA + 1:pos[REFIT] + 1], order=modelos.ORDEN_ARIMA)
+        caliente = modelo.fit(start_params=fit.params)
+        assert np.allclose(wf["mu"][REFIT], caliente.get_forecast(PERIODOS).predicted_mean, rtol=1e-9)
+        assert caliente.llf >= modelo.fit().llf - 1e-3
+    assert np.array_equal(wf["ultimo"], v[pos])
+    assert np.array_equal(wf["real"][:, 0], v[pos + 1])
+
+
+@pytest.mark.skipif(not modelos.GARCH_DISPONIBLE, reason="arch no instalado")
+def test_garch_igual_al_ajuste_directo():
+    from arch import arch_model
+    wf = evaluacion.walk_forward_garch(CLOSE, PERIODOS, VENTANA, refit_cada=REFIT, origenes=20)
+    r = CLOSE.pct_change().dropna().to_numpy() * 100
+    pos = evaluacion._origenes(len(r), VENTANA, 20)
+    modelo = lambda fin: arch_model(r[pos[0] - VENTANA + 1:fin + 1], vol='Garch', p=1, q=1,
+                                    mean='Zero', rescale=False)
+    fit = modelo(pos[0]).fit(disp='off', show_warning=False)
+    var = fit.forecast(horizon=PERIODOS, reindex=False).variance.to_numpy()[-1]
+    assert np.allclose(wf["vol_pred"][0], np.sqrt(var), rtol=1e-9)
+    # Orígenes entre ajustes: forecast(start=...) con los parámetros fijos del bloque
+    for j in range(1, REFIT):
+        var = modelo(pos[j]).fix(fit.params).forecast(horizon=PERIODOS, reindex=False).variance.to_numpy()[-1]
+        assert np.allclose(wf["vol_pred"][j], np.sqrt(var), rtol=1e-9)
+    # Volatilidad realizada y régimen: los de la app sobre la misma ventana
+    media = np.std(r[pos[0] - VENTANA + 1:pos[0] + 1], ddof=1)
+    assert wf["vol_media"][0] == pytest.approx(media)
+    assert wf["vol_real"][0] == pytest.approx(np.sqrt(np.mean(r[pos[0] + 1:pos[0] + 1 + PERIODOS] ** 2)))
+    assert wf["nivel"][0] == modelos.nivel_volatilidad(wf["vol_pred"][0].mean() / media)
+    assert np.isnan(wf["vol_real"][-1]) and wf["nivel_real"][-1] is None
+
+
+def test_metricas_arima_a_mano():
+    wf = {
+        "ultimo": np.array([100.0, 100.0]),
+        "mu": np.array([[101.0, 103.0], [99.0, 97.0]]),
+        "real": np.array([[102.0, 104.0], [98.0, np.nan]]),
+        "ci_inf": np.array([[100.5, 100.0], [97.0, 90.0]]),
+        "ci_sup": np.array([[101.5, 106.0], [101.0, 99.0]]),
+    }
+    h1, h2 = evaluacion.metricas_arima(wf)
+    assert h1["horizonte"] == 1 and h1["n"] == 2
+    assert h1["mae"] == pytest.approx(1.0) and h1["rmse"] == pytest.approx(1.0)
+    assert h1["mape_%"] == pytest.approx((1 / 102 + 1 / 98) / 2 * 100)
+    assert h1["mae_ingenuo"] == pytest.approx(2.0)
+    assert h1["acierto_direccion_%"] == 100.0
+    assert h1["cobertura_95_%"] == 50.0        # 102 fuera de [100.5, 101.5], 98 dentro de [97, 101]
+    assert h1["sesgo"] == pytest.approx(0.0)
+    # Horizonte 2: el segundo origen no tiene dato real y queda fuera
+    assert h2["horizonte"] == 2 and h2["n"] == 1
+    assert h2["sesgo"] == pytest.approx(-1.0) and h2["cobertura_95_%"] == 100.0
+
+
+def test_metricas_garch_a_mano():
+    wf = {
+        "vol_pred": np.ones((3, 4)),
+        "vol_futura": np.array([1.0, 2.0, 0.4]),
+        "vol_real": np.array([1.5, 2.0, np.nan]),
+        "nivel": np.array(["NORMAL", "ALTA", "BAJA"], dtype=object),
+        "nivel_real": np.array(["ALTA", "ALTA", None], dtype=object),
+    }
+    [fila] = evaluacion.metricas_garch(wf)
+    assert fila["horizonte"] == 4 and fila["n"] == 2
+    assert fila["mae"] == pytest.approx(0.25)
+    assert fila["rmse"] == pytest.approx(np.sqrt(0.125))
+    assert fila["sesgo"] == pytest.approx(-0.25)
+    assert fila["acierto_nivel_%"] == 50.0
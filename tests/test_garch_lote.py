@@ -0,0 +1,50 @@
+"""GARCH(1,1) por lotes contra modelos.calcular_garch (arch) sobre las mismas series."""
+import warnings
+
+import numpy as np
+import pytest
+
+from radar import modelos
+from radar.garch_lote import ajustar_garch_lote, calcular_garch_lote
+from radar.sintetico import generar_ohlcv
+
+pytestmark = pytest.mark.skipif(not modelos.GARCH_DISPONIBLE, reason="arch no instalado")
+
+PRECIOS = {f"{intervalo}_{semilla}": generar_ohlcv(400, intervalo, semilla=semilla)["Close"]
+           for intervalo in ("1h", "1d") for semilla in range(8)}
+
+
+def _ajuste_arch(precios):
+    from arch import arch_model
+    ret = (precios.pct_change().dropna() * 100).tail(200)
+    modelo = arch_model(ret, vol='Garch', p=1, q=1, mean='Zero', rescale=False)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        return modelo, modelo.fit(disp='off', show_warning=False), ret
+
+
+@pytest.fixture(scope="module")
+def lote():
+    return calcular_garch_lote(PRECIOS)
+
+
+@pytest.mark.parametrize("ticker", sorted(PRECIOS))
+def test_igual_a_arch(lote, ticker):
+    modelo, fit, ret = _ajuste_arch(PRECIOS[ticker])
+    _, alfa, beta = fit.params.to_numpy()
+    res, ref = lote[ticker], modelos.calcular_garch(PRECIOS[ticker])
+    if alfa > 1e-6 and alfa + beta < 1 - 1e-6:
+        np.testing.assert_allclose(res["vol_pred"], ref["vol_pred"], rtol=1e-3)
+        assert res["ratio"] == pytest.approx(ref["ratio"], rel=1e-3)
+        assert res["nivel"] == ref["nivel"]
+    else:
+        # arch se detiene en el borde (alfa = 0 o alfa + beta = 1): el lote no puede ser peor
+        omega, a, b, _ = ajustar_garch_lote(ret.to_numpy()[None, :])
+        assert modelo.fix([omega[0], a[0], b[0]]).loglikelihood >= fit.loglikelihood - 1e-6
+    assert res["vol_media"] == pytest.approx(ref["vol_media"], rel=1e-12)
+    assert res["vol_hist"].equals(ref["vol_hist"])
+    assert (res["idx_fut"] == ref["idx_fut"]).all()
+
+
+def test_sin_datos_suficientes():
+    assert calcular_garch_lote({"X": generar_ohlcv(50)["Close"]}) == {"X": None}
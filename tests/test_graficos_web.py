@@ -0,0 +1,57 @@
+"""Specs Vega-Lite de los TF: la historia larga va reducida en su franja, la ventana completa."""
+import json
+
+import matplotlib.pyplot as plt
+import pytest
+
+from radar import modelos
+from radar.graficos import graficar_arima_forecast, huella_arima
+from radar.graficos_web import spec_arima, spec_timeframe
+from radar.indicadores import calcular_timeframe
+from radar.resampleo import resamplear
+from radar.sintetico import generar_ohlcv
+
+
+def _params(nodo):
+    if isinstance(nodo, dict):
+        return [p["name"] for p in nodo.get("params", [])] + [n for v in nodo.values() for n in _params(v)]
+    if isinstance(nodo, list):
+        return [n for v in nodo for n in _params(v)]
+    return []
+
+
+def test_franja_de_historia():
+    feed = generar_ohlcv(12000)
+    historia = resamplear(feed, "4H")
+    calc = calcular_timeframe(historia.tail(360))
+    spec = spec_timeframe(calc, "GC", "4H", puntos=400, historia=historia)
+    json.dumps(spec, allow_nan=False)
+    datos = spec["datasets"]
+    assert len(datos["precio"]) == 360              # la ventana no se reduce
+    assert len(datos["historia"]) == 400            # ~3000 velas de 4H reducidas con LTTB
+    assert datos["historia"][0]["t"] < datos["precio"][0]["t"]
+    assert spec["resolve"] == {"scale": {"x": "independent"}}
+    nombres = _params(spec)
+    assert len(nombres) == len(set(nombres))        # Vega-Lite exige nombres de parámetro únicos
+
+
+def test_sin_historia_previa_no_hay_franja():
+    df = generar_ohlcv(500)
+    calc = calcular_timeframe(df.tail(168))
+    for historia in (None, df.tail(100)):
+        spec = spec_timeframe(calc, "GC", "1H", historia=historia)
+        assert "historia" not in spec["datasets"]
+        assert spec["resolve"] == {"scale": {"x": "shared"}}
+
+
+@pytest.mark.skipif(not modelos.ARIMA_DISPONIBLE, reason="statsmodels no instalado")
+def test_titulo_arima_con_el_orden_usado():
+    res = modelos.calcular_arima(generar_ohlcv(300, semilla=4)["Close"])
+    elegido = dict(res, orden=(1, 1, 0))
+    assert spec_arima(res, "GC")["title"]["text"].startswith("ARIMA(2, 1, 2) — GC")
+    assert spec_arima(elegido, "GC")["title"]["text"].startswith("ARIMA(1, 1, 0) — GC")
+    fig = graficar_arima_forecast(elegido, "GC")
+    assert fig.axes[0].get_title().startswith("ARIMA(1, 1, 0)")
+    plt.close(fig)
+    # Mismo pronóstico con otro orden: otro PNG en la caché de render
+    assert huella_arima(res, "GC") != huella_arima(elegido, "GC")
@@ -0,0 +1,38 @@
+"""Divergencias vectorizadas contra el loop original (una barra a la vez)."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from radar.indicadores import calcular_rsi, detectar_divergencias
+from radar.sintetico import generar_ohlcv
+
+
+def divergencias_loop(precios, rsi, lookback=5):
+    """Implementación de referencia: el loop de Triple_Radar_v10 antes de vectorizar."""
+    alcistas, bajistas = [], []
+    for i in range(lookback * 2, len(precios)):
+        p_curr, p_prev = float(precios.iloc[i]), float(precios.iloc[i - lookback])
+        r_curr = float(rsi.iloc[i]) if not pd.isna(rsi.iloc[i]) else np.nan
+        r_prev = float(rsi.iloc[i - lookback]) if not pd.isna(rsi.iloc[i - lookback]) else np.nan
+        if np.isnan(r_curr) or np.isnan(r_prev):
+            continue
+        if p_curr > p_prev and r_curr < r_prev and r_curr > 60:
+            bajistas.append(i)
+        if p_curr < p_prev and r_curr > r_prev and r_curr < 40:
+            alcistas.append(i)
+    return alcistas, bajistas
+
+
+@pytest.mark.parametrize("intervalo,semilla", [("1h", 0), ("1h", 7), ("1d", 3)])
+@pytest.mark.parametrize("lookback", [3, 5, 10])
+def test_divergencias_igual_al_loop(intervalo, semilla, lookback):
+    close = generar_ohlcv(2000, intervalo, semilla=semilla)["Close"]
+    rsi = calcular_rsi(close)
+    esperado = divergencias_loop(close, rsi, lookback)
+    assert esperado[0] and esperado[1]      # la serie tiene señales de los dos lados
+    assert detectar_divergencias(close, rsi, lookback) == esperado
+
+
+def test_divergencias_serie_corta():
+    close = generar_ohlcv(8)["Close"]
+    assert detectar_divergencias(close, calcular_rsi(close)) == ([], [])
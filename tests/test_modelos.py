@@ -0,0 +1,32 @@
+"""Búsqueda del orden ARIMA: d por raíz unitaria, (p, q) por criterio con ese d."""
+import numpy as np
+import pytest
+
+from radar import modelos
+from radar.sintetico import generar_ohlcv
+
+pytestmark = pytest.mark.skipif(not modelos.ARIMA_DISPONIBLE, reason="statsmodels no instalado")
+
+
+def test_precio_se_diferencia():
+    precios = generar_ohlcv(200, semilla=1)["Close"].to_numpy()
+    assert modelos.orden_diferencia(precios) == 1
+
+
+def test_serie_estacionaria_no_se_diferencia():
+    rng = np.random.default_rng(0)
+    x = np.zeros(200)
+    for i in range(1, len(x)):
+        x[i] = 0.5 * x[i - 1] + rng.standard_normal()
+    assert modelos.orden_diferencia(100 + x) == 0
+
+
+def test_grilla_con_un_solo_d():
+    assert {o[1] for o in modelos.grilla_ordenes(1)} == {1}
+    assert len(modelos.grilla_ordenes(0)) == 16
+
+
+def test_seleccionar_orden_usa_el_d_del_test():
+    precios = generar_ohlcv(200, semilla=1)["Close"].to_numpy()
+    orden, valor = modelos.seleccionar_orden(precios)
+    assert orden[1] == 1 and valor is not None
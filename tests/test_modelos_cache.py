@@ -0,0 +1,130 @@
+"""Caché de ajustes ARIMA/GARCH: filtro con parámetros reutilizados, re-ajuste en caliente y ajuste completo."""
+import threading
+import warnings
+
+import numpy as np
+import pytest
+
+from radar import modelos
+from radar.sintetico import generar_ohlcv
+
+CLAVE = ("GC=F", "1H")
+CLOSE = generar_ohlcv(400, semilla=1)["Close"]
+RET = CLOSE.pct_change().dropna() * 100
+
+
+def _registrar_ajustes(monkeypatch, clase):
+    """Envuelve clase.fit para anotar los kwargs de cada ajuste (MLE) que se hace."""
+    ajustes = []
+    original = clase.fit
+
+    def fit(self, *args, **kwargs):
+        ajustes.append(kwargs)
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(clase, "fit", fit)
+    return ajustes
+
+
+@pytest.mark.skipif(not modelos.ARIMA_DISPONIBLE, reason="statsmodels no instalado")
+def test_arima_filtro_y_reajuste_en_caliente(monkeypatch):
+    from statsmodels.tsa.arima.model import ARIMA
+    ventana = lambda fin: CLOSE.iloc[:fin].tail(modelos.VENTANA_ARIMA)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        frio = {fin: ARIMA(ventana(fin).to_numpy(), order=modelos.ORDEN_ARIMA).fit().get_forecast(10)
+                for fin in (304, 305)}
+    ajustes = _registrar_ajustes(monkeypatch, ARIMA)
+    cache = {}
+
+    modelos.pronosticar_arima(ventana(300), clave=CLAVE, cache=cache, refit_cada=5)
+    entrada = cache[("arima", CLAVE)]
+    assert entrada["modo"] == "ajuste" and "start_params" not in ajustes[0]
+    params = entrada["params"].copy()
+
+    # Misma última barra: pronóstico guardado
+    modelos.pronosticar_arima(ventana(300), clave=CLAVE, cache=cache, refit_cada=5)
+    assert cache[("arima", CLAVE)]["modo"] == "cache" and len(ajustes) == 1
+
+    # Barras nuevas antes del intervalo: se filtra con los mismos parámetros, sin MLE
+    for fin in range(301, 305):
+        media, _, _ = modelos.pronosticar_arima(ventana(fin), clave=CLAVE, cache=cache, refit_cada=5)
+        entrada = cache[("arima", CLAVE)]
+        assert entrada["modo"] == "filtro" and np.array_equal(entrada["params"], params)
+    assert len(ajustes) == 1
+    np.testing.assert_allclose(media, frio[304].predicted_mean, rtol=1e-3)
+
+    # Al cumplirse el intervalo: re-ajuste arrancando de los parámetros guardados
+    media, _, _ = modelos.pronosticar_arima(ventana(305), clave=CLAVE, cache=cache, refit_cada=5)
+    entrada = cache[("arima", CLAVE)]
+    assert entrada["modo"] == "ajuste" and entrada["desde_ajuste"] == 0
+    assert len(ajustes) == 2 and np.array_equal(ajustes[1]["start_params"], params)
+    np.testing.assert_allclose(media, frio[305].predicted_mean, rtol=1e-4)
+
+    # Otro orden: ajuste desde cero
+    modelos.pronosticar_arima(ventana(305), clave=CLAVE, cache=cache, orden=(1, 1, 1))
+    assert "start_params" not in ajustes[2]
+
+
+@pytest.mark.skipif(not modelos.GARCH_DISPONIBLE, reason="arch no instalado")
+def test_garch_parametros_fijos_y_reajuste_en_caliente(monkeypatch):
+    from arch import arch_model
+    from arch.univariate.base import ARCHModel
+    ventana = lambda fin: RET.iloc[:fin].tail(200)
+
+    def frio(fin):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            fit = arch_model(ventana(fin), vol='Garch', p=1, q=1, mean='Zero', rescale=False).fit(disp='off')
+        return np.sqrt(fit.forecast(horizon=10).variance.values[-1])
+    frios = {fin: frio(fin) for fin in (304, 305)}
+    ajustes = _registrar_ajustes(monkeypatch, ARCHModel)
+    cache = {}
+
+    modelos.pronosticar_garch(ventana(300), clave=CLAVE, cache=cache, refit_cada=5)
+    entrada = cache[("garch", CLAVE)]
+    assert entrada["modo"] == "ajuste" and ajustes[0].get("starting_values") is None
+    params = entrada["params"].copy()
+
+    modelos.pronosticar_garch(ventana(300), clave=CLAVE, cache=cache, refit_cada=5)
+    assert cache[("garch", CLAVE)]["modo"] == "cache" and len(ajustes) == 1
+
+    for fin in range(301, 305):
+        vol = modelos.pronosticar_garch(ventana(fin), clave=CLAVE, cache=cache, refit_cada=5)
+        entrada = cache[("garch", CLAVE)]
+        assert entrada["modo"] == "filtro" and np.array_equal(entrada["params"], params)
+    assert len(ajustes) == 1
+    np.testing.assert_allclose(vol, frios[304], rtol=0.05)
+
+    vol = modelos.pronosticar_garch(ventana(305), clave=CLAVE, cache=cache, refit_cada=5)
+    entrada = cache[("garch", CLAVE)]
+    assert entrada["modo"] == "ajuste" and entrada["desde_ajuste"] == 0
+    assert len(ajustes) == 2 and np.array_equal(ajustes[1]["starting_values"], params)
+    np.testing.assert_allclose(vol, frios[305], rtol=1e-3)
+
+
+def test_cache_compartida_entre_hilos():
+    """Sesiones que leen las entradas de un ticker mientras otras guardan ajustes."""
+    cache = {("arima", (f"T{i}", "1H")): {"modo": "ajuste"} for i in range(2000)}
+    fin, errores = threading.Event(), []
+
+    def escritor():
+        i = 0
+        while not fin.is_set():
+            i += 1
+            modelos.actualizar_cache(cache, {("garch", (f"N{i}", "1H")): {"modo": "ajuste"}})
+            with modelos.CACHE_LOCK:
+                cache.pop(("garch", (f"N{i - 1}", "1H")), None)
+
+    hilo = threading.Thread(target=escritor)
+    hilo.start()
+    try:
+        for _ in range(300):
+            try:
+                assert len(modelos.entradas_de(cache, "T7")) == 1
+            except RuntimeError as e:      # dictionary changed size during iteration
+                errores.append(e)
+    finally:
+        fin.set()
+        hilo.join()
+    assert not errores
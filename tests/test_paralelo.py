@@ -0,0 +1,15 @@
+"""Claves de la caché compartida de resultados."""
+import numpy as np
+
+from radar.paralelo import clave_activo
+from radar.sintetico import generar_ohlcv
+
+
+def test_clave_con_nan_es_estable():
+    df = generar_ohlcv(50)
+    df.iloc[-1, df.columns.get_loc("Volume")] = np.nan     # vela en formación sin volumen
+    copia = df.copy()
+    assert clave_activo("GC=F", df, con_modelos=True) == clave_activo("GC=F", copia, con_modelos=True)
+    assert hash(clave_activo("GC=F", df)) == hash(clave_activo("GC=F", copia))
+    copia.iloc[-1, copia.columns.get_loc("Close")] += 1
+    assert clave_activo("GC=F", df) != clave_activo("GC=F", copia)
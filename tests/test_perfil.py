@@ -0,0 +1,68 @@
+"""PerfilVolumen (incremental, grilla fija) contra perfil_volumen sobre las mismas velas."""
+import numpy as np
+import pytest
+
+from radar.archivo import ArchivoHistorico
+from radar.perfil import PerfilVolumen, area_de_valor, perfil_volumen
+from radar.sintetico import generar_ohlcv
+
+PASO = 0.25
+
+
+def _sobre_grilla(bordes, vol, referencia):
+    """Volumen de `bordes`/`vol` alineado a los bordes de `referencia`."""
+    k0 = int(round(referencia[0] / PASO))
+    salida = np.zeros(len(referencia) - 1)
+    i = int(round(bordes[0] / PASO)) - k0
+    salida[max(i, 0):i + len(vol)] = vol[max(-i, 0):len(salida) - i]
+    return salida
+
+
+def test_ventana_movil_igual_a_recalcular():
+    df = generar_ohlcv(600)
+    perfil = PerfilVolumen(PASO)
+    ventana = 120
+    for i in range(len(df)):
+        h, l, v = df.iloc[i][['High', 'Low', 'Volume']]
+        perfil.agregar(h, l, v)
+        if i >= ventana:
+            h, l, v = df.iloc[i - ventana][['High', 'Low', 'Volume']]
+            perfil.quitar(h, l, v)
+        if i % 50 == 0 or i == len(df) - 1:
+            bloque = df.iloc[max(0, i - ventana + 1):i + 1]
+            ref_bordes, ref_vol = perfil_volumen(bloque['High'], bloque['Low'], bloque['Volume'], paso=PASO)
+            bordes, vol = perfil.perfil()
+            np.testing.assert_allclose(_sobre_grilla(bordes, vol, ref_bordes), ref_vol, atol=1e-6)
+            assert perfil.resultado() == area_de_valor(ref_bordes, ref_vol)
+
+
+def test_bloques_igual_a_vela_por_vela():
+    df = generar_ohlcv(1000, semilla=5)
+    por_bloque = PerfilVolumen(PASO)
+    por_bloque.agregar_df(df.iloc[:400])
+    por_bloque.agregar_df(df.iloc[400:])
+    por_bloque.quitar_df(df.iloc[:300])
+    por_vela = PerfilVolumen(PASO)
+    for h, l, v in df.iloc[300:][['High', 'Low', 'Volume']].to_numpy():
+        por_vela.agregar(h, l, v)
+    b1, v1 = por_bloque.perfil()
+    b2, v2 = por_vela.perfil()
+    np.testing.assert_allclose(_sobre_grilla(b1, v1, b2), v2, atol=1e-6)
+    assert por_bloque.resultado() == por_vela.resultado()
+
+
+def test_perfil_del_archivo_por_bloques(tmp_path):
+    df = generar_ohlcv(5000, semilla=2)
+    archivo = ArchivoHistorico(str(tmp_path))
+    archivo.agregar("GC=F", "1h", df)
+    completo = archivo.perfil("GC=F", "1h", paso=PASO)
+    troceado = archivo.perfil("GC=F", "1h", paso=PASO, filas=700)
+    bordes, vol = perfil_volumen(df['High'], df['Low'], df['Volume'], paso=PASO)
+    assert (completo["poc"], completo["val"], completo["vah"]) == area_de_valor(bordes, vol)
+    np.testing.assert_allclose(troceado["volumen"], completo["volumen"], rtol=1e-9)
+    assert troceado["poc"] == completo["poc"]
+    # Sin paso: la grilla sale del rango de precios, como calcular_perfil
+    auto = archivo.perfil("GC=F", "1h", filas=700)
+    paso = (df['High'].max() - df['Low'].min()) / 50
+    assert auto["bordes"][1] - auto["bordes"][0] == pytest.approx(paso)
+    assert archivo.perfil("GC=F", "1h", desde="2100-01-01") is None
@@ -0,0 +1,34 @@
+"""CLI del scanner: lista de tickers y código de salida."""
+import json
+
+import pandas as pd
+
+from radar import scanner
+from radar.proveedores import ProveedorArchivos
+from radar.sintetico import generar_ohlcv
+
+
+def _correr(tmp_path, *argv):
+    datos = tmp_path / "datos"
+    fin = pd.Timestamp.now(tz="UTC").floor("h") - pd.Timedelta("1h")
+    ProveedorArchivos(str(datos)).guardar("GC=F", "1h", generar_ohlcv(3000, fin=fin))
+    salida = tmp_path / "salida.json"
+    codigo = scanner.main([*argv, "--datos-dir", str(datos), "--cache-dir", str(tmp_path / "cache"),
+                           "--sin-modelos", "--workers", "1", "--salida", str(salida)])
+    return codigo, json.loads(salida.read_text(encoding="utf-8"))
+
+
+def test_archivo_con_comentarios_en_linea(tmp_path):
+    lista = tmp_path / "tickers.txt"
+    lista.write_text("# metales\nGC=F  # oro\n\nGC=F\n", encoding="utf-8")
+    codigo, resumenes = _correr(tmp_path, "--archivo", str(lista))
+    assert codigo == 0
+    assert [r["ticker"] for r in resumenes] == ["GC=F"]
+    assert "error" not in resumenes[0]
+
+
+def test_codigo_de_salida(tmp_path):
+    codigo, resumenes = _correr(tmp_path, "GC=F", "NOEXISTE")
+    assert codigo == 0 and "error" in resumenes[1]      # fallo parcial: se informa, no se aborta
+    codigo, _ = _correr(tmp_path, "NOEXISTE")
+    assert codigo == 1
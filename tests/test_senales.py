@@ -0,0 +1,63 @@
+"""Historial vectorizado de señales contra el motor del radar, vela a vela."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from radar.indicadores import calcular_consenso, calcular_timeframe
+from radar.resampleo import CAPACIDAD_RADAR, MultiTimeframe, timeframes_radar
+from radar.senales import historial_senales
+from radar.sintetico import generar_ohlcv
+
+TFS = ("1H", "4H", "1D")
+
+
+def _feed(n, sesion, semilla):
+    """Feed sintético en valores representables en float32 (los que guarda el motor), con huecos de volumen."""
+    df = generar_ohlcv(n, huecos=sesion == "futuros", semilla=semilla).astype(np.float32).astype(float)
+    rng = np.random.default_rng(semilla)
+    df.loc[rng.random(len(df)) < 0.01, "Volume"] = np.nan
+    return df
+
+
+def _senales_motor(calcs):
+    """Fila del historial tal como la muestra el radar con los cálculos de cada TF."""
+    fila = {}
+    for tf in TFS:
+        calc = calcs[tf]
+        fila[f"tendencia_{tf}"] = 0 if calc is None else 1 if calc["tendencia"] == "COMPRA" else -1
+        ultima = -1 if calc is None else len(calc["barras"]) - 1
+        fila[f"div_alc_{tf}"] = calc is not None and ultima in calc["div_alc"]
+        fila[f"div_baj_{tf}"] = calc is not None and ultima in calc["div_baj"]
+        fila[f"diamante_{tf}"] = calc is not None and calc["diamante"]
+    return fila
+
+
+@pytest.mark.parametrize("sesion,semilla", [("futuros", 0), ("24x7", 5)])
+def test_historial_igual_al_motor_vela_a_vela(sesion, semilla):
+    df = _feed(8800, sesion, semilla)
+    historial = historial_senales(df, sesion)
+    motor = MultiTimeframe(("4H", "1D"), sesion, capacidad=CAPACIDAD_RADAR)
+    inicio = 8400
+    motor.actualizar(df.iloc[:inicio - 1])
+    previa, ultima_tf = None, None
+    for i in range(inicio - 1, len(df)):
+        motor.actualizar(df.iloc[:i + 1])
+        tfs = timeframes_radar(motor)
+        calcs = {tf: calcular_timeframe(tfs[tf]) for tf in TFS}
+        actual = _senales_motor(calcs)
+        vela_tf = {tf: tfs[tf].tiempos[-1] for tf in ("4H", "1D")}
+        if previa is not None:
+            fila = historial.iloc[i]
+            for tf in TFS:
+                assert fila[f"tendencia_{tf}"] == actual[f"tendencia_{tf}"], (i, tf)
+                # 1H: señal de la vela actual; 4H/1D: la de la vela del TF que cerró con la vela base anterior
+                if tf == "1H":
+                    esperada = actual
+                else:
+                    nueva = vela_tf[tf] != ultima_tf[tf]
+                    esperada = {k: nueva and v for k, v in previa.items()}
+                for clave in ("div_alc", "div_baj", "diamante"):
+                    assert fila[f"{clave}_{tf}"] == esperada[f"{clave}_{tf}"], (i, tf, clave)
+            consenso = calcular_consenso([calc["tendencia"] for calc in calcs.values() if calc is not None])
+            assert (None if pd.isna(fila["consenso"]) else fila["consenso"]) == consenso, i
+        previa, ultima_tf = actual, vela_tf
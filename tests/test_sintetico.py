@@ -0,0 +1,12 @@
+"""Los datos sintéticos traen exactamente las barras pedidas."""
+import pytest
+
+from radar.sintetico import generar_ohlcv
+
+
+@pytest.mark.parametrize("intervalo", ["1h", "1d"])
+@pytest.mark.parametrize("n", [1, 100, 9000, 50000])
+def test_cantidad_exacta(intervalo, n):
+    df = generar_ohlcv(n, intervalo)
+    assert len(df) == n
+    assert df.index.is_monotonic_increasing and df.index.is_unique